@@ -1,4 +1,5 @@
 import PyQt6.QtWidgets as qtw
+import multiprocessing
 import platform
 import sys
 import os
@@ -31,7 +32,28 @@ def main():
     recorder.show()
     sys.exit(app.exec())
 
+def run_transcode(argv):
+    # Headless batch transcoding of the archive: `app.py transcode --help`.
+    from configparser import ConfigParser
+    from common.batch_transcode import run_cli
+
+    config = ConfigParser()
+    config.read('config.ini')
+    folder = config.get('Settings', 'output_folder', fallback=os.path.join(os.getcwd(), "OutputFiles"))
+    if platform.system() == 'Windows':
+        base_path = getattr(sys, '_MEIPASS', current_dir)
+        ffmpeg_path = os.path.join(base_path, 'ffmpeg_files', 'ffmpeg.exe')
+        ffprobe_path = os.path.join(base_path, 'ffmpeg_files', 'ffprobe.exe')
+    else:
+        ffmpeg_path, ffprobe_path = "ffmpeg", "ffprobe"
+    return run_cli(argv, folder, ffmpeg_path, ffprobe_path)
+
 if __name__ == "__main__":
+    # Background jobs run in spawned worker processes, which re-enter here in
+    # frozen builds.
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] == "transcode":
+        sys.exit(run_transcode(sys.argv[2:]))
     try:
         main()
     except Exception as e:
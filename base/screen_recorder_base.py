@@ -1,4 +1,5 @@
 import abc
+import glob
 import logging
 import os
 import datetime
@@ -10,17 +11,35 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QComboBox, QSlider, QFileDialog,
                              QMessageBox, QGroupBox, QGridLayout, QFrame,
                              QLineEdit, QMainWindow, QStyle, QDialog, QTextEdit, QSizePolicy,
-                             QCheckBox, QDialogButtonBox, QGridLayout, QListWidget, QAbstractItemView)
+                             QCheckBox, QDialogButtonBox, QGridLayout, QListWidget, QAbstractItemView,
+                             QSpinBox, QInputDialog)
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QSize
-from PyQt6.QtGui import QIcon, QPixmap, QPalette, QColor, QFont, QImage
-import mss
-import numpy as np
-import cv2
+from PyQt6.QtGui import QIcon, QPixmap, QPalette, QColor, QFont, QImage, QCursor, QGuiApplication, QKeySequence, QShortcut
 from PIL import Image
 from screeninfo import get_monitors
 
 from common.area_selector import AreaSelector
 from common.audio_device_monitor import AudioDeviceMonitor
+from common.deferred_transcoder import DeferredTranscoder
+from common.cursor_follower import CursorFollower
+from common.ffmpeg_commands import FFmpegCommandQueue
+from common.job_queue import JobQueue
+from common.jobs_dialog import JobsDialog
+from common.library_dialog import LibraryDialog
+from common.library_index import LibraryIndex
+from common import idle_detector, job_tasks, keyframe_index, thumbnails
+from common.input_overlay import (InputListener, build_overlay_graph, escape_caption, ffmpeg_has_filter,
+                                  CURSOR_SIZE, RIPPLE_SIZE, RIPPLE_DURATION, CAPTION_DURATION)
+from common.marker_journal import MarkerJournal
+from common.media_clock import MediaClock
+from common.multi_monitor import monitor_bounds, build_monitor_graph, build_monitor_outputs
+from common.queue_tuner import CaptureQueueTuner
+from common.session_usage import SessionUsage
+from common.storage_manager import StorageManager
+from common.subprocess_helper import run_subprocess
+from common.write_monitor import (WriteMonitor, PartMover, default_fast_folder, load_probe, probe_write_speed,
+                                  save_probe)
+from common.preview_engine import PreviewEngine, PreviewCanvas
 from common.themes import ThemeManager
 from common.translation_manager import TranslationManager
 from common.logging_config import setup_logging
@@ -123,6 +142,21 @@ class AudioDeviceSelector(QDialog):
         return selected_devices
 
 class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
+    # Modes that depend on a selection made in this session (e.g. a window id)
+    TRANSIENT_CAPTURE_MODES = ("window",)
+    OUTPUT_SCALES = [
+        ("100%", ("factor", 1.0)),
+        ("75%", ("factor", 0.75)),
+        ("50%", ("factor", 0.5)),
+        ("1080p", ("height", 1080)),
+        ("720p", ("height", 720)),
+    ]
+    SCALE_ALGORITHMS = [
+        ("scale_fast", "fast_bilinear"),
+        ("scale_balanced", "bicubic"),
+        ("scale_quality", "lanczos"),
+    ]
+
     def __init__(self):
             super().__init__()
             self.logger = self._initialize_logger()
@@ -136,6 +170,7 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
             self.config = ConfigParser()
             self.config_file = 'config.ini'
             self.load_config()
+            self.focus_regions = self.load_focus_regions()
 
             self.translation_manager = TranslationManager(self.config.get('Settings', 'language', fallback='en-US'))
             self.theme_manager = ThemeManager(self)
@@ -165,17 +200,99 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
             self.audio_device_monitor.start_monitoring()
 
             self.create_output_folder()
+
+            self.job_queue = JobQueue(
+                self.get_ffmpeg_path(),
+                self.config.get('Settings', 'jobs_folder', fallback=os.path.join(self.output_folder, ".jobs")),
+                max_workers=self.config.getint('Settings', 'job_workers', fallback=0),
+                max_retries=self.config.getint('Settings', 'job_retries', fallback=2)
+            )
+            self.job_queue.job_started.connect(self.on_job_started)
+            self.job_queue.job_progress.connect(self.on_job_progress)
+            self.job_queue.job_finished.connect(self.on_job_finished)
+            self.job_queue.job_failed.connect(self.on_job_failed)
+
+            self.deferred_session = False
+            self.deferred_transcoder = DeferredTranscoder(
+                self.job_queue,
+                self.config.get('Settings', 'staging_folder', fallback=os.path.join(self.output_folder, ".staging")),
+                limit_gb=self.config.getfloat('Settings', 'staging_limit_gb', fallback=50)
+            )
+            self.deferred_transcoder.cleanup()
+            self.job_queue.resume_pending()
+
+            self.session_source = None
+            self.library = self.create_library()
+
+            self.storage_manager = StorageManager(
+                self.output_folder,
+                quota_gb=self.config.getfloat('Settings', 'storage_quota_gb', fallback=0),
+                retention_days=self.config.getfloat('Settings', 'retention_days', fallback=0),
+                trash_days=self.config.getfloat('Settings', 'trash_days', fallback=7),
+                min_free_mb=self.config.getint('Settings', 'min_free_space_mb', fallback=1024)
+            )
+            self.overflow_active = False
+            self.space_timer = QTimer(self)
+            self.space_timer.timeout.connect(self.check_free_space)
+            self.apply_storage_policy()
+            self.library.refresh_async()
+
+            self.write_monitor = WriteMonitor(self.config.getfloat('Settings', 'write_stall_seconds', fallback=3))
+            self.part_mover = PartMover()
+            self.write_probe = None
+            self.write_staging_active = False
+            self.staging_alarm = False
+            self.staging_draining = False
+            self.write_timer = QTimer(self)
+            self.write_timer.timeout.connect(self.check_write_health)
             self.recording_process = None
+            self.queue_tuner = CaptureQueueTuner(
+                video_memory_budget_mb=self.config.getint('Settings', 'video_queue_budget_mb', fallback=256)
+            )
             self.running = False
+            self.probe_output_speed()
             self.elapsed_time = 0
             self.record_area = None
             self.area_selector = AreaSelector(self)
             self.preview_running = False
-            self.preview_timer = QTimer()
-            self.preview_timer.timeout.connect(self.update_preview)
+            self.preview_engine = PreviewEngine(
+                max_fps=self.config.getint('Settings', 'preview_max_fps', fallback=30),
+                idle_fps=self.config.getfloat('Settings', 'preview_idle_fps', fallback=2)
+            )
+            self.preview_engine.frame_ready.connect(self.update_preview)
+
+            self.cursor_follower = None
+            self.follow_monitor = None
+            self.follow_timer = QTimer(self)
+            self.follow_timer.timeout.connect(self.update_cursor_follow)
+
+            self.media_clock = MediaClock()
+            self.command_queue = FFmpegCommandQueue()
+            self.live_positions = {}
+            self.command_timer = QTimer(self)
+            self.command_timer.timeout.connect(self.send_next_ffmpeg_command)
+
+            self.capture_origin = (0, 0)
+            self.overlay_active = False
+            self.overlay_captions = False
+            self.input_listener = InputListener(self.media_clock)
+            self.input_listener.clicked.connect(self.on_input_click)
+            self.input_listener.key_pressed.connect(self.on_input_key)
+            self.overlay_timer = QTimer(self)
+            self.overlay_timer.timeout.connect(self.update_cursor_overlay)
 
             self.current_video_part = 0
             self.video_parts = []
+            self.segment_pattern = None
+            self.session_usage = SessionUsage()
+            self.marker_journal = MarkerJournal()
+            self.idle_detector = idle_detector.IdleDetector(
+                self.on_idle_interval,
+                noise_db=self.config.getfloat('Settings', 'idle_noise_db', fallback=-50),
+                freeze_noise=self.config.getfloat('Settings', 'idle_freeze_noise', fallback=0.003)
+            )
+            self.idle_cuts = []
+            self.part_durations = None
             
             self.status_signals = StatusSignals()
             self.status_signals.status_changed.connect(self.update_status_label)
@@ -253,17 +370,37 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         for device, volume in self.selected_audio_devices:
             audio_selections.append(f"{device}|{volume}")
         
-        self.config['Settings'] = {
+        settings = {
             'language': self.translation_manager.language,
             'theme': self.theme_combo.currentText().lower(),
             'monitor': self.monitor_combo.currentIndex(),
+            'capture_mode': self.get_capture_mode(),
             'fps': self.fps_combo.currentIndex(),
             'bitrate': self.bitrate_combo.currentIndex(),
             'codec': self.codec_combo.currentIndex(),
             'format': self.format_combo.currentIndex(),
+            'output_scale': self.output_scale_combo.currentIndex(),
+            'scale_algorithm': self.scale_algorithm_combo.currentIndex(),
+            'long_session': self.long_session_checkbox.isChecked(),
+            'long_session_fps': self.long_session_fps_spin.value(),
+            'deferred_compression': self.deferred_checkbox.isChecked(),
+            'timelapse': self.timelapse_checkbox.isChecked(),
+            'timelapse_interval': self.timelapse_interval_spin.value(),
+            'skip_idle': self.skip_idle_checkbox.isChecked(),
+            'idle_threshold': self.idle_threshold_spin.value(),
+            'show_input': self.overlay_checkbox.isChecked(),
+            'show_keys': self.keys_checkbox.isChecked(),
+            'focus_regions': ';'.join(','.join(str(v) for v in region) for region in self.focus_regions),
             'audio_devices': ';;'.join(audio_selections),
+            'normalize_loudness': self.normalize_checkbox.isChecked(),
             'output_folder': self.output_folder
         }
+
+        if not self.config.has_section('Settings'):
+            self.config.add_section('Settings')
+        for key, value in settings.items():
+            self.config.set('Settings', key, str(value))
+
         with open(self.config_file, 'w') as configfile:
             self.config.write(configfile)
         
@@ -279,7 +416,19 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
                 'bitrate': '0',
                 'codec': '0',
                 'format': '0',
+                'output_scale': '0',
+                'scale_algorithm': '0',
+                'long_session': 'False',
+                'long_session_fps': '2',
+                'deferred_compression': 'False',
+                'timelapse': 'False',
+                'timelapse_interval': '2',
+                'skip_idle': 'False',
+                'idle_threshold': '60',
+                'show_input': 'False',
+                'show_keys': 'False',
                 'audio_devices': '',
+                'normalize_loudness': 'False',
                 'output_folder': os.path.join(os.getcwd(), "OutputFiles")
             }
             with open(self.config_file, 'w') as configfile:
@@ -347,18 +496,38 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         self.bitrate_label.setText(self.t("bitrate") + ":")
         self.codec_label.setText(self.t("video_codec") + ":")
         self.format_label.setText(self.t("output_format") + ":")
+        self.output_scale_label.setText(self.t("output_scale") + ":")
+        self.scale_algorithm_label.setText(self.t("scale_algorithm") + ":")
+        for i, (label_key, flags) in enumerate(self.SCALE_ALGORITHMS):
+            self.scale_algorithm_combo.setItemText(i, self.t(label_key))
+        self.long_session_checkbox.setText(self.t("long_session"))
+        self.long_session_fps_spin.setSuffix(" " + self.t("fps_suffix"))
+        self.deferred_checkbox.setText(self.t("deferred_compression"))
+        self.timelapse_checkbox.setText(self.t("timelapse"))
+        self.timelapse_interval_spin.setPrefix(self.t("timelapse_every") + " ")
+        self.skip_idle_checkbox.setText(self.t("skip_idle"))
+        self.idle_threshold_spin.setPrefix(self.t("idle_after") + " ")
+        self.overlay_checkbox.setText(self.t("show_input"))
+        self.keys_checkbox.setText(self.t("show_keys"))
         self.audio_label.setText(self.t("audio_device") + ":")
         self.output_settings_group.setTitle(self.t("output_settings"))
         self.output_folder_label.setText(self.t("output_folder") + ":")
+        self.library_btn.setText(self.t("library"))
         
         self.toggle_btn.setText(self.t("start_recording") if not self.running else self.t("stop_recording"))
         self.preview_btn.setText(self.t("start_preview") if not self.preview_running else self.t("stop_preview"))
         self.select_area_btn.setText(self.t("select_recording_area"))
+        for i, (mode, label_key) in enumerate(self.capture_modes):
+            self.capture_mode_combo.setItemText(i, self.t(label_key))
         self.reset_area_btn.setText(self.t("reset_recording_area"))
+        self.focus_regions_btn.setText(self.t("focus_regions"))
+        self.jobs_btn.setText(self.t("background_jobs"))
+        self.marker_btn.setText(self.t("add_marker"))
         self.open_folder_btn.setText(self.t("open_output_folder"))
         self.info_btn.setText(self.t("about"))
         
         self.select_audio_btn.setText(self.t("select_audio_devices"))
+        self.normalize_checkbox.setText(self.t("normalize_loudness"))
         
         self.status_label.setText(self.t("status_recording") if self.running else self.t("status_ready"))
 
@@ -443,6 +612,17 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         self.monitor_combo.setCurrentIndex(0)
         self.monitor_combo.currentIndexChanged.connect(self.on_monitor_change)
         monitor_layout.addWidget(self.monitor_combo)
+
+        self.capture_mode_combo = QComboBox()
+        self.capture_modes = self.get_capture_modes()
+        for mode, label_key in self.capture_modes:
+            self.capture_mode_combo.addItem(self.t(label_key), mode)
+        saved_mode = self.config.get('Settings', 'capture_mode', fallback='screen')
+        if saved_mode in self.TRANSIENT_CAPTURE_MODES or self.capture_mode_combo.findData(saved_mode) < 0:
+            saved_mode = 'screen'
+        self.capture_mode_combo.setCurrentIndex(self.capture_mode_combo.findData(saved_mode))
+        self.capture_mode_combo.currentIndexChanged.connect(self.on_capture_mode_change)
+        monitor_layout.addWidget(self.capture_mode_combo)
         self.monitor_group.setLayout(monitor_layout)
         left_layout.addWidget(self.monitor_group)
 
@@ -479,8 +659,83 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         video_layout.addWidget(self.bitrate_combo, 1, 1)
         video_layout.addWidget(self.codec_label, 2, 0)
         video_layout.addWidget(self.codec_combo, 2, 1)
+        self.output_scale_label = QLabel(self.t("output_scale") + ":")
+        self.output_scale_combo = QComboBox()
+        for label, scale in self.OUTPUT_SCALES:
+            self.output_scale_combo.addItem(label, scale)
+        self.output_scale_combo.setCurrentIndex(int(self.config.get('Settings', 'output_scale', fallback='0')))
+        self.output_scale_combo.currentIndexChanged.connect(self.save_config)
+
+        self.scale_algorithm_label = QLabel(self.t("scale_algorithm") + ":")
+        self.scale_algorithm_combo = QComboBox()
+        for label_key, flags in self.SCALE_ALGORITHMS:
+            self.scale_algorithm_combo.addItem(self.t(label_key), flags)
+        self.scale_algorithm_combo.setCurrentIndex(int(self.config.get('Settings', 'scale_algorithm', fallback='0')))
+        self.scale_algorithm_combo.currentIndexChanged.connect(self.save_config)
+
         video_layout.addWidget(self.format_label, 3, 0)
         video_layout.addWidget(self.format_combo, 3, 1)
+        video_layout.addWidget(self.output_scale_label, 4, 0)
+        video_layout.addWidget(self.output_scale_combo, 4, 1)
+        video_layout.addWidget(self.scale_algorithm_label, 5, 0)
+        video_layout.addWidget(self.scale_algorithm_combo, 5, 1)
+
+        self.long_session_checkbox = QCheckBox(self.t("long_session"))
+        self.long_session_checkbox.setChecked(self.config.getboolean('Settings', 'long_session', fallback=False))
+        self.long_session_checkbox.stateChanged.connect(self.save_config)
+
+        self.long_session_fps_spin = QSpinBox()
+        self.long_session_fps_spin.setRange(1, 10)
+        self.long_session_fps_spin.setSuffix(" " + self.t("fps_suffix"))
+        self.long_session_fps_spin.setValue(self.config.getint('Settings', 'long_session_fps', fallback=2))
+        self.long_session_fps_spin.valueChanged.connect(self.save_config)
+
+        video_layout.addWidget(self.long_session_checkbox, 6, 0)
+        video_layout.addWidget(self.long_session_fps_spin, 6, 1)
+
+        self.deferred_checkbox = QCheckBox(self.t("deferred_compression"))
+        self.deferred_checkbox.setChecked(self.config.getboolean('Settings', 'deferred_compression', fallback=False))
+        self.deferred_checkbox.stateChanged.connect(self.save_config)
+        video_layout.addWidget(self.deferred_checkbox, 7, 0, 1, 2)
+
+        self.timelapse_checkbox = QCheckBox(self.t("timelapse"))
+        self.timelapse_checkbox.setChecked(self.config.getboolean('Settings', 'timelapse', fallback=False))
+        self.timelapse_checkbox.stateChanged.connect(self.save_config)
+
+        self.timelapse_interval_spin = QSpinBox()
+        self.timelapse_interval_spin.setRange(1, 60)
+        self.timelapse_interval_spin.setPrefix(self.t("timelapse_every") + " ")
+        self.timelapse_interval_spin.setSuffix(" s")
+        self.timelapse_interval_spin.setValue(self.config.getint('Settings', 'timelapse_interval', fallback=2))
+        self.timelapse_interval_spin.valueChanged.connect(self.save_config)
+
+        video_layout.addWidget(self.timelapse_checkbox, 8, 0)
+        video_layout.addWidget(self.timelapse_interval_spin, 8, 1)
+
+        self.skip_idle_checkbox = QCheckBox(self.t("skip_idle"))
+        self.skip_idle_checkbox.setChecked(self.config.getboolean('Settings', 'skip_idle', fallback=False))
+        self.skip_idle_checkbox.stateChanged.connect(self.save_config)
+
+        self.idle_threshold_spin = QSpinBox()
+        self.idle_threshold_spin.setRange(10, 3600)
+        self.idle_threshold_spin.setPrefix(self.t("idle_after") + " ")
+        self.idle_threshold_spin.setSuffix(" s")
+        self.idle_threshold_spin.setValue(self.config.getint('Settings', 'idle_threshold', fallback=60))
+        self.idle_threshold_spin.valueChanged.connect(self.save_config)
+
+        video_layout.addWidget(self.skip_idle_checkbox, 9, 0)
+        video_layout.addWidget(self.idle_threshold_spin, 9, 1)
+
+        self.overlay_checkbox = QCheckBox(self.t("show_input"))
+        self.overlay_checkbox.setChecked(self.config.getboolean('Settings', 'show_input', fallback=False))
+        self.overlay_checkbox.stateChanged.connect(self.save_config)
+
+        self.keys_checkbox = QCheckBox(self.t("show_keys"))
+        self.keys_checkbox.setChecked(self.config.getboolean('Settings', 'show_keys', fallback=False))
+        self.keys_checkbox.stateChanged.connect(self.save_config)
+
+        video_layout.addWidget(self.overlay_checkbox, 10, 0)
+        video_layout.addWidget(self.keys_checkbox, 10, 1)
         
         self.video_settings_group.setLayout(video_layout)
         left_layout.addWidget(self.video_settings_group)
@@ -493,8 +748,13 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         self.select_audio_btn.clicked.connect(self.show_audio_device_selector)
         self.update_audio_button_text()
         
+        self.normalize_checkbox = QCheckBox(self.t("normalize_loudness"))
+        self.normalize_checkbox.setChecked(self.config.getboolean('Settings', 'normalize_loudness', fallback=False))
+        self.normalize_checkbox.stateChanged.connect(self.save_config)
+
         audio_layout.addWidget(self.audio_label)
         audio_layout.addWidget(self.select_audio_btn)
+        audio_layout.addWidget(self.normalize_checkbox)
         
         self.audio_settings_group.setLayout(audio_layout)
         left_layout.addWidget(self.audio_settings_group)
@@ -513,6 +773,10 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         output_layout.addWidget(self.output_folder_entry)
         output_layout.addWidget(self.browse_folder_btn)
         
+        self.library_btn = QPushButton(self.t("library"))
+        self.library_btn.clicked.connect(self.show_library)
+        output_layout.addWidget(self.library_btn)
+        
         self.output_settings_group.setLayout(output_layout)
         left_layout.addWidget(self.output_settings_group)
         
@@ -526,7 +790,7 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         preview_layout = QVBoxLayout()
         preview_layout.setContentsMargins(5, 5, 5, 5)
         
-        self.preview_label = QLabel()
+        self.preview_label = PreviewCanvas()
         self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.preview_label.setStyleSheet("background-color: black;")
         self.preview_label.setSizePolicy(
@@ -574,8 +838,30 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         self.info_btn.clicked.connect(self.show_info)
         self.info_btn.setFixedHeight(35)
         
-        controls_layout.addWidget(self.open_folder_btn, 1, 0, 1, 2)
-        controls_layout.addWidget(self.info_btn, 1, 2, 1, 2)
+        self.focus_regions_btn = QPushButton(self.t("focus_regions"))
+        self.focus_regions_btn.clicked.connect(self.select_focus_regions)
+        self.focus_regions_btn.setFixedHeight(35)
+        
+        self.jobs_btn = QPushButton(self.t("background_jobs"))
+        self.jobs_btn.clicked.connect(self.show_jobs)
+        self.jobs_btn.setFixedHeight(35)
+        
+        controls_layout.addWidget(self.open_folder_btn, 1, 0)
+        controls_layout.addWidget(self.focus_regions_btn, 1, 1)
+        controls_layout.addWidget(self.jobs_btn, 1, 2)
+        controls_layout.addWidget(self.info_btn, 1, 3)
+
+        self.marker_btn = QPushButton(self.t("add_marker"))
+        self.marker_btn.clicked.connect(self.add_named_marker)
+        self.marker_btn.setFixedHeight(35)
+        self.marker_btn.setEnabled(False)
+        controls_layout.addWidget(self.marker_btn, 2, 0, 1, 4)
+
+        # Works whenever the app has focus; the hotkey drops an untitled marker.
+        self.marker_shortcut = QShortcut(
+            QKeySequence(self.config.get('Settings', 'marker_hotkey', fallback='Ctrl+M')), self)
+        self.marker_shortcut.setContext(Qt.ShortcutContext.ApplicationShortcut)
+        self.marker_shortcut.activated.connect(self.add_marker)
         
         self.controls_group.setLayout(controls_layout)
         right_layout.addWidget(self.controls_group)
@@ -641,90 +927,515 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
             self.preview_btn.setText(self.t("start_preview"))
         else:
             self.preview_running = True
-            self.preview_timer.start(60)
+            self.sync_preview_source()
+            self.update_preview_size()
+            self.preview_engine.start()
             self.preview_btn.setText(self.t("stop_preview"))
+
+    def sync_preview_source(self):
+        self.preview_engine.set_source(self.monitor_combo.currentIndex(), self.record_area, self.get_preview_region())
+
+    def get_preview_region(self):
+        if self.get_capture_mode() == "monitors":
+            x, y, width, height = monitor_bounds(self.monitors)
+            return {"left": x, "top": y, "width": width, "height": height}
+        return None
+
+    def get_capture_modes(self):
+        modes = [("screen", "capture_mode_screen"), ("follow", "capture_mode_follow")]
+        if len(self.monitors) > 1:
+            modes.append(("monitors", "capture_mode_all_monitors"))
+        return modes
+
+    def get_capture_mode(self):
+        return self.capture_mode_combo.currentData() or "screen"
+
+    def on_capture_mode_change(self):
+        mode = self.get_capture_mode()
+        if not self.on_capture_mode_selected(mode):
+            self.capture_mode_combo.blockSignals(True)
+            self.capture_mode_combo.setCurrentIndex(self.capture_mode_combo.findData("screen"))
+            self.capture_mode_combo.blockSignals(False)
+            self.on_capture_mode_selected("screen")
+
+        self.sync_preview_source()
+        self.save_config()
+
+    def on_capture_mode_selected(self, mode):
+        return True
+
+    def get_preview_bounds(self):
+        available_size = self.preview_label.size()
+        max_preview_size = 800
+
+        if available_size.width() > 50 and available_size.height() > 50:
+            return (min(available_size.width() - 10, max_preview_size),
+                    min(available_size.height() - 10, max_preview_size))
+        return 170, 90
+
+    def update_preview_size(self):
+        self.preview_engine.set_target_size(*self.get_preview_bounds())
+
+    def get_preview_tap_args(self, width, height, video_filters=None):
+        # While recording, the preview shows the encoder's own frames through a
+        # second low-rate raw output on stdout instead of grabbing the screen again.
+        self.preview_tap_size = None
+        if not self.preview_running or not self.config.getboolean('Settings', 'preview_from_recording', fallback=True):
+            return []
+
+        max_width, max_height = self.get_preview_bounds()
+        scale = min(max_width / width, max_height / height, 1.0)
+        tap_width = max(2, int(width * scale) // 2 * 2)
+        tap_height = max(2, int(height * scale) // 2 * 2)
+        tap_fps = self.config.getint('Settings', 'preview_tap_fps', fallback=10)
+
+        self.preview_tap_size = (tap_width, tap_height)
+        rate_filters = [] if self.is_timelapse() else [f"fps={tap_fps}"]
+        video_filters = list(video_filters or [])
+        if self.get_capture_mode() == "monitors":
+            # Every monitor is scaled in its own branch of the filter graph,
+            # so there is no single scaled picture to tap. Like the idle
+            # preview, the tap shows the whole desktop as grabbed, with no
+            # output scaling; the preview only shrinks it to fit.
+            video_filters = [f for f in video_filters if not f.startswith("scale=")]
+            self.logger.info("Preview shows the whole desktop unscaled, output scaling applies per monitor")
+        tap_filters = rate_filters + video_filters + [
+            f"scale={tap_width}:{tap_height}:flags=fast_bilinear",
+            "format=bgra"
+        ]
+        return [
+            "-map", "0:v",
+            "-vf", ",".join(tap_filters),
+            "-an",
+            "-c:v", "rawvideo",
+            "-f", "rawvideo",
+            "pipe:1"
+        ]
+
+    def attach_preview_tap(self):
+        if getattr(self, 'preview_tap_size', None) and self.recording_process:
+            self.preview_engine.attach_stream(self.recording_process.stdout.buffer, *self.preview_tap_size)
+
+    def get_monitor_session(self):
+        # One video stream per monitor, cut out of a single desktop grab and
+        # muxed with the shared audio into the same file.
+        def stream_filter(width, height):
+            filters = [self.get_scale_filter(width, height)] + self.get_timelapse_filters()
+            return ",".join(f for f in filters if f)
+
+        video_graph, labels = build_monitor_graph(self.monitors, stream_filter)
+        total_threads = self.config.getint('Settings', 'encoder_threads', fallback=0) or None
+        video_maps = build_monitor_outputs(self.monitors, labels, total_threads)
+        self.logger.info(f"Multi-monitor session: {len(self.monitors)} streams, {' '.join(video_maps)}")
+        return video_graph, video_maps
+
+    def get_thread_args(self):
+        # FFmpeg applies the last matching option, so a global -threads after
+        # the per-monitor -threads:v:N shares would replace all of them.
+        if self.get_capture_mode() == "monitors":
+            return []
+        return ["-threads", "0"]
+
+    def get_output_size(self, width, height):
+        kind, value = self.output_scale_combo.currentData() or ("factor", 1.0)
+        scale = value if kind == "factor" else value / height
+        if scale >= 1.0:
+            return width, height
+        return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+    def get_scale_filter(self, width, height):
+        output_width, output_height = self.get_output_size(width, height)
+        if (output_width, output_height) == (width, height):
+            return None
+        flags = self.scale_algorithm_combo.currentData() or "fast_bilinear"
+        return f"scale={output_width}:{output_height}:flags={flags},setsar=1"
+
+    def apply_output_scale(self, video_filters, width, height):
+        # Scale once, last in the chain, so the encoder and the preview tap both
+        # work on the output size rather than the captured one. Monitors mode
+        # scales per stream instead (see get_preview_tap_args).
+        scale_filter = self.get_scale_filter(width, height)
+        if not scale_filter:
+            return width, height
+        video_filters.append(scale_filter)
+        return self.get_output_size(width, height)
+
+    def is_timelapse(self):
+        return self.timelapse_checkbox.isChecked()
+
+    def get_capture_rate(self):
+        # In time-lapse mode the grabber itself runs at one frame per interval,
+        # so nothing upstream of the encoder ever sees the skipped frames.
+        if self.is_timelapse():
+            return f"1/{self.timelapse_interval_spin.value()}"
+        return str(self.get_capture_fps())
+
+    def get_stop_grace(self):
+        # The grabber sleeps until its next frame before FFmpeg notices a stop
+        # request, so a time-lapse may need a whole interval more to finish
+        # the file; killing it earlier would lose the MP4 trailer.
+        return self.timelapse_interval_spin.value() if self.is_timelapse() else 0
+
+    def get_timelapse_filters(self):
+        if not self.is_timelapse():
+            return []
+        return [f"setpts=N/({self.get_capture_fps()}*TB)"]
+
+    def is_long_session(self):
+        return self.long_session_checkbox.isChecked() and not self.is_timelapse()
+
+    def is_idle_skip(self):
+        # Stillness is measured on the one captured picture; a time-lapse
+        # already drops most of the idle time on its own.
+        return (self.skip_idle_checkbox.isChecked() and not self.is_timelapse()
+                and self.get_capture_mode() != "monitors")
+
+    def get_idle_filters(self):
+        if not self.is_idle_skip():
+            return []
+        return [self.idle_detector.video_filter()]
+
+    def add_idle_audio_filter(self, audio_filter):
+        # Appends silence detection to an audio filter chain, before its
+        # output label when it has one.
+        if not self.is_idle_skip():
+            return audio_filter
+        detect = self.idle_detector.audio_filter()
+        if audio_filter.endswith("[aout]"):
+            return f"{audio_filter[:-len('[aout]')]},{detect}[aout]"
+        return f"{audio_filter},{detect}" if audio_filter else detect
+
+    def get_capture_fps(self):
+        if self.is_timelapse():
+            return self.config.getint('Settings', 'timelapse_playback_fps', fallback=30)
+        if self.is_long_session():
+            return self.long_session_fps_spin.value()
+        return int(self.fps_combo.currentText())
+
+    def get_keyframe_seconds(self):
+        return max(1, self.config.getint('Settings', 'long_session_keyframe_seconds', fallback=60))
+
+    def get_long_session_encoder_args(self, codec, bitrate, fps):
+        # Static content: quality-targeted rate control capped at the chosen
+        # bitrate, long GOPs that still cut on scene changes, and a forced
+        # keyframe every few seconds of media time so the file stays seekable.
+        keyframe_seconds = self.get_keyframe_seconds()
+        gop = fps * keyframe_seconds
+        crf = self.config.getint('Settings', 'long_session_crf', fallback=30)
+        args = ["-force_key_frames", f"expr:gte(t,n_forced*{keyframe_seconds})"]
+
+        if codec == "libx264":
+            args.extend([
+                "-c:v", "libx264",
+                "-preset", "veryfast",
+                "-tune", "stillimage",
+                "-crf", str(crf),
+                "-maxrate", bitrate,
+                "-bufsize", bitrate,
+                "-g", str(gop),
+                "-keyint_min", str(fps),
+                "-sc_threshold", "40",
+            ])
+        elif codec == "libx265":
+            args.extend([
+                "-c:v", "libx265",
+                "-preset", "veryfast",
+                "-crf", str(crf),
+                "-maxrate", bitrate,
+                "-bufsize", bitrate,
+                "-x265-params", f"keyint={gop}:min-keyint={fps}:scenecut=40",
+            ])
+        else:
+            args.extend([
+                "-c:v", codec,
+                "-b:v", bitrate,
+                "-g", str(gop),
+            ])
+        return args
+
+    def get_output_args(self):
+        # Long sessions are written as segments that rotate on the forced
+        # keyframes, so every finished segment is a complete file on disk.
+        self.segment_pattern = None
+        if not self.is_long_session():
+            return [self.video_path]
+
+        keyframe_seconds = self.get_keyframe_seconds()
+        segment_seconds = self.config.getint('Settings', 'long_session_segment_minutes', fallback=60) * 60
+        segment_seconds = max(keyframe_seconds, segment_seconds // keyframe_seconds * keyframe_seconds)
+
+        root, ext = os.path.splitext(self.video_path)
+        self.segment_pattern = (root, ext)
+        return [
+            "-f", "segment",
+            "-segment_time", str(segment_seconds),
+            "-reset_timestamps", "1",
+            f"{root}.%03d{ext}"
+        ]
+
+    def collect_recorded_files(self):
+        if self.segment_pattern:
+            root, ext = self.segment_pattern
+            files = set(glob.glob(f"{glob.escape(root)}.[0-9][0-9][0-9]{glob.escape(ext)}"))
+            # Segments already moved out of the fast staging folder.
+            files.update(path for path in self.part_mover.moved_from(os.path.dirname(root))
+                         if path.startswith(f"{root}.") and path.endswith(ext))
+            files = [self.part_mover.resolve(path) for path in sorted(files)]
+        else:
+            files = [self.video_path]
+        return [path for path in files if os.path.exists(path) and os.path.getsize(path) > 0]
+
+    def should_defer_compression(self):
+        if not self.deferred_checkbox.isChecked() or self.is_long_session() or self.is_timelapse():
+            return False
+        if not self.deferred_transcoder.has_room():
+            self.deferred_transcoder.cleanup()
+            if not self.deferred_transcoder.has_room():
+                self.logger.warning("Staging area is full, recording with the final codec directly.")
+                return False
+        return True
+
+    def get_recording_folder(self):
+        if self.overflow_active:
+            return self.get_overflow_folder()
+        if self.deferred_session:
+            return self.deferred_transcoder.staging_folder
+        if self.write_staging_active:
+            return self.get_fast_staging_folder()
+        return self.output_folder
+
+    def get_part_format(self):
+        # A part cut short by a write stall may have its FFmpeg killed before
+        # it finishes the file; Matroska stays readable without the trailer
+        # an MP4 needs. The joined recording gets the chosen format anyway.
+        if self.deferred_session or self.get_write_staging_mode() != 'off':
+            return "mkv"
+        return self.format_combo.currentText()
+
+    def get_concat_output_path(self):
+        name = f"Video_{datetime.datetime.now().strftime('%m-%d-%Y.%H.%M.%S')}"
+        if self.overflow_active:
+            # The parts no longer fit where they started, and neither would
+            # the joined file.
+            extension = "mkv" if self.deferred_session else self.format_combo.currentText()
+            return os.path.join(self.get_overflow_folder(), f"{name}.{extension}")
+        if self.deferred_session:
+            return os.path.join(self.deferred_transcoder.staging_folder, f"{name}.mkv")
+        return os.path.join(self.output_folder, f"{name}.{self.format_combo.currentText()}")
+
+    def get_staging_encoder_args(self, fps):
+        # Stage one only has to keep up with the capture: lossless x264 at the
+        # fastest preset costs a fraction of a normal encode per frame.
+        return [
+            "-c:v", "libx264",
+            "-preset", "ultrafast",
+            "-qp", str(self.config.getint('Settings', 'staging_qp', fallback=0)),
+            "-g", str(fps * 2),
+        ]
+
+    def get_final_encoder_args(self, codec, bitrate, fps):
+        # Stage two is not real time, so it can afford a slower preset than
+        # live recording at the same bitrate.
+        preset = self.config.get('Settings', 'deferred_preset', fallback='medium')
+        if codec == "libx264":
+            return [
+                "-c:v", "libx264",
+                "-preset", preset,
+                "-b:v", bitrate,
+                "-maxrate", bitrate,
+                "-bufsize", bitrate,
+                "-g", str(fps * 2),
+                "-keyint_min", str(fps),
+            ]
+        if codec == "libx265":
+            return [
+                "-c:v", "libx265",
+                "-preset", preset,
+                "-b:v", bitrate,
+                "-maxrate", bitrate,
+                "-bufsize", bitrate,
+                "-x265-params", f"keyint={fps*2}:min-keyint={fps}",
+            ]
+        return ["-c:v", codec, "-b:v", bitrate]
+
+    def on_recording_process_started(self, monitor):
+        self.media_clock.start()
+        self.command_queue.clear()
+        self.live_positions = {}
+        self.command_timer.start(self.config.getint('Settings', 'ffmpeg_command_ms', fallback=100))
+
+        self.attach_preview_tap()
+        if self.get_capture_mode() == "follow":
+            self.start_cursor_follow(monitor)
+        if self.overlay_active:
+            self.start_input_overlay()
+
+    def stop_live_controls(self):
+        self.stop_cursor_follow()
+        self.stop_input_overlay()
+        self.command_timer.stop()
+        self.command_queue.clear()
+        self.media_clock.stop()
+
+    def build_follow_filter(self, monitor):
+        # The whole monitor is grabbed and a named crop filter cuts the region
+        # out of it, so only the zoomed region is ever scaled and encoded.
+        if self.cursor_follower is None or self.follow_monitor is not monitor:
+            self.cursor_follower = CursorFollower(
+                self.config.getint('Settings', 'follow_width', fallback=1280),
+                self.config.getint('Settings', 'follow_height', fallback=720),
+                monitor.width, monitor.height,
+                smoothing=self.config.getfloat('Settings', 'follow_smoothing', fallback=0.6),
+                dead_zone=self.config.getfloat('Settings', 'follow_dead_zone', fallback=0.5)
+            )
+            self.follow_monitor = monitor
+
+        follower = self.cursor_follower
+        x, y = follower.position()
+        width, height = follower.width // 2 * 2, follower.height // 2 * 2
+        return f"crop@follow={width}:{height}:{x}:{y}", (width, height)
+
+    def start_cursor_follow(self, monitor):
+        if self.cursor_follower is None:
+            return
+        self.follow_monitor = monitor
+        x, y = self.cursor_follower.position()
+        self.live_positions[("crop@follow", "x")] = x
+        self.live_positions[("crop@follow", "y")] = y
+        self.follow_timer.start(self.config.getint('Settings', 'follow_update_ms', fallback=120))
+
+    def stop_cursor_follow(self):
+        self.follow_timer.stop()
+
+    def get_absolute_pointer_position(self):
+        pos = QCursor.pos()
+        screen = QGuiApplication.screenAt(pos)
+        ratio = screen.devicePixelRatio() if screen else 1.0
+        return int(pos.x() * ratio), int(pos.y() * ratio)
+
+    def get_pointer_position(self, monitor):
+        x, y = self.get_absolute_pointer_position()
+        return x - monitor.x, y - monitor.y
+
+    def update_cursor_follow(self):
+        if not self.recording_process or self.cursor_follower is None:
+            return
+
+        x, y = self.cursor_follower.update(*self.get_pointer_position(self.follow_monitor))
+        glide = 2 * self.follow_timer.interval() / 1000
+        self.queue_glide("crop@follow", "x", x, glide)
+        self.queue_glide("crop@follow", "y", y, glide)
+
+    def queue_glide(self, target, option, value, glide):
+        # The filter moves from the last sent value to the new one over the
+        # glide time using its own t, so positions change smoothly even though
+        # each option is only updated every few hundred milliseconds.
+        key = (target, option)
+        if self.live_positions.get(key) == value and not self.command_queue.is_pending(target, option):
+            return
+
+        def argument():
+            previous = self.live_positions.get(key, value)
+            self.live_positions[key] = value
+            start = self.media_clock.now()
+            return f"{previous}+({value}-{previous})*clip((t-{start:.3f})/{glide:.3f},0,1)"
+
+        self.command_queue.put(target, option, argument)
+
+    def send_next_ffmpeg_command(self):
+        item = self.command_queue.pop()
+        if item is None or not self.recording_process:
+            return
+
+        target, command, argument = item
+        if callable(argument):
+            argument = argument()
+        self.send_ffmpeg_command(target, command, argument)
+
+    def send_ffmpeg_command(self, target, command, argument):
+        try:
+            self.recording_process.stdin.write(f"c{target} -1 {command} {argument}\n")
+            self.recording_process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError, AttributeError):
+            return False
+
+    def get_overlay_filters(self, fps):
+        # Drawn before any crop or scale, in captured pixels, so the overlay
+        # follows the same path through the chain as the screen content.
+        self.overlay_active = self.overlay_checkbox.isChecked() and self.get_capture_mode() != "monitors"
+        if not self.overlay_active:
+            return []
+
+        self.overlay_captions = self.keys_checkbox.isChecked() and ffmpeg_has_filter(self.get_ffmpeg_path(), "drawtext")
+        if self.keys_checkbox.isChecked() and not self.overlay_captions:
+            self.logger.warning("FFmpeg has no drawtext filter, key presses will not be shown.")
+        return [build_overlay_graph(fps, captions=self.overlay_captions)]
+
+    def start_input_overlay(self):
+        self.input_listener.start(capture_keys=self.overlay_captions)
+        self.overlay_timer.start(self.config.getint('Settings', 'overlay_update_ms', fallback=100))
+
+    def stop_input_overlay(self):
+        self.overlay_timer.stop()
+        self.input_listener.stop()
+
+    def get_overlay_position(self, size):
+        x, y = self.get_absolute_pointer_position()
+        origin_x, origin_y = self.capture_origin
+        return x - origin_x - size // 2, y - origin_y - size // 2
+
+    def update_cursor_overlay(self):
+        if not self.recording_process:
+            return
+        x, y = self.get_overlay_position(CURSOR_SIZE)
+        glide = 2 * self.overlay_timer.interval() / 1000
+        self.queue_glide("overlay@cursor", "x", x, glide)
+        self.queue_glide("overlay@cursor", "y", y, glide)
+
+    def on_input_click(self, media_time, button):
+        if not self.recording_process:
+            return
+        x, y = self.get_overlay_position(RIPPLE_SIZE)
+
+        # y goes first; x carries the time window, which starts no earlier than
+        # the moment FFmpeg receives it so a late command still shows a ripple.
+        def argument():
+            start = max(media_time, self.media_clock.now())
+            return f"if(between(t,{start:.3f},{start + RIPPLE_DURATION:.3f}),{x},-10000)"
+
+        self.command_queue.put("overlay@click", "x", argument, urgent=True)
+        self.command_queue.put("overlay@click", "y", str(y), urgent=True)
+
+    def on_input_key(self, media_time, caption):
+        if not self.recording_process or not self.overlay_captions:
+            return
+
+        def enable():
+            start = max(media_time, self.media_clock.now())
+            return f"between(t,{start:.3f},{start + CAPTION_DURATION:.3f})"
+
+        self.command_queue.put("drawtext@keys", "enable", enable, urgent=True)
+        self.command_queue.put("drawtext@keys", "reinit", f"text='{escape_caption(caption)}'", urgent=True)
             
     def update_preview(self):
         if not self.preview_running:
             return
-        
-        try:
-            if not hasattr(self, 'preview_label') or self.preview_label is None:
-                return
-            
-            with mss.mss() as sct:
-                monitor_index = self.monitor_combo.currentIndex()
-                if monitor_index < len(sct.monitors) - 1:
-                    monitor = sct.monitors[monitor_index + 1]
-                    
-                    if self.record_area:
-                        x1, y1, x2, y2 = self.record_area
-                        monitor = {
-                            "left": x1 + monitor.get("left", 0),
-                            "top": y1 + monitor.get("top", 0),
-                            "width": x2 - x1,
-                            "height": y2 - y1
-                        }
-                else:
-                    monitor = sct.monitors[0]
-                    
-                if hasattr(self, '_preview_scale'):
-                    scaled_monitor = {
-                        "left": monitor["left"],
-                        "top": monitor["top"],
-                        "width": monitor["width"] // 2,
-                        "height": monitor["height"] // 2,
-                    }
-                    screenshot = np.array(sct.grab(scaled_monitor))
-                    screenshot = cv2.resize(screenshot, (monitor["width"], monitor["height"]), 
-                                        interpolation=cv2.INTER_LINEAR)
-                else:
-                    screenshot = np.array(sct.grab(monitor))
-                
-                screenshot = cv2.cvtColor(screenshot, cv2.COLOR_BGRA2RGB)
-                
-                available_size = self.preview_label.size()
-                max_available_width = available_size.width()
-                max_available_height = available_size.height()
-                max_preview_size = 800
-                
-                if max_available_height > 50 and max_available_width > 50:
-                    original_height = screenshot.shape[0]
-                    original_width = screenshot.shape[1]
-                    aspect_ratio = original_width / original_height
-                    
-                    new_height = min(max_available_height - 10, max_preview_size)
-                    new_width = int(new_height * aspect_ratio)
-                    
-                    if new_width > max_available_width - 10:
-                        new_width = min(max_available_width - 10, max_preview_size)
-                        new_height = int(new_width / aspect_ratio)
-                    
-                    screenshot = cv2.resize(screenshot, (new_width, new_height), 
-                                        interpolation=cv2.INTER_LINEAR)
-                else:
-                    screenshot = cv2.resize(screenshot, (170, 90), 
-                                        interpolation=cv2.INTER_LINEAR)
-                
-                h, w, ch = screenshot.shape
-                bytes_per_line = ch * w
-                qt_image = QImage(screenshot.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-                
-                pixmap = QPixmap(qt_image)
-                
-                self.preview_label.setPixmap(pixmap)
-                
-        except Exception as e:
-            self.logger.error(f"Error in preview: {e}")
+
+        image, buffer = self.preview_engine.take_frame()
+        if image is not None:
+            self.preview_label.set_frame(image, buffer)
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         if self.preview_running:
-            QTimer.singleShot(100, self.update_preview)
+            self.update_preview_size()
             
     def close_preview(self):
+        if self.preview_running:
+            self.logger.info(f"Preview stats: {self.preview_engine.stats()}")
         self.preview_running = False
-        self.preview_timer.stop()
+        self.preview_engine.stop()
         
         if hasattr(self, 'preview_label') and self.preview_label is not None:
             self.preview_label.clear()
@@ -741,12 +1452,22 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
                                     QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.Yes:
                 self.stop_recording()
+                self.shutdown_background_workers()
                 event.accept()
             else:
                 event.ignore()
         else:
+            self.shutdown_background_workers()
             event.accept()
 
+    def shutdown_background_workers(self):
+        if hasattr(self, 'job_queue'):
+            self.job_queue.shutdown(wait=True)
+        if hasattr(self, 'library'):
+            # A refresh still probing files stops after its batch and closes
+            # the database itself; waiting for it would freeze the window.
+            self.library.close(wait=False)
+
     def browse_output_folder(self):
         new_folder = QFileDialog.getExistingDirectory(
             self,
@@ -759,11 +1480,21 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
             self.output_folder_entry.setText(new_folder)
             self.save_config()
             self.create_output_folder()
+            # A refresh of the old folder may be probing hundreds of files;
+            # it is left to wind down on its own thread.
+            self.library.files_changed.disconnect(self.on_library_files_changed)
+            self.library.close(wait=False)
+            self.library = self.create_library()
+            self.storage_manager.folder = self.output_folder
+            self.apply_storage_policy()
+            self.library.refresh_async()
+            self.probe_output_speed()
             
     def on_monitor_change(self):
         if self.running:
             self.stop_current_recording()
             self.start_new_recording()
+        self.sync_preview_source()
         self.save_config()
         
     def start_new_recording(self):
@@ -782,22 +1513,46 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
             except (BrokenPipeError, OSError):
                 pass
             try:
-                self.recording_process.wait(timeout=5)
+                self.recording_process.wait(timeout=5 + self.get_stop_grace())
             except subprocess.TimeoutExpired:
                 self.recording_process.terminate()
                 try:
-                    self.recording_process.wait(timeout=2)
+                    self.recording_process.wait(timeout=2 + self.get_stop_grace())
                 except subprocess.TimeoutExpired:
                     self.recording_process.kill()
 
-            if os.path.exists(self.video_path) and os.path.getsize(self.video_path) > 0:
-                self.video_parts.append(self.video_path)
+            files = self.collect_recorded_files()
+            self.video_parts.extend(files)
+            self.idle_detector.finish_part()
+            self.marker_journal.end_part(self.current_video_part, len(files))
             self.current_video_part += 1
             self.recording_process = None
+            self.queue_tuner.finish_part()
+        self.stop_live_controls()
             
     def toggle_recording(self):
         if not self.running:
+            self.deferred_session = self.should_defer_compression()
+            if not self.confirm_free_space():
+                self.deferred_session = False
+                return
+            self.write_staging_active = self.should_stage_writes()
+            self.staging_alarm = False
+            self.staging_draining = False
+            self.write_monitor.reset()
+            self.session_usage.start()
+            self.marker_journal.start(self.output_folder)
+            self.job_queue.pause()
+            self.session_source = self.get_session_source()
             self.start_recording()
+            if not self.running:
+                # start_recording has already told the user why it could not
+                # start; background work must not stay held for it.
+                self.deferred_session = False
+                self.job_queue.resume()
+                return
+            self.space_timer.start(self.config.getint('Settings', 'free_space_check_ms', fallback=5000))
+            self.write_timer.start(1000)
             self.toggle_btn.setText(self.t("stop_recording"))
         else:
             self.stop_recording()
@@ -816,13 +1571,71 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
     def select_area(self):
         self.area_selector.select_area(self.set_record_area)
         
+    def load_focus_regions(self):
+        regions = []
+        for item in self.config.get('Settings', 'focus_regions', fallback='').split(';'):
+            try:
+                x1, y1, x2, y2 = (int(v) for v in item.split(','))
+            except ValueError:
+                continue
+            regions.append((x1, y1, x2, y2))
+        return regions
+
+    def select_focus_regions(self):
+        self.area_selector.select_regions(self.set_focus_regions, self.record_area, self.focus_regions)
+
+    def set_focus_regions(self, regions):
+        if regions is None:
+            return
+        self.focus_regions = regions
+        self.logger.info(f"Focus regions set: {regions}")
+        self.save_config()
+
+    def get_roi_filters(self, monitor):
+        # Focus regions are stored in monitor pixels and mapped onto the frame
+        # as fractions of the recorded area, so they survive output scaling.
+        # addroi only tags the frames; the encoder shifts its quantizer so the
+        # bitrate is spent on those regions at the same target.
+        if not self.focus_regions or self.get_capture_mode() != "screen":
+            return []
+
+        ax1, ay1, ax2, ay2 = self.record_area or (0, 0, monitor.width, monitor.height)
+        area_width, area_height = ax2 - ax1, ay2 - ay1
+        qoffset = self.config.getfloat('Settings', 'roi_qoffset', fallback=-0.3)
+
+        filters = []
+        for x1, y1, x2, y2 in self.focus_regions:
+            x1, y1 = max(x1, ax1), max(y1, ay1)
+            x2, y2 = min(x2, ax2), min(y2, ay2)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            filters.append(
+                f"addroi=x=iw*{(x1 - ax1) / area_width:.4f}:y=ih*{(y1 - ay1) / area_height:.4f}"
+                f":w=iw*{(x2 - x1) / area_width:.4f}:h=ih*{(y2 - y1) / area_height:.4f}:qoffset={qoffset}"
+            )
+        return filters
+
     def set_record_area(self, record_area):
         self.record_area = record_area
+        self.sync_preview_source()
         
     @abc.abstractmethod
     def get_ffmpeg_path(self):
         pass
         
+    def get_ffprobe_path(self):
+        # ffprobe ships next to ffmpeg; fall back to the one on PATH.
+        ffmpeg_path = self.get_ffmpeg_path() or "ffmpeg"
+        folder, name = os.path.split(ffmpeg_path)
+        ffprobe_path = os.path.join(folder, name.replace("ffmpeg", "ffprobe"))
+        if folder and not os.path.exists(ffprobe_path):
+            return "ffprobe"
+        return ffprobe_path
+
+    @abc.abstractmethod
+    def open_file(self, path):
+        pass
+        
     @abc.abstractmethod
     def start_recording(self, continue_timer=False):
         pass
@@ -834,6 +1647,9 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         QMessageBox.critical(self, "Error", error)
         
     def stop_recording(self):
+        self.space_timer.stop()
+        self.write_timer.stop()
+        self.stop_live_controls()
         if self.recording_process:
             try:
                 self.recording_process.stdin.write('q')
@@ -841,11 +1657,11 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
             except (BrokenPipeError, OSError):
                 pass
             try:
-                self.recording_process.wait(timeout=5)
+                self.recording_process.wait(timeout=5 + self.get_stop_grace())
             except subprocess.TimeoutExpired:
                 self.recording_process.terminate()
                 try:
-                    self.recording_process.wait(timeout=2)
+                    self.recording_process.wait(timeout=2 + self.get_stop_grace())
                 except subprocess.TimeoutExpired:
                     self.recording_process.kill()
 
@@ -855,22 +1671,483 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
                 except:
                     pass
 
-            if os.path.exists(self.video_path) and os.path.getsize(self.video_path) > 0:
-                self.video_parts.append(self.video_path)
+            files = self.collect_recorded_files()
+            self.video_parts.extend(files)
+            self.idle_detector.finish_part()
+            self.marker_journal.end_part(self.current_video_part, len(files))
 
             self.recording_process = None
+            self.queue_tuner.finish_part()
+            self.logger.info(self.queue_tuner.report())
 
         self.status_label.setText(self.t("status_saving"))
         self.update()
+
+        usage = self.session_usage.stop(self.video_parts)
+        if usage:
+            self.logger.info(
+                f"Session usage: {usage['duration'] / 3600:.2f} h, "
+                f"CPU {usage['cpu_seconds']:.0f} s ({usage['cpu_seconds_per_hour'] / 60:.1f} CPU-min/h), "
+                f"disk {usage['disk_bytes'] / (1024 * 1024):.1f} MB ({usage['disk_mb_per_hour']:.1f} MB/h)"
+            )
         
-        self.concat_video_parts()
+        self.part_mover.wait()
+        self.video_parts = [self.part_mover.resolve(path) for path in self.video_parts]
+        self.logger.info(f"Output writes: {self.write_monitor.throughput() / (1024 * 1024):.2f} MB/s sustained, "
+                         f"longest stall {self.write_monitor.longest_stall:.1f} s"
+                         + (" (staged through fast storage)" if self.write_staging_active else ""))
+        output_file = self.concat_video_parts()
+        self.part_mover.clear()
+        if os.path.exists(self.get_chapters_file()):
+            os.remove(self.get_chapters_file())
+        # Without a joined file the journal is all that is left of the markers.
+        self.marker_journal.finish(keep=not output_file)
+        self.idle_cuts = []
+        self.part_durations = None
         
         self.toggle_widgets(recording=False)
         self.stop_timer()
-        self.status_label.setText(self.t("status_ready"))
+        if usage and self.is_long_session():
+            self.status_label.setText(self.t("status_session_usage").format(
+                cpu=f"{usage['cpu_seconds_per_hour'] / 60:.1f}",
+                disk=f"{usage['disk_mb_per_hour']:.1f}"
+            ))
+        else:
+            self.status_label.setText(self.t("status_ready"))
         
         self.record_area = None
+        self.cursor_follower = None
+        self.sync_preview_source()
         self.running = False
+
+        if output_file:
+            self.on_recording_saved(output_file)
+        self.deferred_session = False
+        self.overflow_active = False
+        self.write_staging_active = False
+        self.staging_draining = False
+        self.job_queue.resume()
+        self.apply_storage_policy()
+
+    def on_recording_saved(self, output_file):
+        if self.deferred_session:
+            self.logger.info(f"Recording staged for compression: {output_file}")
+            name = os.path.splitext(os.path.basename(output_file))[0]
+            target = os.path.join(self.output_folder, f"{name}.{self.format_combo.currentText()}")
+            encoder_args = self.get_final_encoder_args(
+                self.codec_combo.currentText(), self.bitrate_combo.currentText(), self.get_capture_fps())
+            self.library.set_source(target, **(self.session_source or {}))
+            self.deferred_transcoder.submit(output_file, target, encoder_args, post_recording=True,
+                                            normalize=self.normalize_checkbox.isChecked())
+            return
+
+        self.logger.info(f"Recording saved: {output_file}")
+        self.library.set_source(output_file, **(self.session_source or {}))
+
+        if self.normalize_checkbox.isChecked():
+            self.submit_loudnorm(output_file)
+        else:
+            self.queue_post_recording_jobs(output_file)
+
+    def submit_loudnorm(self, video_path):
+        self.job_queue.submit("loudnorm", os.path.abspath(video_path), post_recording=True,
+                              target_lufs=self.config.getfloat('Settings', 'target_lufs', fallback=-16.0))
+
+    def get_marker_time(self):
+        # Chapters live on the output timeline. A time-lapse plays one frame
+        # per interval back at the playback rate.
+        seconds = self.media_clock.now()
+        if self.is_timelapse():
+            seconds /= self.timelapse_interval_spin.value() * self.get_capture_fps()
+        return seconds
+
+    def add_marker(self, title=None, part=None, seconds=None):
+        # Public entry point for markers: the hotkey, the marker button and
+        # anything else driving the recorder call this while it records.
+        if not self.running or not self.recording_process:
+            return None
+        part = self.current_video_part if part is None else part
+        seconds = self.get_marker_time() if seconds is None else seconds
+        title = title or self.t("marker_title").format(number=self.marker_journal.count + 1)
+        entry = self.marker_journal.add(part, seconds, title)
+        if entry:
+            self.status_label.setText(self.t("status_marker_added").format(title=title))
+        return entry
+
+    def add_named_marker(self):
+        # The moment is taken when the button is pressed, not when the title
+        # has been typed.
+        if not self.running or not self.recording_process:
+            return
+        part = self.current_video_part
+        seconds = self.get_marker_time()
+        title, ok = QInputDialog.getText(self, self.t("add_marker"), self.t("marker_name"))
+        if ok:
+            self.add_marker(title.strip(), part, seconds)
+
+    def on_idle_interval(self, source, start, end):
+        self.marker_journal.add_idle(self.current_video_part, source, start, end)
+
+    def write_concat_list(self, concat_file):
+        # With idle skipping, the stretches where neither the screen nor the
+        # sound changed are left out by in and out points, so joining the
+        # parts stays a stream copy.
+        files = [os.path.abspath(video) for video in self.video_parts]
+        entries = [(path, None, None, None) for path in files]
+        self.idle_cuts = []
+        self.part_durations = None
+        if self.marker_journal.has_idle():
+            try:
+                entries = self.plan_idle_cuts(files)
+            except (OSError, RuntimeError, subprocess.SubprocessError) as e:
+                self.logger.error(f"Could not plan idle cuts, keeping the whole recording: {e}")
+                self.idle_cuts = []
+        job_tasks.write_concat_list(concat_file, entries)
+
+    def plan_idle_cuts(self, files):
+        ffmpeg_path = self.get_ffmpeg_path() or "ffmpeg"
+        summaries = [job_tasks.read_summary(ffmpeg_path, path) for path in files]
+        durations = [job_tasks.probe_media(ffmpeg_path, path, summary)[0] or 0.0
+                     for path, summary in zip(files, summaries)]
+        starts = [keyframe_index.read_start(summary) for summary in summaries]
+        self.part_durations = durations
+
+        def run(args, cwd):
+            run_subprocess([ffmpeg_path, "-hide_banner", "-nostdin", "-y", "-loglevel", "error"] + args,
+                           cwd=cwd, check=True, capture_output=True)
+
+        indexes = {}
+
+        def index_for(i):
+            if i not in indexes:
+                indexes[i] = keyframe_index.load(files[i]) or keyframe_index.build(files[i], run, starts[i])
+            return indexes[i]
+
+        try:
+            intervals = self.marker_journal.idle_intervals(durations)
+            self.idle_cuts = idle_detector.plan_cuts(
+                intervals, durations, index_for,
+                threshold=self.idle_threshold_spin.value(),
+                preroll=self.config.getfloat('Settings', 'idle_preroll_seconds', fallback=3)
+            )
+        finally:
+            # The parts are removed once joined.
+            for path in files:
+                keyframe_index.remove_index(path)
+
+        if self.idle_cuts:
+            skipped = sum(end - start for start, end in self.idle_cuts)
+            self.logger.info(f"Skipping {len(self.idle_cuts)} idle stretch(es), {skipped:.0f} of {sum(durations):.0f} s")
+        delays = [indexes.get(i, {}).get("reorder_delay", 0.0) for i in range(len(files))]
+        return idle_detector.build_concat_entries(files, durations, self.idle_cuts, starts, delays)
+
+    def get_chapters_file(self):
+        return os.path.join(self.output_folder, "chapters.txt")
+
+    def get_chapter_args(self):
+        # Markers become container chapters while the parts are joined, which
+        # is a stream copy, so they never cost a re-encode. Skipped idle time
+        # gets a chapter where the recording resumes.
+        if not self.marker_journal.has_markers() and not self.idle_cuts:
+            return []
+        durations = self.part_durations
+        if durations is None:
+            ffmpeg_path = self.get_ffmpeg_path() or "ffmpeg"
+            durations = [job_tasks.probe_duration(ffmpeg_path, path) or 0.0 for path in self.video_parts]
+        path = self.marker_journal.write_chapters(self.get_chapters_file(), durations, self.t("chapter_start"),
+                                                  self.idle_cuts, self.t("chapter_idle_skipped"))
+        return ["-i", path, "-map_chapters", "1"] if path else []
+
+    def queue_post_recording_jobs(self, video_path):
+        # Follow-up work runs in the job pool once the file is final, i.e.
+        # after compression and loudness normalization have replaced it.
+        kinds = self.config.get('Settings', 'post_recording_jobs', fallback='validate,thumbnail')
+        for kind in (kind.strip() for kind in kinds.split(',')):
+            if kind:
+                self.job_queue.submit(kind, os.path.abspath(video_path), priority=JobQueue.PRIORITY_LOW)
+        self.library.refresh_async()
+
+    def create_library(self):
+        library = LibraryIndex(
+            self.get_ffprobe_path(),
+            self.output_folder,
+            max_workers=self.config.getint('Settings', 'library_probe_workers', fallback=4)
+        )
+        library.files_changed.connect(self.on_library_files_changed)
+        return library
+
+    def get_session_source(self):
+        devices = [device for device, volume in self.selected_audio_devices]
+        return {
+            "capture_mode": self.get_capture_mode(),
+            "monitor": self.monitor_combo.currentText(),
+            "devices": devices,
+        }
+
+    def request_thumbnails(self, video_path, priority=JobQueue.PRIORITY_HIGH):
+        # A job that is still queued or running covers this request.
+        if not thumbnails.is_current(video_path) and not self.job_queue.has_job(video_path, "thumbnail"):
+            self.job_queue.submit("thumbnail", video_path, priority=priority)
+
+    def on_library_files_changed(self, paths):
+        # New or rewritten files get fresh thumbnails; when a whole folder is
+        # indexed for the first time only the newest ones are queued and the
+        # rest are made when they are selected in the library.
+        backlog = self.config.getint('Settings', 'thumbnail_backlog', fallback=50)
+        paths = sorted(paths, key=lambda path: os.path.getmtime(path) if os.path.exists(path) else 0, reverse=True)
+        for path in paths[:backlog]:
+            self.request_thumbnails(path, JobQueue.PRIORITY_LOW)
+
+    def get_overflow_folder(self):
+        return self.config.get('Settings', 'overflow_folder', fallback='')
+
+    def apply_storage_policy(self):
+        # Files that background work still reads or rewrites are never pruned.
+        protected = [job["source"] for job in self.job_queue.get_jobs() if job["status"] in ("pending", "running")]
+        if self.storage_manager.prune(protected):
+            self.library.refresh_async()
+        self.storage_manager.empty_trash()
+
+    def get_estimated_bitrate(self):
+        bits_per_second = int(self.bitrate_combo.currentText().rstrip('k')) * 1000
+        if self.get_capture_mode() == "monitors":
+            bits_per_second *= len(self.monitors)
+        if self.deferred_session:
+            bits_per_second *= self.config.getfloat('Settings', 'staging_bitrate_factor', fallback=10)
+        if self.is_timelapse():
+            # One frame per interval, played back at the output frame rate.
+            bits_per_second /= self.timelapse_interval_spin.value() * self.get_capture_fps()
+        audio_bits = 128000 if self.selected_audio_devices and not self.is_timelapse() else 0
+        return bits_per_second + audio_bits
+
+    def get_recorded_bytes(self):
+        files = self.video_parts + (self.collect_recorded_files() if self.recording_process else [])
+        return sum(os.path.getsize(path) for path in files if os.path.exists(path))
+
+    def confirm_free_space(self):
+        minutes = self.config.getint('Settings', 'expected_recording_minutes', fallback=60)
+        # Joining the parts at the end copies them once more.
+        required = 2 * self.storage_manager.estimate_bytes(self.get_estimated_bitrate(), minutes * 60)
+        folder = self.get_recording_folder()
+        free = self.storage_manager.free_bytes(folder) - self.storage_manager.min_free_bytes
+        self.logger.info(f"Estimated {required / 1024 ** 3:.2f} GB for {minutes} min, "
+                         f"{free / 1024 ** 3:.2f} GB free in {folder}")
+        if free >= required:
+            return True
+
+        reply = QMessageBox.question(self, self.t("warning"), self.t("warning_low_space").format(
+                                         required=f"{required / 1024 ** 3:.1f}",
+                                         minutes=minutes,
+                                         free=f"{max(0, free) / 1024 ** 3:.1f}"),
+                                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                                     QMessageBox.StandardButton.No)
+        return reply == QMessageBox.StandardButton.Yes
+
+    def check_free_space(self):
+        # Recording stops while there is still room to join the parts; the
+        # join needs as much space again as has been recorded so far.
+        if not self.running:
+            return
+        needed = self.get_recorded_bytes() + self.storage_manager.min_free_bytes
+        # Staged parts are bounded by the staging buffer; what has to fit is
+        # the joined file in the output folder.
+        folder = self.output_folder if self.write_staging_active else self.get_recording_folder()
+        if self.storage_manager.free_bytes(folder) >= needed:
+            return
+
+        overflow_folder = self.get_overflow_folder()
+        if not self.overflow_active and overflow_folder and os.path.isdir(overflow_folder) \
+                and self.storage_manager.free_bytes(overflow_folder) >= 2 * needed:
+            self.logger.warning(f"Low disk space in {self.get_recording_folder()}, continuing in {overflow_folder}")
+            self.overflow_active = True
+            self.stop_current_recording()
+            self.start_new_recording()
+            return
+
+        self.logger.error(f"Low disk space in {self.get_recording_folder()}, stopping the recording")
+        self.toggle_recording()
+        QMessageBox.warning(self, self.t("warning"), self.t("error_disk_full"))
+
+    def get_write_staging_mode(self):
+        return self.config.get('Settings', 'write_staging', fallback='auto').lower()
+
+    def get_fast_staging_folder(self):
+        folder = self.config.get('Settings', 'fast_staging_folder', fallback='') or default_fast_folder()
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    def get_staging_buffer_bytes(self):
+        return self.config.getint('Settings', 'staging_buffer_mb', fallback=2048) * 1024 * 1024
+
+    def probe_output_speed(self):
+        if self.get_write_staging_mode() != 'auto':
+            return
+        folder = self.output_folder
+        # Probing writes a scratch file to the very disk that may be slow, so
+        # a measurement is reused until it expires.
+        max_age = self.config.getfloat('Settings', 'write_probe_hours', fallback=24) * 3600
+        self.write_probe = load_probe(folder, max_age)
+        if self.write_probe or self.running:
+            return
+        size_mb = self.config.getint('Settings', 'write_probe_mb', fallback=32)
+
+        def run():
+            try:
+                # A recording that starts meanwhile gets the disk to itself.
+                result = probe_write_speed(folder, size_mb, should_stop=lambda: self.running)
+            except OSError as e:
+                self.logger.error(f"Could not measure write speed of {folder}: {e}")
+                return
+            if result is None:
+                self.logger.info(f"Write speed probe of {folder} stopped for a recording")
+                return
+            save_probe(folder, result)
+            if folder == self.output_folder:
+                self.write_probe = result
+            self.logger.info(f"Write speed of {folder}: {result['mb_per_second']:.1f} MB/s, "
+                             f"p95 latency {result['latency_p95'] * 1000:.0f} ms, max {result['latency_max'] * 1000:.0f} ms")
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def note_output_stall(self, stall):
+        # A stall seen while recording outweighs the probe: the folder is
+        # marked too slow, so later recordings are staged from the start.
+        if self.get_write_staging_mode() != 'auto' or self.get_recording_folder() != self.output_folder:
+            return
+        result = dict(self.write_probe or {"mb_per_second": 0.0, "latency_p95": 0.0, "latency_max": 0.0})
+        result.update(latency_p95=max(result["latency_p95"], stall), latency_max=max(result["latency_max"], stall),
+                      probed=time.time())
+        self.write_probe = result
+        save_probe(self.output_folder, result)
+
+    def should_stage_writes(self):
+        mode = self.get_write_staging_mode()
+        if mode == 'off' or self.deferred_session or self.is_timelapse():
+            return False
+        if mode == 'always':
+            return True
+        if not self.write_probe:
+            return False
+        # The output has to sustain a few times the stream's bitrate, since
+        # the muxer writes in bursts and the join copies everything again.
+        needed = self.get_estimated_bitrate() / 8 * self.config.getfloat('Settings', 'write_headroom', fallback=4)
+        too_slow = self.write_probe["mb_per_second"] * 1024 * 1024 < needed
+        too_late = self.write_probe["latency_p95"] > self.config.getfloat('Settings', 'write_latency_limit', fallback=0.5)
+        if too_slow or too_late:
+            self.logger.warning(f"{self.output_folder} is too slow for live recording, staging parts in {self.get_fast_staging_folder()}")
+        return too_slow or too_late
+
+    def get_current_output_file(self):
+        files = self.collect_recorded_files() if self.recording_process else []
+        return files[-1] if files else getattr(self, 'video_path', None)
+
+    def switch_recording_folder(self, staging):
+        self.write_staging_active = staging
+        self.stop_current_recording()
+        self.start_new_recording()
+
+    def check_write_health(self):
+        if not self.running or not self.recording_process:
+            return
+
+        stall = self.write_monitor.sample(self.get_current_output_file())
+        if stall >= self.write_monitor.stall_seconds and not self.is_long_session():
+            self.status_label.setText(self.t("status_write_stalled").format(seconds=f"{stall:.0f}"))
+            if (not self.write_staging_active and not self.staging_draining and not self.deferred_session
+                    and self.get_write_staging_mode() != 'off'):
+                self.logger.warning(f"Writes to {self.get_recording_folder()} stalled for {stall:.1f} s, "
+                                    f"continuing in {self.get_fast_staging_folder()}")
+                self.note_output_stall(stall)
+                self.switch_recording_folder(staging=True)
+            return
+
+        if not self.write_staging_active and not self.staging_draining:
+            return
+
+        fast_folder = os.path.abspath(self.get_fast_staging_folder())
+        finished = list(self.video_parts)
+        if self.segment_pattern:
+            finished += self.collect_recorded_files()[:-1]
+        for path in finished:
+            if os.path.dirname(os.path.abspath(path)) == fast_folder and not self.part_mover.is_queued(path):
+                self.part_mover.move(path, self.output_folder)
+
+        # The staging buffer is bounded: warn as it fills and write straight
+        # to the output folder again once it is full.
+        used = sum(entry.stat().st_size for entry in os.scandir(fast_folder) if entry.is_file())
+        limit = self.get_staging_buffer_bytes()
+        alarm = limit * self.config.getfloat('Settings', 'staging_alarm_fraction', fallback=0.8)
+        if not self.write_staging_active:
+            # After the buffer filled up, staging only starts again once the
+            # parts already in it have drained below the alarm level.
+            if used < alarm:
+                self.logger.info(f"Staging buffer drained to {used / 1024 ** 2:.0f} MB")
+                self.staging_draining = False
+            return
+        if used >= limit:
+            self.logger.error(f"Staging buffer full ({used / 1024 ** 2:.0f} MB), writing to {self.output_folder} directly")
+            self.staging_draining = True
+            self.switch_recording_folder(staging=False)
+            QMessageBox.warning(self, self.t("warning"), self.t("warning_staging_full"))
+        elif used >= alarm:
+            if not self.staging_alarm:
+                self.logger.warning(f"Staging buffer at {used / 1024 ** 2:.0f} of {limit / 1024 ** 2:.0f} MB")
+                self.staging_alarm = True
+            self.status_label.setText(self.t("status_staging_nearly_full").format(
+                used=f"{used / 1024 ** 2:.0f}", limit=f"{limit / 1024 ** 2:.0f}"))
+        elif self.staging_alarm:
+            self.staging_alarm = False
+            self.status_label.setText(self.t("status_recording"))
+
+    def show_library(self):
+        LibraryDialog(self, self.library).exec()
+
+    def show_jobs(self):
+        JobsDialog(self, self.job_queue).exec()
+
+    def on_job_started(self, job_id):
+        self.on_job_progress(job_id, 0.0)
+
+    def on_job_progress(self, job_id, fraction):
+        job = self.job_queue.get_job(job_id)
+        if job and not self.running:
+            self.status_label.setText(self.t("status_processing").format(
+                task=self.t("job_kind_" + job["kind"]),
+                file=os.path.basename(job["source"]),
+                progress=f"{fraction * 100:.0f}%"
+            ))
+
+    def on_job_finished(self, job_id, output):
+        job = self.job_queue.get_job(job_id)
+        if job and job["params"].get("post_recording"):
+            self.continue_post_recording(job, output)
+        self.library.refresh_async()
+        if not self.running and not self.job_queue.is_busy():
+            self.status_label.setText(self.t("status_ready"))
+
+    def on_job_failed(self, job_id, error):
+        if not self.running and not self.job_queue.is_busy():
+            self.status_label.setText(self.t("status_ready"))
+        job = self.job_queue.get_job(job_id)
+        self.logger.warning(f"Background job failed for {job['source'] if job else job_id}: {error}")
+        if not job or not job["params"].get("post_recording"):
+            return
+        if job["kind"] == "loudnorm":
+            # The recording is still there, only not normalized.
+            self.queue_post_recording_jobs(job["source"])
+            QMessageBox.warning(self, self.t("warning"), self.t("error_normalize_loudness").format(file=os.path.basename(job["source"]), error=error))
+        elif job["kind"] == "transcode":
+            QMessageBox.warning(self, self.t("warning"), self.t("error_deferred_compression").format(file=os.path.basename(job["source"]), error=error))
+
+    def continue_post_recording(self, job, output):
+        # A saved recording goes through deferred compression, then loudness
+        # normalization, then the follow-up jobs, each as its own job.
+        if job["kind"] == "transcode":
+            self.logger.info(f"Recording saved: {output}")
+            if job["params"].get("normalize"):
+                self.submit_loudnorm(output)
+                return
+        self.queue_post_recording_jobs(output)
         
     def read_ffmpeg_output(self):
         if self.recording_process:
@@ -887,7 +2164,16 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
                     except:
                         pass
 
-                    if "A/V sync" in line or "late audio frame" in line or "asynchronous" in line:
+                    if line.startswith("Enter command") or line.startswith("Command reply"):
+                        continue
+                    if self.idle_detector.feed(line, self.media_clock.now()):
+                        continue
+
+                    queue_event = self.queue_tuner.record_line(line)
+
+                    if queue_event:
+                        self.logger.warning(f"Capture queue event ({queue_event}): {line}")
+                    elif "A/V sync" in line or "late audio frame" in line or "asynchronous" in line:
                         self.logger.warning(f"Audio sync warning: {line}")
                     elif "error" in line.lower() and "fatal" in line.lower():
                         self.logger.error(f"FFmpeg Critical Error: {line}")
@@ -896,6 +2182,8 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
                     elif "warning" in line.lower():
                         self.logger.warning(f"FFmpeg Warning: {line}")
                     elif "frame=" in line or "fps=" in line or "size=" in line:
+                        self.media_clock.sync_from_line(line)
+                        self.write_monitor.on_progress()
                         current_time = time.time()
                         if current_time - last_progress_log > 1.0:
                             self.logger.debug(f"FFmpeg Progress: {line}")
@@ -921,15 +2209,29 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
 
     def reset_recording_area(self):
         self.record_area = None
+        self.sync_preview_source()
         
     def toggle_widgets(self, recording):
         enabled = not recording
         
         self.fps_combo.setEnabled(enabled)
+        self.capture_mode_combo.setEnabled(enabled)
         self.bitrate_combo.setEnabled(enabled)
         self.codec_combo.setEnabled(enabled)
         self.format_combo.setEnabled(enabled)
+        self.output_scale_combo.setEnabled(enabled)
+        self.scale_algorithm_combo.setEnabled(enabled)
+        self.long_session_checkbox.setEnabled(enabled)
+        self.long_session_fps_spin.setEnabled(enabled)
+        self.deferred_checkbox.setEnabled(enabled)
+        self.timelapse_checkbox.setEnabled(enabled)
+        self.timelapse_interval_spin.setEnabled(enabled)
+        self.skip_idle_checkbox.setEnabled(enabled)
+        self.idle_threshold_spin.setEnabled(enabled)
+        self.overlay_checkbox.setEnabled(enabled)
+        self.keys_checkbox.setEnabled(enabled)
         self.select_audio_btn.setEnabled(enabled)
+        self.normalize_checkbox.setEnabled(enabled)
         self.language_combo.setEnabled(enabled)
         self.theme_combo.setEnabled(enabled)
         self.output_folder_entry.setEnabled(enabled)
@@ -939,6 +2241,8 @@ class ScreenRecorderBase(QMainWindow, abc.ABC, metaclass=ABCQtMeta):
         self.info_btn.setEnabled(enabled)
         self.browse_folder_btn.setEnabled(enabled)
         self.reset_area_btn.setEnabled(enabled)
+        self.focus_regions_btn.setEnabled(enabled)
+        self.marker_btn.setEnabled(recording)
 
         self.toggle_btn.setText(self.t("stop_recording") if recording else self.t("start_recording"))
         
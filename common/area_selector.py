@@ -1,9 +1,7 @@
 from PyQt6.QtWidgets import (QWidget, QLabel, QVBoxLayout, QDialog)
 from PyQt6.QtCore import Qt, QPoint, QRect, QTimer
-from PyQt6.QtGui import QPainter, QPen, QColor, QBrush, QImage, QPixmap, QFont
+from PyQt6.QtGui import QPainter, QPen, QColor, QBrush, QImage, QPixmap, QFont, QGuiApplication
 import mss
-import cv2
-import numpy as np
 
 class AreaSelector:
     def __init__(self, parent):
@@ -21,17 +19,29 @@ class AreaSelector:
         else:
             self.callback(None)
 
+    def select_regions(self, callback, record_area=None, regions=None):
+        """Mark focus regions inside the recording area; None means cancelled"""
+        self.dialog = AreaSelectorDialog(self.parent, region_mode=True, record_area=record_area, regions=regions)
+        self.dialog.exec()
+        callback(self.dialog.regions if self.dialog.regions_accepted else None)
+
 
 class AreaSelectorDialog(QDialog):
-    def __init__(self, parent):
+    def __init__(self, parent, region_mode=False, record_area=None, regions=None):
         super().__init__(None)
         self.parent = parent
         self.record_area = None
+        self.region_mode = region_mode
+        self.bounds_area = record_area
+        self.regions = list(regions or [])
+        self.regions_accepted = False
         self.rect = None
         self.start_pos = None
         self.current_pos = None
         self.is_dragging = False
         self.background_image = None
+        self.screenshot_data = None
+        self.pixel_ratio = 1.0
 
         self.setWindowFlags(Qt.WindowType.FramelessWindowHint | 
                           Qt.WindowType.WindowStaysOnTopHint)
@@ -45,28 +55,51 @@ class AreaSelectorDialog(QDialog):
         
         self.take_screenshot()
         
+    def find_target_screen(self, monitor):
+        """Find the QScreen showing the monitor selected in the recorder"""
+        screens = QGuiApplication.screens()
+        for screen in screens:
+            geometry = screen.geometry()
+            ratio = screen.devicePixelRatio()
+            if (abs(geometry.x() * ratio - monitor.x) <= 1 and
+                    abs(geometry.y() * ratio - monitor.y) <= 1):
+                return screen
+
+        center_x = monitor.x + monitor.width // 2
+        center_y = monitor.y + monitor.height // 2
+        for screen in screens:
+            geometry = screen.geometry()
+            ratio = screen.devicePixelRatio()
+            if (geometry.x() * ratio <= center_x < (geometry.x() + geometry.width()) * ratio and
+                    geometry.y() * ratio <= center_y < (geometry.y() + geometry.height()) * ratio):
+                return screen
+
+        return self.screen()
+
     def take_screenshot(self):
-        screen = self.screen()
+        monitor = self.parent.monitors[self.parent.monitor_combo.currentIndex()]
+        screen = self.find_target_screen(monitor)
         if screen:
-            geometry = screen.geometry()
-            self.setGeometry(geometry)
-        
+            self.pixel_ratio = screen.devicePixelRatio()
+            if hasattr(self, 'setScreen'):
+                self.setScreen(screen)
+            self.setGeometry(screen.geometry())
+
+        # Grab only the selected monitor and keep mss' BGRA bytes as they are:
+        # Format_RGB32 reads them without a colour conversion or extra copy.
         with mss.mss() as sct:
-            # Get the entire screen dimensions
-            monitor = sct.monitors[0]
-            screenshot = sct.grab(monitor)
-            img_array = np.array(screenshot)
-            
-            # Convert to RGB format for Qt
-            img_array = cv2.cvtColor(img_array, cv2.COLOR_BGRA2RGB)
-            
-            # Create QImage from array
-            h, w, ch = img_array.shape
-            bytes_per_line = ch * w
-            q_img = QImage(img_array.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            
-            # Convert to pixmap
-            self.background_image = QPixmap.fromImage(q_img)
+            region = {
+                "left": monitor.x,
+                "top": monitor.y,
+                "width": monitor.width,
+                "height": monitor.height
+            }
+            screenshot = sct.grab(region)
+            self.screenshot_data = screenshot.raw
+            width, height = screenshot.size
+
+        self.background_image = QImage(self.screenshot_data, width, height, width * 4, QImage.Format.Format_RGB32)
+        self.background_image.setDevicePixelRatio(self.pixel_ratio)
         
         # Show in fullscreen
         self.showFullScreen()
@@ -81,11 +114,14 @@ class AreaSelectorDialog(QDialog):
         painter = QPainter(self)
         
         # Draw background image
-        painter.drawPixmap(0, 0, self.background_image)
+        painter.drawImage(0, 0, self.background_image)
         
         # Draw dark overlay
         overlay = QColor(0, 0, 0, 128)
         painter.fillRect(0, 0, self.width(), self.height(), overlay)
+
+        if self.region_mode:
+            self.paint_regions(painter)
         
         # Draw selection rectangle if exists
         if self.start_pos and self.current_pos and self.is_dragging:
@@ -142,6 +178,30 @@ class AreaSelectorDialog(QDialog):
             # Vertical line
             painter.drawLine(self.current_pos.x(), 0, self.current_pos.x(), self.height())
 
+    def to_logical_rect(self, area):
+        x1, y1, x2, y2 = area
+        r = self.pixel_ratio
+        return QRect(QPoint(round(x1 / r), round(y1 / r)), QPoint(round(x2 / r), round(y2 / r)))
+
+    def paint_regions(self, painter):
+        """Show the recording area and the focus regions marked so far"""
+        if self.bounds_area:
+            bounds = self.to_logical_rect(self.bounds_area)
+            painter.setPen(QPen(QColor(255, 0, 0), 2, Qt.PenStyle.DashLine))
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.drawRect(bounds)
+
+        painter.setPen(QPen(QColor(0, 200, 0), 2))
+        painter.setBrush(QBrush(QColor(0, 200, 0, 60)))
+        for region in self.regions:
+            painter.drawRect(self.to_logical_rect(region))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        painter.setFont(QFont("Arial", 12, QFont.Weight.Bold))
+        painter.setPen(QPen(QColor(255, 255, 255)))
+        painter.drawText(QRect(0, 20, self.width(), 30), Qt.AlignmentFlag.AlignCenter,
+                         self.parent.t("focus_regions_help"))
+
     def mouseMoveEvent(self, event):
         """Handle mouse movement"""
         self.current_pos = event.pos()
@@ -170,8 +230,11 @@ class AreaSelectorDialog(QDialog):
                 
                 # Check if selection is valid
                 if rect.width() > 10 and rect.height() > 10:
-                    x1, y1 = rect.left(), rect.top()
-                    x2, y2 = rect.right(), rect.bottom()
+                    # Map logical widget coordinates to physical pixels of the monitor
+                    x1 = round(rect.left() * self.pixel_ratio)
+                    y1 = round(rect.top() * self.pixel_ratio)
+                    x2 = round(rect.right() * self.pixel_ratio)
+                    y2 = round(rect.bottom() * self.pixel_ratio)
                     
                     # Ensure even dimensions
                     width = x2 - x1
@@ -185,6 +248,14 @@ class AreaSelectorDialog(QDialog):
                     self.record_area = (x1, y1, x2, y2)
                 else:
                     self.record_area = None
+
+                if self.region_mode:
+                    # Keep collecting regions until Enter is pressed
+                    if self.record_area:
+                        self.regions.append(self.record_area)
+                    self.record_area = None
+                    self.update()
+                    return
                 
                 self.finish_selection()
 
@@ -193,9 +264,17 @@ class AreaSelectorDialog(QDialog):
         if event.key() == Qt.Key.Key_Escape:
             self.record_area = None
             self.finish_selection()
+        elif self.region_mode and event.key() in (Qt.Key.Key_Return, Qt.Key.Key_Enter):
+            self.regions_accepted = True
+            self.finish_selection()
+        elif self.region_mode and event.key() == Qt.Key.Key_Backspace and self.regions:
+            self.regions.pop()
+            self.update()
 
     def finish_selection(self):
         """Clean up and return to parent"""
+        self.background_image = None
+        self.screenshot_data = None
         self.close()
         self.parent.show()
         self.accept()
\ No newline at end of file
@@ -0,0 +1,62 @@
+DEFAULT_SAMPLE_SPEC = {'format': 's16le', 'channels': 2, 'rate': 48000}
+
+def parse_sample_spec(text):
+    spec = dict(DEFAULT_SAMPLE_SPEC)
+    for part in text.split():
+        if part.endswith('ch') and part[:-2].isdigit():
+            spec['channels'] = int(part[:-2])
+        elif part.endswith('Hz') and part[:-2].isdigit():
+            spec['rate'] = int(part[:-2])
+        elif part[0].isalpha():
+            spec['format'] = part
+    return spec
+
+def channel_layout(channels):
+    return {1: 'mono', 2: 'stereo'}.get(channels, f"{channels}c")
+
+def negotiate_mix_format(specs, output_rate=48000, output_channels=2):
+    # Mix at the inputs' own format when they all agree, so the only conversion
+    # happens once after amix; otherwise mix at the output format and convert
+    # only the inputs that differ from it.
+    rates = {spec['rate'] for spec in specs}
+    channels = {spec['channels'] for spec in specs}
+    mix_rate = rates.pop() if len(rates) == 1 else output_rate
+    mix_channels = channels.pop() if len(channels) == 1 else output_channels
+    return mix_rate, mix_channels
+
+def build_audio_graph(inputs, output_rate=48000, output_channels=2):
+    specs = [spec for _, _, spec in inputs]
+    mix_rate, mix_channels = negotiate_mix_format(specs, output_rate, output_channels)
+
+    filters = []
+    labels = []
+    summary = []
+
+    for i, (stream_index, gain, spec) in enumerate(inputs):
+        chain = [f"volume={gain:.2f}"]
+        if spec['rate'] != mix_rate:
+            chain.append(f"aresample={mix_rate}")
+        if spec['channels'] != mix_channels:
+            chain.append(f"aformat=channel_layouts={channel_layout(mix_channels)}")
+
+        label = f"a{i}" if len(inputs) > 1 else "amixed"
+        filters.append(f"[{stream_index}:a]{','.join(chain)}[{label}]")
+        labels.append(f"[{label}]")
+        summary.append(f"{stream_index}:{spec['format']} {spec['channels']}ch {spec['rate']}Hz -> {','.join(chain)}")
+
+    if len(inputs) > 1:
+        filters.append(f"{''.join(labels)}amix=inputs={len(inputs)}:duration=longest:dropout_transition=0[amixed]")
+        summary.append(f"amix {mix_rate}Hz {channel_layout(mix_channels)}")
+
+    output_chain = []
+    if mix_rate != output_rate:
+        output_chain.append(f"aresample={output_rate}")
+    if mix_channels != output_channels:
+        output_chain.append(f"aformat=sample_fmts=fltp:channel_layouts={channel_layout(output_channels)}")
+    else:
+        output_chain.append("aformat=sample_fmts=fltp")
+
+    filters.append(f"[amixed]{','.join(output_chain)}[aout]")
+    summary.append(f"output -> {','.join(output_chain)}")
+
+    return ';'.join(filters), ' | '.join(summary)
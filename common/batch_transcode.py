@@ -0,0 +1,117 @@
+import argparse
+import os
+import signal
+import sys
+import time
+
+from common.subprocess_helper import run_subprocess
+
+# Encoders a batch can shrink recordings to, with the codec name ffprobe
+# reports for their output (files already in that codec are skipped).
+TARGET_CODECS = {
+    "libx265": "hevc",
+    "libsvtav1": "av1",
+}
+
+_encoder_cache = {}
+
+def ffmpeg_has_encoder(ffmpeg_path, name):
+    key = (ffmpeg_path, name)
+    if key not in _encoder_cache:
+        try:
+            result = run_subprocess([ffmpeg_path, "-hide_banner", "-encoders"], capture_output=True, text=True,
+                                    encoding='utf-8', errors='replace')
+            _encoder_cache[key] = any(line.split()[1:2] == [name] for line in result.stdout.splitlines())
+        except (OSError, IndexError):
+            _encoder_cache[key] = False
+    return _encoder_cache[key]
+
+def get_encoder_args(codec, crf=None, preset=None):
+    if codec == "libx265":
+        return ["-c:v", "libx265", "-preset", preset or "medium", "-crf", str(crf or 28), "-tag:v", "hvc1"]
+    if codec == "libsvtav1":
+        return ["-c:v", "libsvtav1", "-preset", preset or "8", "-crf", str(crf or 35)]
+    raise ValueError(f"Unsupported target codec: {codec}")
+
+def select_candidates(library, codecs=("h264",), older_than_days=30, min_size_mb=0, target_codec="libx265"):
+    skip = TARGET_CODECS.get(target_codec)
+    older_than = time.time() - older_than_days * 86400 if older_than_days else None
+    rows = library.select(codecs=codecs, older_than=older_than, min_size=int(min_size_mb * 1024 * 1024))
+    return [row for row in rows if row["video_codec"] != skip and not row["probe_error"]]
+
+def submit_batch(job_queue, rows, codec, crf=None, preset=None, priority=2):
+    # The original is replaced in place, keeping its name, container and
+    # modification time, once the new file has been checked against it.
+    encoder_args = get_encoder_args(codec, crf, preset)
+    return [job_queue.submit("transcode", row["path"], row["path"], priority=priority,
+                             encoder_args=encoder_args, verify=True, keep_mtime=True)
+            for row in rows]
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="app.py transcode",
+                                     description="Shrink recordings in the output folder with a more efficient codec.")
+    parser.add_argument("--folder", help="folder to transcode (default: the configured output folder)")
+    parser.add_argument("--older-than-days", type=float, default=30, help="only files older than this (default 30)")
+    parser.add_argument("--codec", action="append", dest="codecs", help="source codec to pick, repeatable (default h264)")
+    parser.add_argument("--min-size-mb", type=float, default=0, help="only files at least this large")
+    parser.add_argument("--to", dest="target", choices=sorted(TARGET_CODECS), default="libx265")
+    parser.add_argument("--crf", type=int, help="quality of the new encode")
+    parser.add_argument("--preset", help="encoder preset")
+    parser.add_argument("--workers", type=int, default=0, help="parallel transcodes (default: half the cores)")
+    parser.add_argument("--dry-run", action="store_true", help="only list the files that would be transcoded")
+    return parser
+
+def run_cli(argv, folder, ffmpeg_path="ffmpeg", ffprobe_path="ffprobe"):
+    # Runs a batch to completion on the same job journal the app uses, so a
+    # batch interrupted here or in the app continues where it stopped.
+    from PyQt6.QtCore import QCoreApplication, QTimer
+    from common.job_queue import JobQueue
+    from common.library_index import LibraryIndex
+
+    args = build_parser().parse_args(argv)
+    folder = args.folder or folder
+    if not ffmpeg_has_encoder(ffmpeg_path, args.target):
+        print(f"This FFmpeg build has no {args.target} encoder.", file=sys.stderr)
+        return 2
+
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+    library = LibraryIndex(ffprobe_path, folder)
+    library.refresh()
+    rows = select_candidates(library, tuple(args.codecs or ["h264"]), args.older_than_days,
+                             args.min_size_mb, args.target)
+    library.close()
+
+    total_size = sum(row["size"] for row in rows)
+    print(f"{len(rows)} file(s), {total_size / 1024 ** 3:.2f} GB to transcode to {args.target}")
+    if args.dry_run:
+        for row in rows:
+            print(f"  {row['path']} ({row['video_codec']}, {row['size'] / 1024 ** 2:.0f} MB)")
+        return 0
+
+    job_queue = JobQueue(ffmpeg_path, os.path.join(folder, ".jobs"), max_workers=args.workers or None)
+    if not job_queue.owns_journal():
+        # The app (or another batch) is running this folder's jobs; sharing
+        # the journal would let both run and overwrite the same jobs.
+        print("The recorder or another batch is using this folder's job queue, try again once it has closed.",
+              file=sys.stderr)
+        job_queue.shutdown()
+        return 3
+    job_queue.job_finished.connect(lambda job_id, output: print(f"done    {output}"))
+    job_queue.job_failed.connect(lambda job_id, error: print(f"failed  {job_queue.get_job(job_id)['source']}: {error}"))
+    job_queue.job_started.connect(lambda job_id: print(f"started {job_queue.get_job(job_id)['source']}"))
+    job_queue.resume_pending()
+    submit_batch(job_queue, rows, args.target, args.crf, args.preset)
+
+    def interrupt(signum, frame):
+        print("Interrupted, the batch resumes on the next run.")
+        app.quit()
+
+    # The timer also gives Python a chance to run the Ctrl+C handler while
+    # Qt's event loop is waiting.
+    signal.signal(signal.SIGINT, interrupt)
+    timer = QTimer()
+    timer.timeout.connect(lambda: None if job_queue.is_busy() else app.quit())
+    timer.start(500)
+    app.exec()
+    job_queue.shutdown(wait=True)
+    return 0
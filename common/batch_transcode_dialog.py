@@ -0,0 +1,67 @@
+from PyQt6.QtWidgets import QDialog, QGridLayout, QSpinBox, QComboBox, QLabel, QDialogButtonBox
+from PyQt6.QtCore import Qt
+
+from common.batch_transcode import TARGET_CODECS, ffmpeg_has_encoder, select_candidates, submit_batch
+
+class BatchTranscodeDialog(QDialog):
+    def __init__(self, parent, library):
+        super().__init__(parent)
+        self.recorder = parent
+        self.library = library
+        self.rows = []
+        self.setWindowTitle(parent.t("batch_transcode"))
+        self.setModal(True)
+
+        layout = QGridLayout(self)
+
+        self.age_spin = QSpinBox()
+        self.age_spin.setRange(0, 3650)
+        self.age_spin.setValue(30)
+        self.source_combo = QComboBox()
+        self.source_combo.addItems(["h264", "hevc"])
+        self.size_spin = QSpinBox()
+        self.size_spin.setRange(0, 1000000)
+        self.size_spin.setSuffix(" MB")
+        self.target_combo = QComboBox()
+        ffmpeg_path = parent.get_ffmpeg_path() or "ffmpeg"
+        self.target_combo.addItems([codec for codec in TARGET_CODECS if ffmpeg_has_encoder(ffmpeg_path, codec)])
+        self.matches_label = QLabel()
+
+        for widget in (self.age_spin, self.size_spin):
+            widget.valueChanged.connect(self.update_matches)
+        for widget in (self.source_combo, self.target_combo):
+            widget.currentIndexChanged.connect(self.update_matches)
+
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel,
+            Qt.Orientation.Horizontal, self)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+
+        layout.addWidget(QLabel(parent.t("batch_older_than")), 0, 0)
+        layout.addWidget(self.age_spin, 0, 1)
+        layout.addWidget(QLabel(parent.t("batch_source_codec")), 1, 0)
+        layout.addWidget(self.source_combo, 1, 1)
+        layout.addWidget(QLabel(parent.t("batch_min_size")), 2, 0)
+        layout.addWidget(self.size_spin, 2, 1)
+        layout.addWidget(QLabel(parent.t("batch_target_codec")), 3, 0)
+        layout.addWidget(self.target_combo, 3, 1)
+        layout.addWidget(self.matches_label, 4, 0, 1, 2)
+        layout.addWidget(self.buttons, 5, 0, 1, 2)
+        self.update_matches()
+
+    def update_matches(self):
+        target = self.target_combo.currentText()
+        self.rows = select_candidates(self.library, (self.source_combo.currentText(),), self.age_spin.value(),
+                                      self.size_spin.value(), target) if target else []
+        total_size = sum(row["size"] for row in self.rows)
+        self.matches_label.setText(self.recorder.t("batch_matches").format(
+            count=len(self.rows), size=f"{total_size / 1024 ** 3:.2f} GB"))
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(bool(self.rows))
+
+    def accept(self):
+        # Queued at low priority on the shared journal: the batch yields to
+        # recordings and carries on after a restart.
+        submit_batch(self.recorder.job_queue, self.rows, self.target_combo.currentText())
+        super().accept()
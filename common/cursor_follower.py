@@ -0,0 +1,36 @@
+class CursorFollower:
+    def __init__(self, region_width, region_height, bounds_width, bounds_height, smoothing=0.6, dead_zone=0.5):
+        self.width = min(region_width, bounds_width)
+        self.height = min(region_height, bounds_height)
+        self.bounds_width = bounds_width
+        self.bounds_height = bounds_height
+        self.smoothing = min(max(smoothing, 0.0), 0.95)
+        self.dead_zone = min(max(dead_zone, 0.0), 1.0)
+
+        self.x = (bounds_width - self.width) / 2
+        self.y = (bounds_height - self.height) / 2
+
+    def _follow_axis(self, position, pointer, size, bounds):
+        # The region only moves once the pointer leaves the dead zone around its
+        # centre, and then eases towards the point that brings it back inside.
+        center = position + size / 2
+        limit = self.dead_zone * size / 2
+        offset = pointer - center
+
+        if offset > limit:
+            target = pointer - limit
+        elif offset < -limit:
+            target = pointer + limit
+        else:
+            target = center
+
+        center += (target - center) * (1 - self.smoothing)
+        return min(max(center - size / 2, 0), bounds - size)
+
+    def update(self, pointer_x, pointer_y):
+        self.x = self._follow_axis(self.x, pointer_x, self.width, self.bounds_width)
+        self.y = self._follow_axis(self.y, pointer_y, self.height, self.bounds_height)
+        return self.position()
+
+    def position(self):
+        return int(self.x) // 2 * 2, int(self.y) // 2 * 2
@@ -0,0 +1,58 @@
+import logging
+import os
+
+class DeferredTranscoder:
+    # Stage two of deferred compression. Staged lossless recordings wait in
+    # their own folder; compressing one is a transcode job on the shared job
+    # queue, which journals, retries, pauses and shuts it down with all other
+    # background work. This class only looks after the staging area.
+
+    def __init__(self, job_queue, staging_folder, limit_gb=50):
+        self.logger = logging.getLogger()
+        self.job_queue = job_queue
+        self.staging_folder = staging_folder
+        self.limit_bytes = int(limit_gb * 1024 * 1024 * 1024)
+        os.makedirs(self.staging_folder, exist_ok=True)
+
+    def submit(self, source, target, encoder_args, **params):
+        # The staged file is removed once the compressed one has replaced it.
+        return self.job_queue.submit("transcode", source, target, priority=self.job_queue.PRIORITY_NORMAL,
+                                     encoder_args=list(encoder_args), remove_source=True, deferred=True, **params)
+
+    def is_staged(self, job):
+        return job["kind"] == "transcode" and job.get("params", {}).get("deferred")
+
+    def staging_usage(self):
+        total = 0
+        for entry in os.scandir(self.staging_folder):
+            if entry.is_file():
+                total += entry.stat().st_size
+        return total
+
+    def has_room(self):
+        return self.staging_usage() < self.limit_bytes
+
+    def cleanup(self):
+        # Staged files of failed or cancelled jobs stay for a retry from the
+        # jobs dialog until the staging area outgrows its limit; then the
+        # oldest are removed along with their jobs.
+        jobs = [job for job in self.job_queue.get_jobs()
+                if self.is_staged(job) and job["status"] in ("failed", "cancelled")]
+        jobs.sort(key=lambda job: os.path.getmtime(job["source"]) if os.path.exists(job["source"]) else 0)
+
+        removed = 0
+        for job in jobs:
+            if self.has_room():
+                break
+            try:
+                if os.path.exists(job["source"]):
+                    os.remove(job["source"])
+            except OSError as e:
+                self.logger.error(f"Could not remove {job['source']}: {e}")
+                continue
+            self.job_queue.remove(job["id"])
+            removed += 1
+
+        if removed:
+            self.logger.warning(f"Staging area over its limit, removed {removed} failed recording(s)")
+        return removed
@@ -0,0 +1,34 @@
+import threading
+from collections import OrderedDict
+
+class FFmpegCommandQueue:
+    # FFmpeg reads at most one interactive command every 100ms, so pending
+    # commands are coalesced per filter option and sent one per tick. An
+    # argument may be a callable, evaluated when the command is actually sent.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = OrderedDict()
+
+    def put(self, target, command, argument, urgent=False):
+        key = (target, command)
+        with self.lock:
+            self.commands.pop(key, None)
+            self.commands[key] = argument
+            if urgent:
+                self.commands.move_to_end(key, last=False)
+
+    def is_pending(self, target, command):
+        with self.lock:
+            return (target, command) in self.commands
+
+    def pop(self):
+        with self.lock:
+            if not self.commands:
+                return None
+            (target, command), argument = self.commands.popitem(last=False)
+        return target, command, argument
+
+    def clear(self):
+        with self.lock:
+            self.commands.clear()
@@ -0,0 +1,199 @@
+import re
+import threading
+
+from common import keyframe_index
+
+PTS_TIME = re.compile(r"^frame:\d+\s+pts:\S+\s+pts_time:(-?\d+(?:\.\d+)?)")
+EVENT = re.compile(r"^lavfi\.(freezedetect\.freeze|silence)_(start|end)=(-?\d+(?:\.\d+)?)")
+SOURCES = {"freezedetect.freeze": "screen", "silence": "audio"}
+
+
+class IdleDetector:
+    # freezedetect and silencedetect tag the frames where the picture or the
+    # sound stops and starts changing; the metadata filters print those tags
+    # to FFmpeg's stderr (bypassing -loglevel), where the output reader passes
+    # them here. Their timestamps are the capture's own, so each event is
+    # moved onto the media clock by the offset seen when it is reported.
+
+    def __init__(self, on_interval, detect_seconds=2.0, noise_db=-50, freeze_noise=0.003):
+        self.on_interval = on_interval
+        self.detect_seconds = detect_seconds
+        self.noise_db = noise_db
+        self.freeze_noise = freeze_noise
+        self.lock = threading.Lock()
+        self.sources = set()
+        self.open = {}
+        self.last_time = None
+
+    def video_filter(self):
+        with self.lock:
+            self.sources.add("screen")
+        return (f"freezedetect=n={self.freeze_noise}:d={self.detect_seconds},"
+                f"metadata=mode=print:file='pipe\\:2'")
+
+    def audio_filter(self):
+        with self.lock:
+            self.sources.add("audio")
+        return (f"silencedetect=n={self.noise_db}dB:d={self.detect_seconds},"
+                f"ametadata=mode=print:file='pipe\\:2'")
+
+    def feed(self, line, media_now):
+        # Returns True for the lines that belong to the detectors.
+        match = PTS_TIME.match(line)
+        if match:
+            self.last_time = float(match.group(1))
+            return True
+        match = EVENT.match(line)
+        if not match:
+            return line.startswith(("lavfi.freezedetect.", "lavfi.silence_"))
+
+        kind, edge, value = match.groups()
+        source = SOURCES[kind]
+        offset = media_now - (self.last_time if self.last_time is not None else float(value))
+        seconds = max(0.0, float(value) + offset)
+        with self.lock:
+            if source not in self.sources:
+                return True
+            if edge == "start":
+                self.open[source] = seconds
+            elif source in self.open:
+                self.on_interval(source, self.open.pop(source), seconds)
+        return True
+
+    def finish_part(self):
+        # Called when an FFmpeg process has ended. Idle stretches still open
+        # run to the end of the part; a part recorded without audio counts
+        # as silent throughout, so the screen alone decides.
+        with self.lock:
+            intervals = [(source, start, None) for source, start in self.open.items()]
+            if self.sources and "audio" not in self.sources:
+                intervals.append(("audio", 0.0, None))
+            self.sources = set()
+            self.open = {}
+            self.last_time = None
+        for source, start, end in intervals:
+            self.on_interval(source, start, end)
+
+
+def part_ranges(parts, durations):
+    # Global start and end of every FFmpeg process, given how many of the
+    # joined files each one wrote.
+    ranges = {}
+    index = 0
+    position = 0.0
+    for part in parts:
+        length = sum(durations[index:index + part["files"]])
+        ranges[part["part"]] = (position, position + length)
+        position += length
+        index += part["files"]
+    return ranges
+
+def merge(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def intersect(first, second):
+    result = []
+    for start_a, end_a in first:
+        for start_b, end_b in second:
+            start, end = max(start_a, start_b), min(end_a, end_b)
+            if end > start:
+                result.append((start, end))
+    return merge(result)
+
+def idle_intervals(idle, parts, durations):
+    # Global stretches where the screen was still and the audio silent.
+    ranges = part_ranges(parts, durations)
+    by_source = {"screen": [], "audio": []}
+    for entry in idle:
+        if entry["part"] not in ranges or entry["source"] not in by_source:
+            continue
+        part_start, part_end = ranges[entry["part"]]
+        start = min(part_end, part_start + entry["start"])
+        end = part_end if entry["end"] is None else min(part_end, part_start + entry["end"])
+        if end > start:
+            by_source[entry["source"]].append((start, end))
+    return intersect(merge(by_source["screen"]), merge(by_source["audio"]))
+
+def file_offsets(durations):
+    offsets = []
+    position = 0.0
+    for duration in durations:
+        offsets.append(position)
+        position += duration
+    return offsets
+
+def plan_cuts(intervals, durations, index_for, threshold=60.0, preroll=3.0):
+    # Each idle stretch longer than the threshold is cut out, except for the
+    # pre-roll before activity resumes. Both ends of a cut are moved onto
+    # keyframes so the rest can be stream-copied; `index_for(i)` gives the
+    # keyframe index of file i.
+    offsets = file_offsets(durations)
+    total = sum(durations)
+
+    def locate(seconds):
+        i = max(i for i, offset in enumerate(offsets) if offset <= seconds)
+        return i, seconds - offsets[i]
+
+    cuts = []
+    for start, end in intervals:
+        if end - start < threshold:
+            continue
+        i, local = locate(start)
+        keyframe = keyframe_index.keyframe_after(index_for(i)["keyframes"], local)
+        cut_start = offsets[i] + (durations[i] if keyframe is None else keyframe)
+        if end >= total - 0.001:
+            cut_end = total
+        else:
+            i, local = locate(max(start, end - preroll))
+            cut_end = offsets[i] + keyframe_index.keyframe_before(index_for(i)["keyframes"], local)
+        if cut_end - cut_start >= 1.0:
+            cuts.append((cut_start, cut_end))
+    return cuts
+
+def build_concat_entries(files, durations, cuts, starts=None, delays=None):
+    # Concat list entries for the stretches that are kept. The demuxer stops
+    # a file at the first packet decoded at or after the out point, so with
+    # B-frames the out point is moved back by the reorder delay and the
+    # shown length is given as the duration.
+    entries = []
+    for i, (path, duration, offset) in enumerate(zip(files, durations, file_offsets(durations))):
+        spans = [(offset, offset + duration)]
+        for cut_start, cut_end in cuts:
+            kept = []
+            for start, end in spans:
+                if cut_end <= start or cut_start >= end:
+                    kept.append((start, end))
+                    continue
+                if cut_start > start:
+                    kept.append((start, cut_start))
+                if cut_end < end:
+                    kept.append((cut_end, end))
+            spans = kept
+        start_time = starts[i] if starts else 0.0
+        delay = delays[i] if delays else 0.0
+        for start, end in spans:
+            if end - start < 0.001:
+                continue
+            if start <= offset + 0.001 and end >= offset + duration - 0.001:
+                entries.append((path, None, None, None))
+                continue
+            inpoint = start - offset + start_time if start > offset + 0.001 else None
+            outpoint = end - offset + start_time - delay if end < offset + duration - 0.001 else None
+            entries.append((path, inpoint, outpoint, end - start if outpoint is not None else None))
+    return entries
+
+def map_time(seconds, cuts):
+    # Position in the joined file of a moment in the uncut recording.
+    removed = 0.0
+    for start, end in cuts:
+        if seconds >= end:
+            removed += end - start
+        elif seconds > start:
+            return start - removed
+    return seconds - removed
@@ -0,0 +1,202 @@
+import logging
+import platform
+import subprocess
+import threading
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from common.subprocess_helper import run_subprocess
+
+CURSOR_SIZE = 44
+RIPPLE_SIZE = 64
+RIPPLE_DURATION = 0.6
+CAPTION_DURATION = 1.5
+
+_filter_cache = {}
+
+def ffmpeg_has_filter(ffmpeg_path, name):
+    key = (ffmpeg_path, name)
+    if key not in _filter_cache:
+        try:
+            result = run_subprocess([ffmpeg_path, "-hide_banner", "-filters"], capture_output=True, text=True,
+                                    encoding='utf-8', errors='replace')
+            _filter_cache[key] = any(line.split()[1:2] == [name] for line in result.stdout.splitlines())
+        except (OSError, IndexError):
+            _filter_cache[key] = False
+    return _filter_cache[key]
+
+def _sprite(size, rgb, alpha_expression, fps):
+    # A single RGBA frame is rendered once and looped, so no per-frame drawing
+    # happens outside the overlay's own rectangle.
+    r, g, b = rgb
+    return (f"color=c=black@0:s={size}x{size}:r={fps}:d={1 / fps:.4f},format=rgba,"
+            f"geq=r={r}:g={g}:b={b}:a='{alpha_expression}',loop=loop=-1:size=1")
+
+def build_overlay_graph(fps, captions=False, font_size=28):
+    half = CURSOR_SIZE // 2
+    ring = RIPPLE_SIZE // 2
+    cursor = _sprite(CURSOR_SIZE, (255, 210, 0), f"if(lte(hypot(X-{half}\\,Y-{half})\\,{half})\\,90\\,0)", fps)
+    ripple = _sprite(RIPPLE_SIZE, (255, 40, 40), f"if(between(hypot(X-{ring}\\,Y-{ring})\\,{ring - 6}\\,{ring - 1})\\,220\\,0)", fps)
+
+    # Both overlays start off-screen and are moved by interactive commands.
+    graph = (f"null[ovmain];{cursor}[ovcursor];{ripple}[ovripple];"
+             f"[ovmain][ovcursor]overlay@cursor=x=-10000:y=-10000:shortest=1[ovpointer];"
+             f"[ovpointer][ovripple]overlay@click=x=-10000:y=-10000:shortest=1")
+    if captions:
+        graph += (f",drawtext@keys=text='':fontsize={font_size}:fontcolor=white:box=1:boxcolor=black@0.6"
+                  f":boxborderw=8:x=(w-text_w)/2:y=h-text_h-40:expansion=none:enable=0")
+    return graph
+
+def escape_caption(text):
+    # For a value inside single quotes, where FFmpeg takes everything
+    # literally, backslashes included, up to the next quote. A quote is
+    # written by closing the quoted part, adding an escaped quote and
+    # opening a new one.
+    return text.replace("'", "'\\''")
+
+
+class InputListener(QObject):
+
+    clicked = pyqtSignal(float, int)
+    key_pressed = pyqtSignal(float, str)
+
+    MODIFIERS = {
+        "Control_L": "Ctrl", "Control_R": "Ctrl",
+        "Shift_L": "Shift", "Shift_R": "Shift",
+        "Alt_L": "Alt", "Alt_R": "Alt", "ISO_Level3_Shift": "AltGr",
+        "Super_L": "Super", "Super_R": "Super",
+    }
+
+    def __init__(self, clock):
+        super().__init__()
+        self.logger = logging.getLogger()
+        self.clock = clock
+        self.capture_keys = False
+        self.running = False
+        self.process = None
+        self.thread = None
+        self.keymap = None
+
+    def start(self, capture_keys=False):
+        if self.running:
+            return
+        self.capture_keys = capture_keys
+        self.running = True
+        target = self._windows_loop if platform.system() == 'Windows' else self._x11_loop
+        self.thread = threading.Thread(target=target, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.process:
+            self.process.terminate()
+            self.process = None
+        if self.thread:
+            self.thread.join(timeout=1)
+        self.thread = None
+
+    def _caption(self, modifiers, name):
+        if name in modifiers:
+            return None
+        return "+".join(sorted(modifiers) + [name])
+
+    def _load_x11_keymap(self):
+        keymap = {}
+        try:
+            result = subprocess.run(["xmodmap", "-pke"], capture_output=True, text=True, encoding='utf-8', errors='replace')
+        except FileNotFoundError:
+            return keymap
+        for line in result.stdout.splitlines():
+            parts = line.split()
+            if len(parts) >= 4 and parts[0] == "keycode" and parts[2] == "=":
+                keymap[int(parts[1])] = parts[3]
+        return keymap
+
+    def _x11_loop(self):
+        # Raw XInput2 events arrive for every click and key press on the
+        # display without grabbing anything from the focused application.
+        try:
+            self.process = subprocess.Popen(["xinput", "test-xi2", "--root"], stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, text=True, encoding='utf-8', errors='replace')
+        except FileNotFoundError:
+            self.logger.error("xinput not found. Install xinput to show clicks in recordings.")
+            self.running = False
+            return
+
+        if self.capture_keys and self.keymap is None:
+            self.keymap = self._load_x11_keymap()
+
+        process = self.process
+        event = None
+        event_time = 0.0
+        last_event = None
+        modifiers = set()
+        for line in iter(process.stdout.readline, ""):
+            if not self.running:
+                break
+            line = line.strip()
+            if line.startswith("EVENT type"):
+                event = line[line.find("(") + 1:line.find(")")]
+                event_time = self.clock.now()
+            elif line.startswith("detail:") and event:
+                try:
+                    detail = int(line.split(":", 1)[1])
+                except ValueError:
+                    continue
+
+                # Raw events are reported for both the master and the physical
+                # device; drop the second copy.
+                if last_event and last_event[:2] == (event, detail) and event_time - last_event[2] < 0.02:
+                    event = None
+                    continue
+                last_event = (event, detail, event_time)
+
+                if event == "RawButtonPress" and detail in (1, 2, 3):
+                    self.clicked.emit(event_time, detail)
+                elif event in ("RawKeyPress", "RawKeyRelease") and self.capture_keys:
+                    name = self.keymap.get(detail, str(detail))
+                    modifier = self.MODIFIERS.get(name)
+                    if event == "RawKeyRelease":
+                        modifiers.discard(modifier)
+                    elif modifier:
+                        modifiers.add(modifier)
+                    else:
+                        caption = self._caption(modifiers, name)
+                        if caption:
+                            self.key_pressed.emit(event_time, caption)
+                event = None
+
+    def _windows_loop(self):
+        import ctypes
+        user32 = ctypes.windll.user32
+
+        mouse_buttons = {0x01: 1, 0x04: 2, 0x02: 3}
+        modifier_keys = {0x10: "Shift", 0x11: "Ctrl", 0x12: "Alt", 0x5B: "Win", 0x5C: "Win"}
+        ignored = set(mouse_buttons) | set(modifier_keys) | set(range(0xA0, 0xA6)) | {0x05, 0x06}
+        keys = [vk for vk in range(0x08, 0xFF) if vk not in ignored] if self.capture_keys else []
+        pressed = set()
+
+        def key_name(vk):
+            buffer = ctypes.create_unicode_buffer(64)
+            scan_code = user32.MapVirtualKeyW(vk, 0)
+            if user32.GetKeyNameTextW(scan_code << 16, buffer, 64):
+                return buffer.value
+            return f"0x{vk:02X}"
+
+        # There is no hook-free event stream on Windows, so the button and key
+        # states are sampled; 100Hz is far below the cost of one frame.
+        while self.running:
+            for vk in list(mouse_buttons) + keys:
+                down = bool(user32.GetAsyncKeyState(vk) & 0x8000)
+                if down and vk not in pressed:
+                    pressed.add(vk)
+                    if vk in mouse_buttons:
+                        self.clicked.emit(self.clock.now(), mouse_buttons[vk])
+                    else:
+                        modifiers = {name for code, name in modifier_keys.items() if user32.GetAsyncKeyState(code) & 0x8000}
+                        caption = self._caption(modifiers, key_name(vk))
+                        if caption:
+                            self.key_pressed.emit(self.clock.now(), caption)
+                elif not down:
+                    pressed.discard(vk)
+            time.sleep(0.01)
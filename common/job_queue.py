@@ -0,0 +1,400 @@
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from common.job_tasks import JobCancelled, TASKS, lower_priority, run_job
+
+if platform.system() == 'Windows':
+    import msvcrt
+else:
+    import fcntl
+
+class JournalLock:
+    # An OS lock on a file next to the journal, so only one process (the app
+    # or a command-line batch) runs a folder's jobs. The OS drops the lock
+    # when the process exits, even after a crash, so it never goes stale.
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def acquire(self):
+        if self.file is not None:
+            return True
+        f = open(self.path, 'a+')
+        try:
+            if platform.system() == 'Windows':
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self.file = f
+        return True
+
+    def release(self):
+        if self.file is None:
+            return
+        if platform.system() == 'Windows':
+            try:
+                self.file.seek(0)
+                msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+            except OSError:
+                pass
+        self.file.close()
+        self.file = None
+
+class JobQueue(QObject):
+
+    job_started = pyqtSignal(str)
+    job_progress = pyqtSignal(str, float)
+    job_finished = pyqtSignal(str, str)
+    job_failed = pyqtSignal(str, str)
+    jobs_changed = pyqtSignal()
+
+    JOURNAL_NAME = "jobs.json"
+    LOCK_NAME = "jobs.lock"
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_LOW = 2
+
+    def __init__(self, ffmpeg_path, jobs_folder, max_workers=None, max_retries=2):
+        super().__init__()
+        self.logger = logging.getLogger()
+        self.ffmpeg_path = ffmpeg_path
+        self.jobs_folder = jobs_folder
+        self.journal_path = os.path.join(jobs_folder, self.JOURNAL_NAME)
+        cpu_count = os.cpu_count() or 1
+        self.max_workers = max(1, max_workers or cpu_count // 2)
+        # Each FFmpeg run gets its share of the cores so a full pool does not
+        # oversubscribe the machine.
+        self.threads_per_job = max(1, cpu_count // self.max_workers)
+        self.max_retries = max_retries
+        self.lock = threading.Lock()
+        self.sequence = itertools.count()
+        self.paused = False
+        self.shutting_down = False
+
+        # The pool and the manager behind the progress queue are only started
+        # once there is work, so an idle app spawns no extra processes.
+        self.executor = None
+        self.manager = None
+        self.progress_queue = None
+        self.cancelled = None
+        self.progress_thread = None
+        self.futures = {}
+
+        os.makedirs(self.jobs_folder, exist_ok=True)
+        self.journal_lock = JournalLock(os.path.join(jobs_folder, self.LOCK_NAME))
+        self.jobs = {}
+        # While another process holds the journal, new jobs are only kept in
+        # memory; they are merged into the journal once it is free.
+        self.lock_timer = QTimer(self)
+        self.lock_timer.timeout.connect(self._dispatch)
+        if self.journal_lock.acquire():
+            self.jobs = self._load_journal()
+        else:
+            self.logger.warning(f"Job journal {self.journal_path} is in use by another process, waiting for it")
+            self.lock_timer.start(5000)
+
+    def owns_journal(self):
+        if self.journal_lock.file is not None:
+            return True
+        if not self.journal_lock.acquire():
+            return False
+        self.lock_timer.stop()
+        loaded = self._load_journal()
+        with self.lock:
+            for job_id, job in loaded.items():
+                self.jobs.setdefault(job_id, job)
+        self.logger.info(f"Job journal {self.journal_path} is free again")
+        self._save_journal()
+        self.jobs_changed.emit()
+        return True
+
+    def _load_journal(self):
+        if not os.path.exists(self.journal_path):
+            return {}
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Could not read job journal {self.journal_path}: {e}")
+            return {}
+
+        loaded = {}
+        for job in jobs:
+            if job.get("kind") not in TASKS:
+                continue
+            # A job that was running when the app closed starts over.
+            if job["status"] == "running":
+                job["status"] = "pending"
+            job["progress"] = 0.0
+            job["order"] = next(self.sequence)
+            loaded[job["id"]] = job
+        return loaded
+
+    def _save_journal(self):
+        if self.journal_lock.file is None:
+            return
+        with self.lock:
+            jobs = [dict(job) for job in self.jobs.values() if job["status"] != "done"]
+        temp_path = f"{self.journal_path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(jobs, f, indent=2)
+            os.replace(temp_path, self.journal_path)
+        except OSError as e:
+            self.logger.error(f"Could not write job journal {self.journal_path}: {e}")
+
+    def submit(self, kind, source, target=None, priority=PRIORITY_NORMAL, **params):
+        if kind not in TASKS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self.lock:
+            for job in self.jobs.values():
+                if (job["kind"], job["source"], job["target"]) == (kind, source, target) and job["status"] in ("pending", "running"):
+                    return job["id"]
+            job_id = uuid.uuid4().hex[:12]
+            self.jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "source": source,
+                "target": target,
+                "params": params,
+                "priority": priority,
+                "status": "pending",
+                "attempts": 0,
+                "error": None,
+                "progress": 0.0,
+                "created": time.time(),
+                "order": next(self.sequence),
+            }
+        self._save_journal()
+        self.jobs_changed.emit()
+        self._dispatch()
+        return job_id
+
+    def resume_pending(self):
+        with self.lock:
+            count = sum(1 for job in self.jobs.values() if job["status"] == "pending")
+        if count:
+            self.logger.info(f"Resuming {count} background job(s)")
+        self._dispatch()
+        return count
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in ("pending", "running"):
+                return False
+            if job["status"] == "pending":
+                job["status"] = "cancelled"
+            elif self.cancelled is not None:
+                # The worker polls this flag and stops its FFmpeg process.
+                self.cancelled[job_id] = True
+        self._save_journal()
+        self.jobs_changed.emit()
+        return True
+
+    def retry(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] not in ("failed", "cancelled"):
+                return False
+            job.update(status="pending", attempts=0, error=None, progress=0.0)
+        self._save_journal()
+        self.jobs_changed.emit()
+        self._dispatch()
+        return True
+
+    def remove(self, job_id):
+        # Drops a job that is no longer pending or running from the journal.
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] in ("pending", "running"):
+                return False
+            del self.jobs[job_id]
+        self._save_journal()
+        self.jobs_changed.emit()
+        return True
+
+    def get_jobs(self):
+        with self.lock:
+            jobs = [dict(job) for job in self.jobs.values()]
+        return sorted(jobs, key=lambda job: job["order"])
+
+    def get_job(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def is_busy(self):
+        with self.lock:
+            return any(job["status"] in ("pending", "running") for job in self.jobs.values())
+
+    def has_job(self, source, kind=None):
+        with self.lock:
+            return any(job["source"] == source and (kind is None or job["kind"] == kind)
+                       and job["status"] in ("pending", "running") for job in self.jobs.values())
+
+    def pause(self):
+        # Running jobs finish; no new ones start until resume().
+        with self.lock:
+            self.paused = True
+
+    def resume(self):
+        with self.lock:
+            self.paused = False
+        self._dispatch()
+
+    def _start_pool(self):
+        if self.manager is None:
+            context = multiprocessing.get_context("spawn")
+            self.manager = context.Manager()
+            self.progress_queue = self.manager.Queue()
+            self.cancelled = self.manager.dict()
+            self.progress_thread = threading.Thread(target=self._read_progress, daemon=True)
+            self.progress_thread.start()
+        if self.executor is None:
+            # Spawned workers do not inherit the Qt state of the main process.
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=lower_priority)
+
+    def _dispatch(self):
+        if self.shutting_down or not self.owns_journal():
+            return
+        with self.lock:
+            if self.paused or self.shutting_down:
+                return
+            running = sum(1 for job in self.jobs.values() if job["status"] == "running")
+            pending = sorted((job for job in self.jobs.values() if job["status"] == "pending"),
+                             key=lambda job: (job["priority"], job["order"]))
+            started = pending[:max(0, self.max_workers - running)]
+            if not started:
+                return
+            self._start_pool()
+            for job in started:
+                job["status"] = "running"
+                job["attempts"] += 1
+                job["progress"] = 0.0
+                self.cancelled.pop(job["id"], None)
+                self.futures[job["id"]] = self.executor.submit(run_job, dict(job), self.ffmpeg_path, self.threads_per_job,
+                                                               self.progress_queue, self.cancelled)
+            futures = [(job["id"], self.futures[job["id"]]) for job in started]
+
+        # Callbacks of already finished futures run right away, so they are
+        # attached outside the lock.
+        for job_id, future in futures:
+            future.add_done_callback(partial(self._on_done, job_id))
+        self._save_journal()
+        for job in started:
+            self.logger.info(f"Started {job['kind']} job for {job['source']} (attempt {job['attempts']})")
+            self.job_started.emit(job["id"])
+        self.jobs_changed.emit()
+
+    def _on_done(self, job_id, future):
+        result = None
+        error = None
+        retry = False
+        with self.lock:
+            self.futures.pop(job_id, None)
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            try:
+                result = future.result()
+                job.update(status="done", progress=1.0, error=None, output=result)
+            except JobCancelled:
+                job["status"] = "pending" if self.shutting_down else "cancelled"
+            except BrokenProcessPool as e:
+                # A crashed worker takes the pool down with it; the next
+                # dispatch starts a fresh one.
+                self.executor = None
+                error = f"worker process died: {e}"
+            except Exception as e:
+                error = str(e)
+
+            if error:
+                job["error"] = error
+                if self.shutting_down:
+                    job["status"] = "pending"
+                    error = None
+                elif job["attempts"] <= self.max_retries:
+                    job["status"] = "pending"
+                    retry = True
+                else:
+                    job["status"] = "failed"
+            status = job["status"]
+            kind = job["kind"]
+            source = job["source"]
+
+        self._save_journal()
+        if status == "done":
+            self.logger.info(f"Finished {kind} job for {source}")
+            self.job_finished.emit(job_id, result or "")
+        elif retry:
+            self.logger.warning(f"{kind} job for {source} failed, retrying: {error}")
+        elif status == "failed":
+            self.logger.error(f"{kind} job for {source} failed: {error}")
+            self.job_failed.emit(job_id, error)
+        elif status == "cancelled":
+            self.logger.info(f"Cancelled {kind} job for {source}")
+        self.jobs_changed.emit()
+        self._dispatch()
+
+    def _read_progress(self):
+        while True:
+            try:
+                item = self.progress_queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            job_id, fraction = item
+            with self.lock:
+                job = self.jobs.get(job_id)
+                if job is None or job["status"] != "running":
+                    continue
+                job["progress"] = fraction
+            self.job_progress.emit(job_id, fraction)
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            self.shutting_down = True
+            running = [job_id for job_id, job in self.jobs.items() if job["status"] == "running"]
+            if self.cancelled is not None:
+                for job_id in running:
+                    self.cancelled[job_id] = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=wait, cancel_futures=True)
+        with self.lock:
+            # Anything interrupted here is picked up again on the next start.
+            for job in self.jobs.values():
+                if job["status"] == "running":
+                    job["status"] = "pending"
+        # Jobs added while another process held the journal are only kept if
+        # it has been freed by now.
+        self.owns_journal()
+        self._save_journal()
+        if self.manager is not None:
+            try:
+                self.progress_queue.put(None)
+            except (EOFError, OSError):
+                pass
+            self.manager.shutdown()
+            self.manager = None
+        self.lock_timer.stop()
+        self.journal_lock.release()
@@ -0,0 +1,302 @@
+import collections
+import os
+import platform
+import re
+import subprocess
+import threading
+
+from common import keyframe_index, loudness_normalizer, thumbnails
+from common.subprocess_helper import popen_subprocess, run_subprocess
+
+# This module is imported by the job worker processes, so it must stay free of
+# Qt and of anything that needs the main window.
+
+DURATION = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+STREAM = re.compile(r"Stream #\d+:\d+.*?: (Video|Audio):")
+
+class JobCancelled(Exception):
+    pass
+
+def lower_priority():
+    # Pool initializer: workers and the FFmpeg processes they start yield to
+    # the recorder.
+    if platform.system() != 'Windows':
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+# Encoders that can re-create the partial GOP at a frame-accurate cut in a
+# stream the rest of the file can be copied onto.
+SMART_CUT_ENCODERS = {
+    "h264": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "16"],
+    "hevc": ["-c:v", "libx265", "-preset", "veryfast", "-crf", "18"],
+}
+
+def read_summary(ffmpeg_path, path):
+    result = run_subprocess([ffmpeg_path, "-hide_banner", "-nostdin", "-i", path],
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    return result.stderr
+
+def probe_media(ffmpeg_path, path, summary=None):
+    # Duration and the number of video and audio streams, read from FFmpeg's
+    # input summary so no ffprobe is needed in the workers.
+    summary = summary if summary is not None else read_summary(ffmpeg_path, path)
+    match = DURATION.search(summary)
+    duration = None
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    kinds = STREAM.findall(summary)
+    return duration, kinds.count("Video"), kinds.count("Audio")
+
+def probe_duration(ffmpeg_path, path):
+    return probe_media(ffmpeg_path, path)[0]
+
+def verify_output(ffmpeg_path, source, output):
+    # The new file must hold the same streams and the same length before it
+    # may replace the original.
+    source_duration, source_video, source_audio = probe_media(ffmpeg_path, source)
+    duration, video, audio = probe_media(ffmpeg_path, output)
+    if (video, audio) != (source_video, source_audio):
+        raise RuntimeError(f"stream mismatch: {video} video/{audio} audio, expected {source_video}/{source_audio}")
+    if source_duration is None or duration is None:
+        raise RuntimeError("could not read the duration")
+    if abs(duration - source_duration) > max(0.5, source_duration * 0.005):
+        raise RuntimeError(f"duration mismatch: {duration:.2f} s, expected {source_duration:.2f} s")
+
+def temp_path_for(target, tag="job"):
+    root, ext = os.path.splitext(target)
+    return f"{root}.{tag}{ext}"
+
+def run_ffmpeg(ffmpeg_path, args, job_id, duration, progress, cancelled, cwd=None, stderr_lines=20):
+    cmd = [ffmpeg_path, "-hide_banner", "-nostdin", "-y", "-loglevel", "error",
+           "-nostats", "-progress", "pipe:1"] + args
+    kwargs = dict(stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                  text=True, encoding='utf-8', errors='replace', cwd=cwd)
+    if platform.system() == 'Windows':
+        kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW | subprocess.BELOW_NORMAL_PRIORITY_CLASS
+    process = popen_subprocess(cmd, **kwargs)
+
+    errors = collections.deque(maxlen=stderr_lines)
+    drain = threading.Thread(target=lambda: errors.extend(process.stderr), daemon=True)
+    drain.start()
+
+    for line in process.stdout:
+        if cancelled.get(job_id):
+            process.terminate()
+            process.wait()
+            raise JobCancelled()
+        if duration and line.startswith("out_time_us="):
+            try:
+                seconds = int(line.split("=", 1)[1]) / 1000000
+            except ValueError:
+                continue
+            progress.put((job_id, min(1.0, max(0.0, seconds / duration))))
+
+    process.wait()
+    drain.join(timeout=1)
+    if cancelled.get(job_id):
+        raise JobCancelled()
+    if process.returncode != 0:
+        message = errors[-1].strip() if errors else f"ffmpeg exited with code {process.returncode}"
+        raise RuntimeError(message)
+    return list(errors)
+
+def replace_output(temp_path, target):
+    if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+        raise RuntimeError("ffmpeg produced no output")
+    # The source stays playable until the finished output is moved over it.
+    os.replace(temp_path, target)
+
+def remux(job, ffmpeg_path, threads, progress, cancelled):
+    source = job["source"]
+    target = job.get("target") or f"{os.path.splitext(source)[0]}.mp4"
+    temp_path = temp_path_for(target, "remux")
+    duration = probe_duration(ffmpeg_path, source)
+    # Chapters in MP4 bring a text track that the muxer writes again from the
+    # chapters, so data streams are left out of every rewritten file.
+    try:
+        run_ffmpeg(ffmpeg_path, ["-i", source, "-map", "0", "-map", "-0:d?", "-c", "copy", "-movflags", "+faststart", temp_path],
+                   job["id"], duration, progress, cancelled)
+        replace_output(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if os.path.abspath(target) != os.path.abspath(source) and job.get("params", {}).get("remove_source"):
+        os.remove(source)
+    return target
+
+def validate(job, ffmpeg_path, threads, progress, cancelled):
+    # Reading every packet is enough to catch truncated or corrupt files
+    # without paying for a full decode.
+    source = job["source"]
+    duration = probe_duration(ffmpeg_path, source)
+    if duration is None:
+        raise RuntimeError("not a readable media file")
+    errors = run_ffmpeg(ffmpeg_path, ["-i", source, "-map", "0", "-c", "copy", "-f", "null", "-"],
+                        job["id"], duration, progress, cancelled)
+    if errors:
+        raise RuntimeError(errors[-1].strip())
+    return source
+
+def thumbnail(job, ffmpeg_path, threads, progress, cancelled):
+    # Poster, seek sprites and their WebVTT index, cached in .thumbs/ next to
+    # the recording.
+    source = job["source"]
+    params = job.get("params", {})
+    if thumbnails.is_current(source):
+        return thumbnails.thumbnail_folder(source)
+    duration = probe_duration(ffmpeg_path, source)
+
+    def run(args, cwd):
+        run_ffmpeg(ffmpeg_path, args, job["id"], duration, progress, cancelled, cwd=cwd)
+
+    return thumbnails.generate(source, run, duration,
+                               interval=params.get("interval", 10),
+                               columns=params.get("columns", 10),
+                               rows=params.get("rows", 10),
+                               tile_width=params.get("tile_width", 160))
+
+def transcode(job, ffmpeg_path, threads, progress, cancelled):
+    source = job["source"]
+    target = job["target"]
+    params = job.get("params", {})
+    temp_path = temp_path_for(target, "transcoding")
+    duration = probe_duration(ffmpeg_path, source)
+    source_mtime = os.path.getmtime(source)
+    try:
+        run_ffmpeg(ffmpeg_path, ["-i", source, "-map", "0", "-map", "-0:d?", "-c:a", "copy", "-pix_fmt", "yuv420p"]
+                   + list(params.get("encoder_args", [])) + ["-threads", str(threads), "-movflags", "+faststart", temp_path],
+                   job["id"], duration, progress, cancelled)
+        if params.get("verify"):
+            verify_output(ffmpeg_path, source, temp_path)
+        replace_output(temp_path, target)
+        if params.get("keep_mtime"):
+            # Age-based selection and retention keep seeing the recording's
+            # original date.
+            os.utime(target, (source_mtime, source_mtime))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    if params.get("remove_source") and os.path.abspath(target) != os.path.abspath(source):
+        os.remove(source)
+    return target
+
+def loudnorm(job, ffmpeg_path, threads, progress, cancelled):
+    # Normalizes the recording in place; files without audio (time-lapses,
+    # sessions without audio devices) are left as they are.
+    source = job["source"]
+    params = job.get("params", {})
+    duration, _, audio_streams = probe_media(ffmpeg_path, source)
+    if not audio_streams:
+        return source
+    temp_path = temp_path_for(source, "loudnorm")
+
+    def run(args):
+        return run_ffmpeg(ffmpeg_path, args, job["id"], duration, progress, cancelled, stderr_lines=50)
+
+    try:
+        if loudness_normalizer.normalize(source, temp_path, run,
+                                         target_lufs=params.get("target_lufs", -16.0),
+                                         true_peak=params.get("true_peak", -1.5),
+                                         loudness_range=params.get("loudness_range", 11.0)) is not None:
+            replace_output(temp_path, source)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return source
+
+def write_concat_list(path, entries):
+    # entries: (file, inpoint, outpoint, duration), any of them may be None.
+    # The demuxer places the next file after `duration`, which defaults to
+    # outpoint - inpoint.
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("ffconcat version 1.0\n")
+        for file, inpoint, outpoint, duration in entries:
+            f.write(f"file '{file}'\n")
+            if inpoint is not None:
+                f.write(f"inpoint {inpoint:.6f}\n")
+            if outpoint is not None:
+                f.write(f"outpoint {outpoint:.6f}\n")
+            if duration is not None:
+                f.write(f"duration {duration:.6f}\n")
+
+def trim(job, ffmpeg_path, threads, progress, cancelled):
+    # Cuts by stream copy from a keyframe, found in the cached keyframe index.
+    # With "accurate", only the frames between the requested start and the
+    # next keyframe are re-encoded, and the rest is copied onto them.
+    source = os.path.abspath(job["source"])
+    target = job["target"]
+    params = job.get("params", {})
+    summary = read_summary(ffmpeg_path, source)
+    duration, video_streams, _ = probe_media(ffmpeg_path, source, summary)
+    start_time = keyframe_index.read_start(summary)
+
+    def run(args, cwd):
+        run_ffmpeg(ffmpeg_path, args, job["id"], duration, progress, cancelled, cwd=cwd)
+
+    index = keyframe_index.load(source) or keyframe_index.build(source, run, start_time)
+    keyframes = index["keyframes"]
+    start = max(0.0, float(params.get("start", 0)))
+    end = min(float(params.get("end") or duration or 0), duration or float("inf"))
+    if end <= start:
+        raise RuntimeError("the trim range is empty")
+
+    cut = keyframe_index.keyframe_before(keyframes, start)
+    next_keyframe = keyframe_index.keyframe_after(keyframes, start)
+    smart_cut = (params.get("accurate") and abs(cut - start) > 0.001 and video_streams == 1
+                 and index.get("codec") in SMART_CUT_ENCODERS
+                 and next_keyframe is not None and next_keyframe < end)
+
+    # The concat demuxer seeks straight to its in point; `-ss` would back off
+    # to an earlier keyframe for streams with B-frames.
+    temp_path = temp_path_for(target, "trim")
+    root = os.path.splitext(temp_path)[0]
+    source_ext = os.path.splitext(source)[1]
+    head_path = f"{root}.head{source_ext}"
+    video_list = f"{root}.ffconcat"
+    movflags = ["-movflags", "+faststart"] if target.lower().endswith((".mp4", ".mov")) else []
+    # The new head is muxed like the source, in the same time base, so the
+    # copied packets after it keep their timing.
+    head_args = []
+    if source_ext.lower() in (".mp4", ".mov") and index.get("time_base", [0])[0] == 1:
+        head_args = ["-video_track_timescale", str(index["time_base"][1])]
+    try:
+        if smart_cut:
+            run_ffmpeg(ffmpeg_path, ["-ss", f"{start:.6f}", "-i", source, "-t", f"{next_keyframe - start:.6f}",
+                                     "-map", "0:v:0", "-an", "-sn"] + SMART_CUT_ENCODERS[index["codec"]]
+                       + ["-threads", str(threads)] + head_args + [head_path], job["id"], None, progress, cancelled)
+            # The demuxer converts both parts to Annex B, so the copied GOPs
+            # keep their own in-band parameter sets after the new head.
+            write_concat_list(video_list, [(head_path, None, None, None),
+                                           (source, next_keyframe + start_time, end + start_time, None)])
+            # Audio is cut at the exact start; every audio packet is a keyframe.
+            run_ffmpeg(ffmpeg_path, ["-f", "concat", "-safe", "0", "-i", video_list,
+                                     "-ss", f"{start:.6f}", "-t", f"{end - start:.6f}", "-i", source,
+                                     "-map", "0:v:0", "-map", "1:a?", "-c", "copy", "-copypriorss:a", "0"]
+                       + movflags + [temp_path],
+                       job["id"], end - start, progress, cancelled)
+        else:
+            write_concat_list(video_list, [(source, cut + start_time, end + start_time, None)])
+            run_ffmpeg(ffmpeg_path, ["-f", "concat", "-safe", "0", "-i", video_list,
+                                     "-map", "0", "-map", "-0:d?", "-c", "copy"] + movflags + [temp_path],
+                       job["id"], end - cut, progress, cancelled)
+        replace_output(temp_path, target)
+    finally:
+        for path in (temp_path, head_path, video_list):
+            if os.path.exists(path):
+                os.remove(path)
+    return target
+
+TASKS = {
+    "remux": remux,
+    "validate": validate,
+    "thumbnail": thumbnail,
+    "transcode": transcode,
+    "trim": trim,
+    "loudnorm": loudnorm,
+}
+
+def run_job(job, ffmpeg_path, threads, progress, cancelled):
+    return TASKS[job["kind"]](job, ffmpeg_path, threads, progress, cancelled)
@@ -0,0 +1,87 @@
+import os
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QListWidget, QPushButton
+from PyQt6.QtCore import Qt
+
+class JobsDialog(QDialog):
+    def __init__(self, parent, job_queue):
+        super().__init__(parent)
+        self.recorder = parent
+        self.job_queue = job_queue
+        self.setWindowTitle(parent.t("background_jobs"))
+        self.setMinimumSize(560, 320)
+
+        layout = QVBoxLayout(self)
+
+        self.job_list = QListWidget()
+        self.job_list.itemSelectionChanged.connect(self.update_buttons)
+
+        button_layout = QHBoxLayout()
+        self.cancel_btn = QPushButton(parent.t("cancel_job"))
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        self.retry_btn = QPushButton(parent.t("retry_job"))
+        self.retry_btn.clicked.connect(self.retry_selected)
+        close_btn = QPushButton(parent.t("close"))
+        close_btn.clicked.connect(self.accept)
+        button_layout.addWidget(self.cancel_btn)
+        button_layout.addWidget(self.retry_btn)
+        button_layout.addStretch()
+        button_layout.addWidget(close_btn)
+
+        layout.addWidget(self.job_list)
+        layout.addLayout(button_layout)
+
+        self.job_queue.jobs_changed.connect(self.refresh)
+        self.job_queue.job_progress.connect(self.on_progress)
+        self.refresh()
+
+    def describe(self, job):
+        status = self.recorder.t(f"job_{job['status']}")
+        if job["status"] == "running":
+            status = f"{status} {job['progress'] * 100:.0f}%"
+        text = f"{self.recorder.t('job_kind_' + job['kind'])}: {os.path.basename(job['source'])} ({status})"
+        if job["status"] == "failed" and job.get("error"):
+            text += f" - {job['error']}"
+        return text
+
+    def refresh(self):
+        selected = self.selected_job_id()
+        self.job_list.clear()
+        for job in reversed(self.job_queue.get_jobs()):
+            self.job_list.addItem(self.describe(job))
+            item = self.job_list.item(self.job_list.count() - 1)
+            item.setData(Qt.ItemDataRole.UserRole, job["id"])
+            if job["id"] == selected:
+                item.setSelected(True)
+        self.update_buttons()
+
+    def on_progress(self, job_id, fraction):
+        job = self.job_queue.get_job(job_id)
+        for i in range(self.job_list.count()):
+            item = self.job_list.item(i)
+            if job and item.data(Qt.ItemDataRole.UserRole) == job_id:
+                item.setText(self.describe(job))
+                break
+
+    def selected_job_id(self):
+        items = self.job_list.selectedItems()
+        return items[0].data(Qt.ItemDataRole.UserRole) if items else None
+
+    def update_buttons(self):
+        job = self.job_queue.get_job(self.selected_job_id()) if self.selected_job_id() else None
+        self.cancel_btn.setEnabled(bool(job) and job["status"] in ("pending", "running"))
+        self.retry_btn.setEnabled(bool(job) and job["status"] in ("failed", "cancelled"))
+
+    def cancel_selected(self):
+        job_id = self.selected_job_id()
+        if job_id:
+            self.job_queue.cancel(job_id)
+
+    def retry_selected(self):
+        job_id = self.selected_job_id()
+        if job_id:
+            self.job_queue.retry(job_id)
+
+    def done(self, result):
+        self.job_queue.jobs_changed.disconnect(self.refresh)
+        self.job_queue.job_progress.disconnect(self.on_progress)
+        super().done(result)
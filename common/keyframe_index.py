@@ -0,0 +1,105 @@
+import bisect
+import json
+import os
+import re
+
+# Kept free of Qt: the index is built inside the job worker processes.
+
+INDEX_FOLDER = ".keyframes"
+TIME_BASE = re.compile(r"#tb 0: (\d+)/(\d+)")
+CODEC = re.compile(r"#codec_id 0: (\w+)")
+START = re.compile(r"Duration:.*?, start: (-?\d+(?:\.\d+)?)")
+
+def index_path(video_path):
+    folder, name = os.path.split(os.path.abspath(video_path))
+    return os.path.join(folder, INDEX_FOLDER, f"{name}.json")
+
+def _stamp(video_path):
+    stat = os.stat(video_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def load(video_path):
+    # The cached index, or None when it is missing or the file was rewritten.
+    try:
+        with open(index_path(video_path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        current = _stamp(video_path)
+    except (OSError, ValueError):
+        return None
+    if (index.get("size"), index.get("mtime")) != (current["size"], current["mtime"]):
+        return None
+    return index
+
+def remove_index(video_path):
+    try:
+        os.remove(index_path(video_path))
+    except OSError:
+        pass
+
+def parse_packets(path, start=0.0):
+    # Reads a framecrc listing of the first video stream. Keyframes are the
+    # packets without an "F=" flags column; times are made relative to the
+    # start of the file, like the positions shown in a player. The reorder
+    # delay is how far a keyframe is decoded ahead of being shown (B-frames).
+    keyframes = []
+    delay = 0
+    numerator, denominator = 1, 1000
+    codec = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith("#"):
+                match = TIME_BASE.match(line)
+                if match:
+                    numerator, denominator = int(match.group(1)), int(match.group(2))
+                match = CODEC.match(line)
+                if match:
+                    codec = match.group(1)
+                continue
+            fields = [field.strip() for field in line.split(",")]
+            if len(fields) != 6:
+                continue
+            try:
+                dts, pts = int(fields[1]), int(fields[2])
+            except ValueError:
+                continue
+            keyframes.append(round(pts * numerator / denominator - start, 6))
+            delay = max(delay, pts - dts)
+    keyframes.sort()
+    return codec, [numerator, denominator], keyframes, round(delay * numerator / denominator, 6)
+
+def build(video_path, run, start=0.0):
+    # `run(args, cwd)` runs FFmpeg. Packets are copied to a null hash muxer,
+    # so nothing is decoded and an hour of video is indexed at disk speed.
+    path = index_path(video_path)
+    folder = os.path.dirname(path)
+    os.makedirs(folder, exist_ok=True)
+    stamp = _stamp(video_path)
+    listing = f"{path}.packets"
+    try:
+        run(["-copyts", "-i", os.path.abspath(video_path), "-map", "0:v:0", "-c", "copy", "-f", "framecrc", listing],
+            folder)
+        codec, time_base, keyframes, delay = parse_packets(listing, start)
+    finally:
+        if os.path.exists(listing):
+            os.remove(listing)
+    if not keyframes:
+        raise RuntimeError("no keyframes found")
+
+    index = dict(stamp, codec=codec, time_base=time_base, start=start, keyframes=keyframes, reorder_delay=delay)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(temp_path, path)
+    return index
+
+def read_start(ffmpeg_output):
+    match = START.search(ffmpeg_output)
+    return float(match.group(1)) if match else 0.0
+
+def keyframe_before(keyframes, seconds, tolerance=0.001):
+    i = bisect.bisect_right(keyframes, seconds + tolerance)
+    return keyframes[i - 1] if i else keyframes[0]
+
+def keyframe_after(keyframes, seconds, tolerance=0.001):
+    i = bisect.bisect_left(keyframes, seconds - tolerance)
+    return keyframes[i] if i < len(keyframes) else None
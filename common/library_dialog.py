@@ -0,0 +1,204 @@
+import datetime
+import json
+import os
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QTableWidget, QTableWidgetItem,
+                             QHeaderView, QAbstractItemView, QLabel, QSlider, QPushButton, QMessageBox,
+                             QInputDialog)
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QPixmap
+
+from common import thumbnails
+from common.batch_transcode_dialog import BatchTranscodeDialog
+from common.trim_dialog import TrimDialog
+
+class LibraryDialog(QDialog):
+    COLUMNS = ["library_name", "library_date", "library_duration", "library_resolution",
+               "library_codecs", "library_size", "library_source"]
+
+    def __init__(self, parent, library):
+        super().__init__(parent)
+        self.recorder = parent
+        self.library = library
+        self.setWindowTitle(parent.t("library"))
+        self.setMinimumSize(900, 450)
+
+        layout = QVBoxLayout(self)
+
+        self.search_entry = QLineEdit()
+        self.search_entry.setPlaceholderText(parent.t("library_search"))
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.timeout.connect(self.refresh)
+        self.search_entry.textChanged.connect(lambda: self.search_timer.start(150))
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([parent.t(key) for key in self.COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.cellDoubleClicked.connect(self.open_row)
+        self.table.itemSelectionChanged.connect(self.on_selection_changed)
+
+        self.count_label = QLabel()
+
+        # Skimming: the slider walks the seek sprites of the selected recording.
+        self.selected_path = None
+        self.cues = []
+        self.sprites = {}
+        self.preview_image = QLabel()
+        self.preview_image.setFixedSize(320, 180)
+        self.preview_image.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview_image.setStyleSheet("background-color: black;")
+        self.skim_slider = QSlider(Qt.Orientation.Horizontal)
+        self.skim_slider.setEnabled(False)
+        self.skim_slider.valueChanged.connect(self.show_cue)
+        self.skim_label = QLabel()
+        self.skim_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        preview_layout = QVBoxLayout()
+        preview_layout.addWidget(self.preview_image)
+        preview_layout.addWidget(self.skim_slider)
+        preview_layout.addWidget(self.skim_label)
+        preview_layout.addStretch()
+
+        content_layout = QHBoxLayout()
+        content_layout.addWidget(self.table, 1)
+        content_layout.addLayout(preview_layout)
+
+        layout.addWidget(self.search_entry)
+        layout.addLayout(content_layout)
+        self.restore_btn = QPushButton(parent.t("restore_from_trash"))
+        self.restore_btn.clicked.connect(self.restore_from_trash)
+        footer_layout = QHBoxLayout()
+        footer_layout.addWidget(self.count_label)
+        footer_layout.addStretch()
+        self.trim_btn = QPushButton(parent.t("trim"))
+        self.trim_btn.setEnabled(False)
+        self.trim_btn.clicked.connect(self.show_trim)
+        footer_layout.addWidget(self.trim_btn)
+        self.batch_btn = QPushButton(parent.t("batch_transcode"))
+        self.batch_btn.clicked.connect(self.show_batch_transcode)
+        footer_layout.addWidget(self.batch_btn)
+        footer_layout.addWidget(self.restore_btn)
+        layout.addLayout(footer_layout)
+
+        self.library.refresh_finished.connect(self.refresh)
+        self.recorder.job_queue.job_finished.connect(self.on_job_finished)
+        self.library.refresh_async()
+        self.refresh()
+
+    def format_row(self, row):
+        duration = row["duration"]
+        if duration is not None:
+            duration = f"{int(duration) // 3600:02d}:{int(duration) % 3600 // 60:02d}:{int(duration) % 60:02d}"
+        resolution = f"{row['width']}x{row['height']}" if row["width"] else ""
+        if row["fps"]:
+            resolution += f" @ {row['fps']:.0f}"
+        codecs = " / ".join(codec for codec in (row["video_codec"], row["audio_codec"]) if codec)
+        if row["probe_error"]:
+            codecs = row["probe_error"]
+        devices = ", ".join(json.loads(row["devices"] or "[]"))
+        source = " - ".join(part for part in (row["monitor"], devices) if part)
+        created = datetime.datetime.fromtimestamp(row["created"]).strftime("%Y-%m-%d %H:%M") if row["created"] else ""
+        return [row["name"], created, duration or "", resolution, codecs,
+                f"{row['size'] / (1024 * 1024):.1f} MB", source]
+
+    def refresh(self):
+        rows = self.library.query(self.search_entry.text().strip() or None)
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            for column, text in enumerate(self.format_row(row)):
+                item = QTableWidgetItem(text)
+                item.setData(Qt.ItemDataRole.UserRole, row["path"])
+                self.table.setItem(i, column, item)
+        self.table.resizeColumnsToContents()
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.count_label.setText(self.recorder.t("library_count").format(shown=len(rows), total=self.library.count()))
+
+    def open_row(self, row, column):
+        item = self.table.item(row, 0)
+        if item:
+            self.recorder.open_file(item.data(Qt.ItemDataRole.UserRole))
+
+    def show_trim(self):
+        row = self.library.get(self.selected_path) if self.selected_path else None
+        if not row:
+            return
+        # The trim starts where the user stopped skimming.
+        start = self.cues[self.skim_slider.value()][0] if self.cues else 0.0
+        if TrimDialog(self.recorder, self.selected_path, row["duration"], start).exec():
+            self.recorder.show_jobs()
+
+    def show_batch_transcode(self):
+        if BatchTranscodeDialog(self.recorder, self.library).exec():
+            self.recorder.show_jobs()
+
+    def restore_from_trash(self):
+        storage_manager = self.recorder.storage_manager
+        entries = storage_manager.trashed()
+        if not entries:
+            QMessageBox.information(self, self.recorder.t("library"), self.recorder.t("trash_empty"))
+            return
+        labels = [f"{os.path.basename(entry['original'])} ({self.recorder.t('trash_reason_' + entry['reason'])})"
+                  for entry in reversed(entries)]
+        label, ok = QInputDialog.getItem(self, self.recorder.t("restore_from_trash"),
+                                         self.recorder.t("restore_from_trash"), labels, 0, False)
+        if ok:
+            entry = list(reversed(entries))[labels.index(label)]
+            storage_manager.restore(entry["name"])
+            self.library.refresh_async()
+
+    def on_selection_changed(self):
+        items = self.table.selectedItems()
+        path = items[0].data(Qt.ItemDataRole.UserRole) if items else None
+        self.trim_btn.setEnabled(bool(path))
+        if path != self.selected_path:
+            self.selected_path = path
+            self.load_thumbnails()
+
+    def load_thumbnails(self):
+        self.cues = []
+        self.sprites = {}
+        self.preview_image.clear()
+        self.skim_label.clear()
+        self.skim_slider.setEnabled(False)
+        if not self.selected_path:
+            return
+
+        if not thumbnails.is_current(self.selected_path):
+            self.recorder.request_thumbnails(self.selected_path)
+            self.skim_label.setText(self.recorder.t("library_generating_thumbnails"))
+            return
+
+        self.cues = thumbnails.load_cues(self.selected_path)
+        poster = thumbnails.get_poster(self.selected_path)
+        if poster:
+            self.preview_image.setPixmap(QPixmap(poster).scaled(
+                self.preview_image.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        if self.cues:
+            self.skim_slider.blockSignals(True)
+            self.skim_slider.setRange(0, len(self.cues) - 1)
+            self.skim_slider.setValue(0)
+            self.skim_slider.blockSignals(False)
+            self.skim_slider.setEnabled(True)
+
+    def show_cue(self, index):
+        if not 0 <= index < len(self.cues):
+            return
+        start, end, sprite_path, (x, y, width, height) = self.cues[index]
+        if sprite_path not in self.sprites:
+            self.sprites[sprite_path] = QPixmap(sprite_path)
+        frame = self.sprites[sprite_path].copy(x, y, width, height)
+        self.preview_image.setPixmap(frame.scaled(
+            self.preview_image.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
+        self.skim_label.setText(thumbnails.format_vtt_time(start).split(".")[0])
+
+    def on_job_finished(self, job_id, output):
+        if self.selected_path and output == thumbnails.thumbnail_folder(self.selected_path):
+            self.load_thumbnails()
+
+    def done(self, result):
+        self.library.refresh_finished.disconnect(self.refresh)
+        self.recorder.job_queue.job_finished.disconnect(self.on_job_finished)
+        super().done(result)
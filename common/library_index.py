@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from common import keyframe_index, thumbnails
+from common.subprocess_helper import run_subprocess
+
+MEDIA_EXTENSIONS = (".mp4", ".mkv", ".mov", ".webm")
+# Temporary outputs of the post-processing steps, replaced when they finish.
+TEMP_MARKERS = (".job.", ".remux.", ".thumb.", ".transcoding.", ".loudnorm.", ".trim.")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT -1,
+    mtime REAL NOT NULL DEFAULT -1,
+    created REAL,
+    duration REAL,
+    width INTEGER,
+    height INTEGER,
+    fps REAL,
+    video_codec TEXT,
+    audio_codec TEXT,
+    video_streams INTEGER,
+    audio_streams INTEGER,
+    bitrate INTEGER,
+    capture_mode TEXT,
+    monitor TEXT,
+    devices TEXT,
+    probe_error TEXT,
+    indexed REAL
+);
+CREATE INDEX IF NOT EXISTS recordings_created ON recordings(created);
+CREATE INDEX IF NOT EXISTS recordings_name ON recordings(name);
+"""
+
+PROBE_COLUMNS = ("duration", "width", "height", "fps", "video_codec", "audio_codec",
+                 "video_streams", "audio_streams", "bitrate", "probe_error")
+
+def is_media_file(name):
+    lower = name.lower()
+    return (lower.endswith(MEDIA_EXTENSIONS) and not lower.startswith(".")
+            and not any(marker in lower for marker in TEMP_MARKERS))
+
+def _parse_rate(rate):
+    try:
+        numerator, denominator = (rate or "0/1").split("/")
+        return float(numerator) / float(denominator) if float(denominator) else None
+    except ValueError:
+        return None
+
+def probe_file(ffprobe_path, path):
+    result = run_subprocess([ffprobe_path, "-v", "error", "-print_format", "json",
+                             "-show_format", "-show_streams", path],
+                            capture_output=True, text=True, encoding='utf-8', errors='replace')
+    if result.returncode != 0:
+        message = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "ffprobe failed"
+        return {"probe_error": message}
+
+    data = json.loads(result.stdout or "{}")
+    streams = data.get("streams", [])
+    video = [stream for stream in streams if stream.get("codec_type") == "video"]
+    audio = [stream for stream in streams if stream.get("codec_type") == "audio"]
+    fmt = data.get("format", {})
+
+    def number(value, kind=float):
+        try:
+            return kind(value)
+        except (TypeError, ValueError):
+            return None
+
+    return {
+        "duration": number(fmt.get("duration")),
+        "width": video[0].get("width") if video else None,
+        "height": video[0].get("height") if video else None,
+        "fps": _parse_rate(video[0].get("avg_frame_rate")) if video else None,
+        "video_codec": video[0].get("codec_name") if video else None,
+        "audio_codec": audio[0].get("codec_name") if audio else None,
+        "video_streams": len(video),
+        "audio_streams": len(audio),
+        "bitrate": number(fmt.get("bit_rate"), int),
+        "probe_error": None,
+    }
+
+
+class LibraryIndex(QObject):
+
+    refresh_finished = pyqtSignal(int, int)
+    files_changed = pyqtSignal(list)
+
+    BATCH_SIZE = 200
+
+    def __init__(self, ffprobe_path, folder, database_path=None, max_workers=4):
+        super().__init__()
+        self.logger = logging.getLogger()
+        self.ffprobe_path = ffprobe_path
+        self.folder = folder
+        self.database_path = database_path or os.path.join(folder, ".library.db")
+        self.max_workers = max(1, max_workers)
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.refresh_thread = None
+        # Guards the flags below, which hand requests made during a refresh
+        # on to one more pass instead of dropping them.
+        self.state_lock = threading.Lock()
+        self.refreshing = False
+        self.refresh_pending = False
+        self.closing = False
+
+        self.connection = sqlite3.connect(self.database_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.executescript(SCHEMA)
+
+    def close(self, wait=True):
+        # Without waiting, a running refresh stops after its current batch
+        # and closes the database itself.
+        with self.state_lock:
+            self.closing = True
+            self.refresh_pending = False
+            if self.refreshing and not wait:
+                return
+        if self.refresh_thread:
+            self.refresh_thread.join()
+        self._close_connection()
+
+    def _close_connection(self):
+        with self.lock:
+            self.connection.close()
+
+    def set_source(self, path, capture_mode=None, monitor=None, devices=None):
+        # What was recorded is only known at recording time, so it is stored
+        # next to the probed data and kept across re-indexing.
+        path = os.path.abspath(path)
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO recordings (path, name, capture_mode, monitor, devices) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(path) DO UPDATE SET capture_mode=excluded.capture_mode, "
+                "monitor=excluded.monitor, devices=excluded.devices",
+                (path, os.path.basename(path), capture_mode, monitor, json.dumps(devices or []))
+            )
+
+    def scan(self):
+        files = {}
+        try:
+            entries = list(os.scandir(self.folder))
+        except OSError as e:
+            self.logger.error(f"Could not list {self.folder}: {e}")
+            return files
+        for entry in entries:
+            if entry.is_file() and is_media_file(entry.name):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files[os.path.abspath(entry.path)] = stat
+        return files
+
+    def refresh(self):
+        # Only files that are new or whose size or mtime changed are probed;
+        # everything else is a single stat compared against the index.
+        with self.refresh_lock:
+            started = time.monotonic()
+            files = self.scan()
+            with self.lock:
+                known = {row["path"]: (row["size"], row["mtime"])
+                         for row in self.connection.execute("SELECT path, size, mtime FROM recordings")}
+
+            changed = [path for path, stat in files.items() if known.get(path) != (stat.st_size, stat.st_mtime)]
+            # Rows that were never indexed belong to recordings that are still
+            # being compressed and are kept until their file shows up.
+            removed = [path for path, (size, mtime) in known.items() if path not in files and size >= 0]
+
+            columns = ", ".join(PROBE_COLUMNS)
+            placeholders = ", ".join("?" for _ in PROBE_COLUMNS)
+            updates = ", ".join(f"{column}=excluded.{column}" for column in
+                                ("name", "size", "mtime", "created", "indexed") + PROBE_COLUMNS)
+            insert = (f"INSERT INTO recordings (path, name, size, mtime, created, indexed, {columns}) "
+                      f"VALUES (?, ?, ?, ?, ?, ?, {placeholders}) ON CONFLICT(path) DO UPDATE SET {updates}")
+
+            # Results are committed in batches so an interrupted first index of
+            # a large folder does not have to start over.
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ffprobe") as executor:
+                for start in range(0, len(changed), self.BATCH_SIZE):
+                    if self.closing:
+                        return [], []
+                    batch = changed[start:start + self.BATCH_SIZE]
+                    now = time.time()
+                    rows = []
+                    for path, metadata in zip(batch, executor.map(self._probe, batch)):
+                        stat = files[path]
+                        created = getattr(stat, "st_birthtime", None) or (stat.st_ctime if os.name == "nt" else stat.st_mtime)
+                        rows.append((path, os.path.basename(path), stat.st_size, stat.st_mtime, created, now)
+                                    + tuple(metadata.get(column) for column in PROBE_COLUMNS))
+                    with self.lock, self.connection:
+                        self.connection.executemany(insert, rows)
+
+            if self.closing:
+                return [], []
+            with self.lock, self.connection:
+                self.connection.executemany("DELETE FROM recordings WHERE path = ?", [(path,) for path in removed])
+            for path in removed:
+                thumbnails.remove_thumbnails(path)
+                keyframe_index.remove_index(path)
+
+            self.logger.info(f"Library index: {len(files)} file(s), {len(changed)} probed, "
+                             f"{len(removed)} removed in {time.monotonic() - started:.2f}s")
+        return changed, removed
+
+    def refresh_async(self):
+        # A request made while a refresh runs may be about files that pass
+        # has already scanned, so it is answered by one more pass.
+        with self.state_lock:
+            if self.closing:
+                return False
+            if self.refreshing:
+                self.refresh_pending = True
+                return False
+            self.refreshing = True
+
+        def run():
+            while True:
+                try:
+                    changed, removed = self.refresh()
+                except Exception as e:
+                    self.logger.error(f"Error refreshing library index: {e}")
+                    changed, removed = None, None
+                if changed is not None and not self.closing:
+                    if changed:
+                        self.files_changed.emit(changed)
+                    self.refresh_finished.emit(len(changed), len(removed))
+                with self.state_lock:
+                    if self.refresh_pending and not self.closing:
+                        self.refresh_pending = False
+                        continue
+                    self.refreshing = False
+                    closing = self.closing
+                break
+            if closing:
+                self._close_connection()
+
+        self.refresh_thread = threading.Thread(target=run, daemon=True)
+        self.refresh_thread.start()
+        return True
+
+    def _probe(self, path):
+        try:
+            return probe_file(self.ffprobe_path, path)
+        except (OSError, ValueError) as e:
+            return {"probe_error": str(e)}
+
+    def query(self, text=None, limit=500, offset=0):
+        sql = "SELECT * FROM recordings WHERE size >= 0"
+        params = []
+        if text:
+            sql += " AND (name LIKE ? OR monitor LIKE ? OR devices LIKE ? OR video_codec LIKE ?)"
+            pattern = f"%{text}%"
+            params.extend([pattern] * 4)
+        sql += " ORDER BY created DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def select(self, codecs=None, older_than=None, min_size=0):
+        sql = "SELECT * FROM recordings WHERE size >= ?"
+        params = [min_size]
+        if codecs:
+            sql += f" AND video_codec IN ({', '.join('?' for _ in codecs)})"
+            params.extend(codecs)
+        if older_than:
+            sql += " AND mtime < ?"
+            params.append(older_than)
+        sql += " ORDER BY mtime"
+        with self.lock:
+            return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM recordings WHERE size >= 0").fetchone()[0]
+
+    def get(self, path):
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM recordings WHERE path = ?",
+                                          (os.path.abspath(path),)).fetchone()
+        return dict(row) if row else None
@@ -0,0 +1,54 @@
+import json
+
+# Kept free of Qt: normalization runs as a job in the worker processes.
+
+def loudnorm_filter(target_lufs=-16.0, true_peak=-1.5, loudness_range=11.0, measured=None):
+    loudnorm = f"loudnorm=I={target_lufs}:TP={true_peak}:LRA={loudness_range}"
+    if measured is None:
+        return f"{loudnorm}:print_format=json"
+
+    return (f"{loudnorm}"
+            f":measured_I={measured['input_i']}"
+            f":measured_TP={measured['input_tp']}"
+            f":measured_LRA={measured['input_lra']}"
+            f":measured_thresh={measured['input_thresh']}"
+            f":offset={measured['target_offset']}"
+            f":linear=true:print_format=summary")
+
+def parse_measurement(lines):
+    # The first pass prints its measurement as a JSON block at the end of
+    # FFmpeg's output.
+    text = "\n".join(lines)
+    start = text.rfind("{")
+    end = text.rfind("}")
+    if start == -1 or end < start:
+        return None
+    return json.loads(text[start:end + 1])
+
+def normalize(video_path, temp_path, run, target_lufs=-16.0, true_peak=-1.5, loudness_range=11.0):
+    # Two passes: the first measures the whole recording, the second applies
+    # one linear gain from that measurement. `run(args)` runs FFmpeg and
+    # returns the last lines of its output. Returns the measured loudness, or
+    # None when nothing was changed.
+    targets = dict(target_lufs=target_lufs, true_peak=true_peak, loudness_range=loudness_range)
+    lines = run(["-loglevel", "info", "-i", video_path, "-map", "0:a:0", "-vn",
+                 "-af", loudnorm_filter(**targets), "-f", "null", "-"])
+    measured = parse_measurement(lines)
+    if measured is None:
+        raise RuntimeError("loudness measurement failed")
+    input_i = float(measured["input_i"])
+    if input_i < -70.0:
+        # Silent recording.
+        return None
+
+    run(["-i", video_path,
+         "-map", "0",
+         "-map", "-0:d?",
+         "-c", "copy",
+         "-af", loudnorm_filter(measured=measured, **targets),
+         "-c:a", "aac",
+         "-b:a", "128k",
+         "-ar", "48000",
+         "-movflags", "+faststart",
+         temp_path])
+    return input_i
@@ -0,0 +1,184 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+from common import idle_detector
+
+MARKERS_FOLDER = ".markers"
+
+def escape_metadata(text):
+    # FFMETADATA treats these as syntax unless escaped with a backslash.
+    for char in ("\\", "=", ";", "#", "\n"):
+        text = text.replace(char, f"\\{char}")
+    return text
+
+def format_duration(seconds):
+    minutes, seconds = divmod(round(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def load_journal(path):
+    markers = []
+    parts = []
+    idle = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash.
+                    continue
+                if entry.get("type") == "marker":
+                    markers.append(entry)
+                elif entry.get("type") == "part":
+                    parts.append(entry)
+                elif entry.get("type") == "idle":
+                    idle.append(entry)
+    except OSError:
+        pass
+    return markers, parts, idle
+
+def build_chapters(markers, parts, durations, start_title="Start", cuts=(), skipped_title=None):
+    # Marker times are media time within the FFmpeg process that wrote them.
+    # A process may have written several files (segments), and the joined
+    # file places every file after the previous ones, so each process starts
+    # at the total duration of the files written before it.
+    offsets = {}
+    index = 0
+    position = 0.0
+    for part in parts:
+        offsets[part["part"]] = position
+        position += sum(durations[index:index + part["files"]])
+        index += part["files"]
+    total = sum(durations)
+
+    times = []
+    for marker in markers:
+        if marker["part"] not in offsets:
+            continue
+        seconds = min(total, offsets[marker["part"]] + max(0.0, marker["time"]))
+        times.append((seconds, marker["title"]))
+    # Idle stretches cut from the joined file move everything after them
+    # earlier; each cut gets a chapter where the recording picks up again.
+    if cuts:
+        times = [(idle_detector.map_time(seconds, cuts), title) for seconds, title in times]
+        if skipped_title:
+            times += [(idle_detector.map_time(end, cuts), skipped_title.format(duration=format_duration(end - start)))
+                      for start, end in cuts if end < total]
+        total = idle_detector.map_time(total, cuts)
+    times.sort(key=lambda item: item[0])
+    if not times:
+        return []
+    if times[0][0] > 0.5:
+        times.insert(0, (0.0, start_title))
+
+    chapters = []
+    for i, (start, title) in enumerate(times):
+        end = times[i + 1][0] if i + 1 < len(times) else total
+        if end - start >= 0.001:
+            chapters.append((start, end, title))
+    return chapters
+
+def write_ffmetadata(path, chapters):
+    lines = [";FFMETADATA1"]
+    for start, end, title in chapters:
+        lines += ["[CHAPTER]", "TIMEBASE=1/1000", f"START={round(start * 1000)}", f"END={round(end * 1000)}",
+                  f"title={escape_metadata(title)}"]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
+
+
+class MarkerJournal:
+    # Markers are appended to a journal file and synced as they are made, so
+    # they outlive a crash of the app or of FFmpeg. The journal is only
+    # removed once the joined recording carries them as chapters.
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+        self.lock = threading.Lock()
+        self.path = None
+        self.count = 0
+        self.idle_count = 0
+
+    def start(self, folder):
+        with self.lock:
+            os.makedirs(os.path.join(folder, MARKERS_FOLDER), exist_ok=True)
+            name = f"session-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl"
+            self.path = os.path.join(folder, MARKERS_FOLDER, name)
+            self.count = 0
+            self.idle_count = 0
+
+    def _append(self, entry):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def add(self, part, seconds, title=None):
+        with self.lock:
+            if not self.path:
+                return None
+            self.count += 1
+            entry = {"type": "marker", "part": part, "time": round(seconds, 3),
+                     "title": title or f"Marker {self.count}", "wall": time.time()}
+            self._append(entry)
+        self.logger.info(f"Marker '{entry['title']}' at {seconds:.3f} s of part {part}")
+        return entry
+
+    def end_part(self, part, files):
+        # Called when an FFmpeg process has finished, with the number of
+        # files it left behind.
+        with self.lock:
+            if self.path:
+                self._append({"type": "part", "part": part, "files": files})
+
+    def add_idle(self, part, source, start, end):
+        # A stretch where the screen ("screen") or the sound ("audio") did not
+        # change, in media time of the part; end is None when it ran to the
+        # end of the part.
+        with self.lock:
+            if self.path:
+                self.idle_count += 1
+                self._append({"type": "idle", "part": part, "source": source, "start": round(start, 3),
+                              "end": None if end is None else round(end, 3)})
+
+    def has_markers(self):
+        with self.lock:
+            return self.count > 0
+
+    def has_idle(self):
+        with self.lock:
+            return self.idle_count > 0
+
+    def idle_intervals(self, durations):
+        with self.lock:
+            if not self.path:
+                return []
+            _, parts, idle = load_journal(self.path)
+        return idle_detector.idle_intervals(idle, parts, durations)
+
+    def write_chapters(self, path, durations, start_title="Start", cuts=(), skipped_title=None):
+        with self.lock:
+            if not self.path:
+                return None
+            markers, parts, _ = load_journal(self.path)
+        chapters = build_chapters(markers, parts, durations, start_title, cuts, skipped_title)
+        if not chapters:
+            return None
+        write_ffmetadata(path, chapters)
+        return path
+
+    def finish(self, keep=False):
+        with self.lock:
+            if self.path and not keep:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+            self.path = None
+            self.count = 0
+            self.idle_count = 0
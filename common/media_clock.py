@@ -0,0 +1,55 @@
+import re
+import threading
+import time
+
+PROGRESS_TIME = re.compile(r"time=\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+def parse_progress_time(line):
+    match = PROGRESS_TIME.search(line)
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+class MediaClock:
+    # Maps the wall clock onto the recording's media time, the t seen by the
+    # filters, so input events can be placed on the video timeline.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = None
+        self.origin = None
+
+    def start(self):
+        with self.lock:
+            self.started = time.monotonic()
+            self.origin = self.started
+
+    def stop(self):
+        with self.lock:
+            self.started = None
+            self.origin = None
+
+    def sync(self, media_seconds):
+        # FFmpeg reports progress after encoding, so every report puts the
+        # origin a little late; the earliest one is the best estimate. It can
+        # never be earlier than the moment the process was started.
+        now = time.monotonic()
+        with self.lock:
+            if self.started is None:
+                return
+            candidate = now - media_seconds
+            if self.origin == self.started or candidate < self.origin:
+                self.origin = max(self.started, candidate)
+
+    def sync_from_line(self, line):
+        media_seconds = parse_progress_time(line)
+        if media_seconds is not None and media_seconds > 0:
+            self.sync(media_seconds)
+
+    def now(self):
+        with self.lock:
+            if self.origin is None:
+                return 0.0
+            return max(0.0, time.monotonic() - self.origin)
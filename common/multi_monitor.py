@@ -0,0 +1,42 @@
+import os
+
+def monitor_bounds(monitors):
+    left = min(monitor.x for monitor in monitors)
+    top = min(monitor.y for monitor in monitors)
+    right = max(monitor.x + monitor.width for monitor in monitors)
+    bottom = max(monitor.y + monitor.height for monitor in monitors)
+    return left, top, right - left, bottom - top
+
+def balance_encoder_threads(monitors, total_threads=None):
+    # Give each encoder a share of the CPU proportional to the pixels it has
+    # to encode, so one large monitor does not starve the others.
+    total_threads = total_threads or os.cpu_count() or 1
+    areas = [monitor.width * monitor.height for monitor in monitors]
+    total_area = sum(areas) or 1
+    return [max(1, round(total_threads * area / total_area)) for area in areas]
+
+def build_monitor_graph(monitors, stream_filter=None, input_label="0:v"):
+    # The desktop is grabbed once as a single bounding box (one X connection or
+    # one GDI grabber) and split into one cropped stream per monitor.
+    left, top, _, _ = monitor_bounds(monitors)
+    labels = [f"mon{i}" for i in range(len(monitors))]
+    filters = [f"[{input_label}]split={len(monitors)}" + "".join(f"[{label}src]" for label in labels)]
+
+    for label, monitor in zip(labels, monitors):
+        width = monitor.width - monitor.width % 2
+        height = monitor.height - monitor.height % 2
+        chain = [f"crop={width}:{height}:{monitor.x - left}:{monitor.y - top}"]
+        extra = stream_filter(width, height) if stream_filter else None
+        if extra:
+            chain.append(extra)
+        filters.append(f"[{label}src]{','.join(chain)}[{label}]")
+
+    return ";".join(filters), [f"[{label}]" for label in labels]
+
+def build_monitor_outputs(monitors, labels, total_threads=None):
+    args = []
+    for label in labels:
+        args.extend(["-map", label])
+    for i, threads in enumerate(balance_encoder_threads(monitors, total_threads)):
+        args.extend([f"-threads:v:{i}", str(threads)])
+    return args
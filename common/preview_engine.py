@@ -0,0 +1,267 @@
+import logging
+import threading
+import time
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter
+import mss
+import numpy as np
+import cv2
+
+class PreviewEngine(QObject):
+
+    frame_ready = pyqtSignal()
+
+    SIGNATURE_WIDTH = 240
+    # Largest per-channel difference of the signature that still counts as
+    # the same picture.
+    CHANGE_THRESHOLD = 2
+
+    def __init__(self, max_fps=30, idle_fps=2):
+        super().__init__()
+        self.logger = logging.getLogger()
+        self.min_interval = 1 / max(1, max_fps)
+        self.max_interval = 1 / max(0.1, idle_fps)
+        self.interval = self.min_interval
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.worker_thread = None
+        self.active = False
+
+        self.stream = None
+        self.stream_size = None
+        self.stream_thread = None
+
+        self.monitor_index = 0
+        self.record_area = None
+        self.region = None
+        self.target_size = (170, 90)
+
+        # Three buffers so the worker never writes into the frame that is
+        # published or the one the GUI is still painting.
+        self.buffers = [None, None, None]
+        self.latest_index = None
+        self.displayed_index = None
+        self.frame_pending = False
+
+        self.last_signature = None
+        self.last_key = None
+        self.rendered_frames = 0
+        self.skipped_frames = 0
+
+    def set_source(self, monitor_index, record_area, region=None):
+        with self.lock:
+            self.monitor_index = monitor_index
+            self.record_area = record_area
+            self.region = region
+
+    def set_target_size(self, width, height):
+        with self.lock:
+            self.target_size = (max(2, width), max(2, height))
+
+    def is_running(self):
+        return self.worker_thread is not None and self.worker_thread.is_alive()
+
+    def start(self):
+        self.active = True
+        if self.is_running():
+            return
+
+        self.stop_event.clear()
+        self.worker_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self.worker_thread.start()
+
+    def stop(self):
+        self.active = False
+        self.stop_event.set()
+        if self.worker_thread and self.worker_thread.is_alive():
+            self.worker_thread.join(timeout=1)
+        self.worker_thread = None
+
+        with self.lock:
+            self.latest_index = None
+            self.frame_pending = False
+        self.last_signature = None
+
+    def stats(self):
+        return {
+            "rendered_frames": self.rendered_frames,
+            "skipped_frames": self.skipped_frames,
+            "interval_ms": round(self.interval * 1000),
+        }
+
+    def _frame_changed(self, frame, key):
+        # An area-averaged thumbnail of the whole frame: every row counts, so
+        # a caret or a typed character still moves its cell by far more than
+        # the threshold. Shrinking by a whole factor keeps INTER_AREA on its
+        # fast path; the few edge pixels it drops are cropped off.
+        height, width = frame.shape[:2]
+        step = max(1, width // self.SIGNATURE_WIDTH)
+        frame = frame[:height - height % step, :width - width % step]
+        signature = cv2.resize(frame, (frame.shape[1] // step, frame.shape[0] // step), interpolation=cv2.INTER_AREA)
+        changed = (key != self.last_key or self.last_signature is None
+                   or cv2.absdiff(signature, self.last_signature).max() > self.CHANGE_THRESHOLD)
+        self.last_signature = signature
+        self.last_key = key
+
+        if changed:
+            self.rendered_frames += 1
+            self.interval = self.min_interval
+        else:
+            self.skipped_frames += 1
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        return changed
+
+    def take_frame(self):
+        with self.lock:
+            self.frame_pending = False
+            if self.latest_index is None:
+                return None, None
+
+            self.displayed_index = self.latest_index
+            self.latest_index = None
+            buffer = self.buffers[self.displayed_index]
+
+        height, width = buffer.shape[:2]
+        image = QImage(buffer.data, width, height, buffer.strides[0], QImage.Format.Format_RGB32)
+        return image, buffer
+
+    def attach_stream(self, stream, width, height):
+        # Frames come from the recording FFmpeg process as raw BGRA at a fixed
+        # size, so the grabber pauses until the stream ends.
+        self.stream = stream
+        self.stream_size = (width, height)
+        self.stream_thread = threading.Thread(target=self._stream_loop, args=(stream, width, height), daemon=True)
+        self.stream_thread.start()
+
+    def detach_stream(self):
+        self.stream = None
+        self.stream_size = None
+
+    def is_streaming(self):
+        return self.stream is not None
+
+    def _stream_loop(self, stream, width, height):
+        frame_bytes = width * height * 4
+        try:
+            while True:
+                index, buffer = self._acquire_buffer(width, height)
+                view = memoryview(buffer).cast('B')
+                received = 0
+                while received < frame_bytes:
+                    count = stream.readinto(view[received:])
+                    if not count:
+                        return
+                    received += count
+
+                if self.active and self.stream is stream and self._frame_changed(buffer, self.stream_size):
+                    self._publish(index)
+        except (ValueError, OSError):
+            pass
+        except Exception as e:
+            self.logger.error(f"Error reading preview stream: {e}")
+        finally:
+            if self.stream is stream:
+                self.detach_stream()
+
+    def _resolve_region(self, sct, monitor_index, record_area, region=None):
+        if region:
+            return region
+        if monitor_index < len(sct.monitors) - 1:
+            monitor = sct.monitors[monitor_index + 1]
+            if record_area:
+                x1, y1, x2, y2 = record_area
+                return {
+                    "left": x1 + monitor["left"],
+                    "top": y1 + monitor["top"],
+                    "width": x2 - x1,
+                    "height": y2 - y1
+                }
+            return monitor
+        return sct.monitors[0]
+
+    @staticmethod
+    def _fit(source_width, source_height, max_width, max_height):
+        scale = min(max_width / source_width, max_height / source_height)
+        return max(2, int(source_width * scale)), max(2, int(source_height * scale))
+
+    def _acquire_buffer(self, width, height):
+        with self.lock:
+            busy = {self.latest_index, self.displayed_index}
+        index = next(i for i in range(len(self.buffers)) if i not in busy)
+
+        buffer = self.buffers[index]
+        if buffer is None or buffer.shape[0] != height or buffer.shape[1] != width:
+            buffer = np.empty((height, width, 4), dtype=np.uint8)
+            self.buffers[index] = buffer
+        return index, buffer
+
+    def _publish(self, index):
+        with self.lock:
+            self.latest_index = index
+            notify = not self.frame_pending
+            self.frame_pending = True
+
+        if notify:
+            self.frame_ready.emit()
+
+    def _capture_loop(self):
+        try:
+            with mss.mss() as sct:
+                while not self.stop_event.is_set():
+                    started = time.perf_counter()
+
+                    if self.stream is not None:
+                        self.stop_event.wait(self.max_interval)
+                        continue
+
+                    with self.lock:
+                        monitor_index = self.monitor_index
+                        record_area = self.record_area
+                        source_region = self.region
+                        max_width, max_height = self.target_size
+
+                    region = self._resolve_region(sct, monitor_index, record_area, source_region)
+                    if region["width"] > 0 and region["height"] > 0:
+                        frame = np.asarray(sct.grab(region))
+                        key = (region["left"], region["top"], region["width"], region["height"], max_width, max_height)
+
+                        if self._frame_changed(frame, key):
+                            width, height = self._fit(frame.shape[1], frame.shape[0], max_width, max_height)
+                            index, buffer = self._acquire_buffer(width, height)
+                            cv2.resize(frame, (width, height), dst=buffer, interpolation=cv2.INTER_LINEAR)
+                            self._publish(index)
+
+                    elapsed = time.perf_counter() - started
+                    self.stop_event.wait(max(0.0, self.interval - elapsed))
+        except Exception as e:
+            self.logger.error(f"Error in preview: {e}")
+
+
+class PreviewCanvas(QLabel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.frame = None
+        self.frame_buffer = None
+
+    def set_frame(self, image, buffer):
+        # Keep the numpy buffer alive for as long as the QImage points into it.
+        self.frame = image
+        self.frame_buffer = buffer
+        self.update()
+
+    def clear(self):
+        self.frame = None
+        self.frame_buffer = None
+        super().clear()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.frame is None:
+            return
+
+        painter = QPainter(self)
+        x = (self.width() - self.frame.width()) // 2
+        y = (self.height() - self.frame.height()) // 2
+        painter.drawImage(x, y, self.frame)
+        painter.end()
@@ -0,0 +1,116 @@
+import logging
+import threading
+
+class CaptureQueueTuner:
+
+    AUDIO_PACKETS_PER_SECOND = 50
+    AUDIO_PACKET_BYTES = 4096
+    REFERENCE_LOAD = 1920 * 1080 * 30
+
+    QUEUE_EVENTS = (
+        "video_queue_blocking",
+        "audio_queue_blocking",
+        "muxing_queue_overflow",
+        "realtime_buffer_overflow",
+    )
+
+    def __init__(self, video_memory_budget_mb=256, max_growth=8):
+        self.logger = logging.getLogger()
+        self.video_memory_budget = video_memory_budget_mb * 1024 * 1024
+        self.max_growth = max_growth
+        self.growth = {"video": 1, "audio": 1, "muxing": 1}
+        self.metrics = {event: 0 for event in self.QUEUE_EVENTS}
+        self.part_metrics = dict(self.metrics)
+        self.current_plan = None
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _next_power_of_two(value):
+        value = max(1, int(value))
+        return 1 << (value - 1).bit_length()
+
+    @staticmethod
+    def _parse_bitrate(bitrate):
+        bitrate = str(bitrate).strip().lower()
+        multiplier = 1
+        if bitrate.endswith("k"):
+            multiplier, bitrate = 1000, bitrate[:-1]
+        elif bitrate.endswith("m"):
+            multiplier, bitrate = 1000000, bitrate[:-1]
+        try:
+            return int(float(bitrate) * multiplier)
+        except ValueError:
+            return 0
+
+    def plan(self, width, height, fps, audio_inputs, bitrate="0"):
+        frame_bytes = width * height * 4
+        load = max(1.0, (width * height * fps) / self.REFERENCE_LOAD)
+
+        video_frames = fps * 0.5 * self.growth["video"]
+        video_frames = min(video_frames, self.video_memory_budget * self.growth["video"] / frame_bytes)
+        video_queue = max(8, self._next_power_of_two(video_frames))
+
+        audio_seconds = 2 * load * (1 + 0.25 * max(0, audio_inputs - 1)) * self.growth["audio"]
+        audio_queue = min(8192, max(512, self._next_power_of_two(self.AUDIO_PACKETS_PER_SECOND * audio_seconds)))
+
+        muxing_queue = min(65536, max(1024, self._next_power_of_two(fps * 2 * (audio_inputs + 1) * self.growth["muxing"])))
+
+        packet_bytes = self._parse_bitrate(bitrate) / 8 / max(1, fps)
+        memory_bytes = (video_queue * frame_bytes
+                        + audio_queue * self.AUDIO_PACKET_BYTES * audio_inputs
+                        + muxing_queue * packet_bytes)
+
+        self.current_plan = {
+            "video_queue": video_queue,
+            "audio_queue": audio_queue,
+            "muxing_queue": muxing_queue,
+            "memory_bytes": int(memory_bytes),
+        }
+        self.logger.info(
+            f"Capture queues for {width}x{height}@{fps} with {audio_inputs} audio input(s): "
+            f"video={video_queue} audio={audio_queue} muxing={muxing_queue} "
+            f"(~{memory_bytes / (1024 * 1024):.1f} MB worst case)"
+        )
+        return self.current_plan
+
+    def record_line(self, line):
+        event = None
+        if "Too many packets buffered for output stream" in line:
+            event = "muxing_queue_overflow"
+        elif "real-time buffer" in line and "too full" in line:
+            event = "realtime_buffer_overflow"
+        elif "Thread message queue blocking" in line:
+            is_video = "x11grab" in line or "gdigrab" in line
+            event = "video_queue_blocking" if is_video else "audio_queue_blocking"
+
+        if event:
+            with self.lock:
+                self.metrics[event] += 1
+                self.part_metrics[event] += 1
+        return event
+
+    def finish_part(self):
+        with self.lock:
+            part_metrics = self.part_metrics
+            self.part_metrics = {event: 0 for event in self.QUEUE_EVENTS}
+
+        if any(part_metrics.values()):
+            self.logger.warning(f"Capture queue events in last part: {part_metrics}")
+
+        if part_metrics["video_queue_blocking"]:
+            self._grow("video")
+        if part_metrics["audio_queue_blocking"] or part_metrics["realtime_buffer_overflow"]:
+            self._grow("audio")
+        if part_metrics["muxing_queue_overflow"]:
+            self._grow("muxing")
+
+        return part_metrics
+
+    def _grow(self, queue):
+        if self.growth[queue] < self.max_growth:
+            self.growth[queue] *= 2
+            self.logger.info(f"Growing {queue} capture queue to x{self.growth[queue]} for the next part")
+
+    def report(self):
+        memory_mb = self.current_plan["memory_bytes"] / (1024 * 1024) if self.current_plan else 0.0
+        return f"Capture queue metrics: {self.metrics}, growth={self.growth}, queue memory ~{memory_mb:.1f} MB"
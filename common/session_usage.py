@@ -0,0 +1,37 @@
+import os
+import time
+
+class SessionUsage:
+    def __init__(self):
+        self.started = None
+        self.cpu_started = 0.0
+
+    @staticmethod
+    def _children_cpu():
+        # FFmpeg parts are waited on before they are counted, so their CPU time
+        # shows up in the children times. Windows does not report these and
+        # yields 0.
+        times = os.times()
+        return times.children_user + times.children_system
+
+    def start(self):
+        self.started = time.monotonic()
+        self.cpu_started = self._children_cpu()
+
+    def stop(self, files):
+        if self.started is None:
+            return None
+
+        duration = max(1e-6, time.monotonic() - self.started)
+        cpu_seconds = self._children_cpu() - self.cpu_started
+        disk_bytes = sum(os.path.getsize(path) for path in files if os.path.exists(path))
+        self.started = None
+
+        hours = duration / 3600
+        return {
+            "duration": duration,
+            "cpu_seconds": cpu_seconds,
+            "disk_bytes": disk_bytes,
+            "cpu_seconds_per_hour": cpu_seconds / hours,
+            "disk_mb_per_hour": disk_bytes / (1024 * 1024) / hours,
+        }
@@ -0,0 +1,161 @@
+import datetime
+import json
+import logging
+import os
+import shutil
+import time
+
+from common.library_index import is_media_file
+
+class StorageManager:
+    TRASH_FOLDER = ".trash"
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, folder, quota_gb=0, retention_days=0, trash_days=7, min_free_mb=1024):
+        self.logger = logging.getLogger()
+        self.folder = folder
+        # A quota or retention of 0 disables that policy.
+        self.quota_bytes = int(quota_gb * 1024 ** 3)
+        self.retention_seconds = retention_days * 86400
+        self.trash_seconds = trash_days * 86400
+        self.min_free_bytes = int(min_free_mb * 1024 ** 2)
+
+    @property
+    def trash_folder(self):
+        return os.path.join(self.folder, self.TRASH_FOLDER)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.trash_folder, self.MANIFEST_NAME)
+
+    def free_bytes(self, path=None):
+        path = path or self.folder
+        while path and not os.path.exists(path):
+            path = os.path.dirname(path)
+        return shutil.disk_usage(path or ".").free
+
+    def has_room(self, required_bytes, path=None):
+        return self.free_bytes(path) - self.min_free_bytes >= required_bytes
+
+    @staticmethod
+    def estimate_bytes(bits_per_second, duration_seconds, overhead=1.05):
+        return int(bits_per_second / 8 * duration_seconds * overhead)
+
+    def list_recordings(self):
+        recordings = []
+        try:
+            entries = list(os.scandir(self.folder))
+        except OSError:
+            return recordings
+        for entry in entries:
+            if entry.is_file() and is_media_file(entry.name):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                recordings.append((os.path.abspath(entry.path), stat.st_size, stat.st_mtime))
+        return recordings
+
+    def plan_prune(self, protected=()):
+        # Oldest recordings go first: everything past the retention age, then
+        # as many more as needed to bring the folder back under its quota.
+        protected = {os.path.abspath(path) for path in protected}
+        recordings = sorted(self.list_recordings(), key=lambda recording: recording[2])
+        now = time.time()
+        plan = []
+        total = sum(size for _, size, _ in recordings)
+
+        for path, size, mtime in recordings:
+            if path in protected:
+                continue
+            if self.retention_seconds and now - mtime > self.retention_seconds:
+                plan.append((path, "retention"))
+                total -= size
+            elif self.quota_bytes and total > self.quota_bytes:
+                plan.append((path, "quota"))
+                total -= size
+        return plan
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save_manifest(self, entries):
+        os.makedirs(self.trash_folder, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def prune(self, protected=()):
+        plan = self.plan_prune(protected)
+        if not plan:
+            return []
+
+        # Pruned recordings are moved, not deleted, so a wrong policy can be
+        # undone from the trash until it is emptied.
+        os.makedirs(self.trash_folder, exist_ok=True)
+        entries = self._load_manifest()
+        pruned = []
+        for path, reason in plan:
+            name = f"{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}_{os.path.basename(path)}"
+            try:
+                os.replace(path, os.path.join(self.trash_folder, name))
+            except OSError as e:
+                self.logger.error(f"Could not move {path} to the trash: {e}")
+                continue
+            entries.append({"name": name, "original": path, "reason": reason, "trashed": time.time()})
+            pruned.append(path)
+            self.logger.info(f"Storage policy moved {path} to the trash ({reason})")
+        self._save_manifest(entries)
+        return pruned
+
+    def trashed(self):
+        return self._load_manifest()
+
+    def restore(self, name):
+        entries = self._load_manifest()
+        for entry in entries:
+            if entry["name"] != name:
+                continue
+            target = entry["original"]
+            if os.path.exists(target):
+                root, ext = os.path.splitext(target)
+                target = f"{root}.restored{ext}"
+            os.replace(os.path.join(self.trash_folder, name), target)
+            # A restored recording counts as new, otherwise the same policy
+            # would prune it again on the next pass.
+            os.utime(target)
+            entries.remove(entry)
+            self._save_manifest(entries)
+            self.logger.info(f"Restored {target} from the trash")
+            return target
+        return None
+
+    def empty_trash(self, older_than=None):
+        older_than = self.trash_seconds if older_than is None else older_than
+        entries = self._load_manifest()
+        if not entries:
+            return 0
+        now = time.time()
+        kept = []
+        removed = 0
+        for entry in entries:
+            if now - entry["trashed"] < older_than:
+                kept.append(entry)
+                continue
+            try:
+                os.remove(os.path.join(self.trash_folder, entry["name"]))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                self.logger.error(f"Could not delete {entry['name']} from the trash: {e}")
+                kept.append(entry)
+                continue
+            removed += 1
+            self.logger.info(f"Deleted {entry['original']} from the trash")
+        self._save_manifest(kept)
+        return removed
@@ -0,0 +1,159 @@
+import glob
+import json
+import math
+import os
+import shutil
+import tempfile
+
+# Kept free of Qt: generate() runs inside the job worker processes.
+
+THUMBS_FOLDER = ".thumbs"
+POSTER_NAME = "poster.jpg"
+SPRITE_PATTERN = "sprite_%03d.jpg"
+INDEX_NAME = "seek.vtt"
+STAMP_NAME = "stamp.json"
+# Set on frames so the metadata filter prints their timestamps.
+TIME_KEY = "opencap_thumb"
+
+def thumbnail_folder(video_path):
+    folder, name = os.path.split(os.path.abspath(video_path))
+    return os.path.join(folder, THUMBS_FOLDER, name)
+
+def _stamp(video_path):
+    stat = os.stat(video_path)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+def is_current(video_path):
+    # Thumbnails belong to one exact version of the file; any rewrite of the
+    # recording (normalization, compression, trimming) invalidates them.
+    try:
+        with open(os.path.join(thumbnail_folder(video_path), STAMP_NAME), 'r', encoding='utf-8') as f:
+            stamp = json.load(f)
+        current = _stamp(video_path)
+    except (OSError, ValueError):
+        return False
+    return (stamp.get("size"), stamp.get("mtime")) == (current["size"], current["mtime"])
+
+def remove_thumbnails(video_path):
+    folder = thumbnail_folder(video_path)
+    shutil.rmtree(folder, ignore_errors=True)
+    # Work folders left behind by a generator that crashed.
+    for temp_folder in glob.glob(f"{glob.escape(folder)}.*.tmp"):
+        shutil.rmtree(temp_folder, ignore_errors=True)
+
+def get_poster(video_path):
+    path = os.path.join(thumbnail_folder(video_path), POSTER_NAME)
+    return path if os.path.exists(path) else None
+
+def format_vtt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+def parse_vtt_time(text):
+    hours, minutes, seconds = text.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def write_vtt(path, times, duration, columns, rows, tile_width, tile_height):
+    per_sheet = columns * rows
+    lines = ["WEBVTT", ""]
+    for i, start in enumerate(times):
+        end = times[i + 1] if i + 1 < len(times) else max(duration or start, start + 0.001)
+        sheet, cell = divmod(i, per_sheet)
+        x = (cell % columns) * tile_width
+        y = (cell // columns) * tile_height
+        lines.append(f"{format_vtt_time(start)} --> {format_vtt_time(end)}")
+        lines.append(f"{SPRITE_PATTERN % (sheet + 1)}#xywh={x},{y},{tile_width},{tile_height}")
+        lines.append("")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+def load_cues(video_path):
+    # Returns (start, end, sprite_path, (x, y, w, h)) for each seek frame.
+    folder = thumbnail_folder(video_path)
+    cues = []
+    try:
+        with open(os.path.join(folder, INDEX_NAME), 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+    except OSError:
+        return cues
+    for i, line in enumerate(lines):
+        if "-->" not in line or i + 1 >= len(lines):
+            continue
+        start, end = (part.strip() for part in line.split("-->"))
+        image, _, region = lines[i + 1].partition("#xywh=")
+        try:
+            cues.append((parse_vtt_time(start), parse_vtt_time(end), os.path.join(folder, image),
+                         tuple(int(value) for value in region.split(","))))
+        except ValueError:
+            continue
+    return cues
+
+def read_frame_times(path):
+    times = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith("frame:") and "pts_time:" in line:
+                times.append(float(line.rsplit("pts_time:", 1)[1]))
+    return times
+
+def generate(video_path, run, duration, interval=10, max_frames=1000, columns=10, rows=10,
+             tile_width=160, poster_width=320):
+    # `run(args, cwd)` runs FFmpeg. Only keyframes are decoded, so this costs
+    # a fraction of a full decode; seek frames land on the first keyframe at
+    # least `interval` seconds after the previous one.
+    from PIL import Image
+
+    folder = thumbnail_folder(video_path)
+    os.makedirs(os.path.dirname(folder), exist_ok=True)
+    # Every run works in a folder of its own, so two jobs for the same
+    # recording never delete each other's files.
+    temp_folder = tempfile.mkdtemp(prefix=f"{os.path.basename(folder)}.", suffix=".tmp",
+                                   dir=os.path.dirname(folder))
+    # mkdtemp makes the folder private; thumbnails are shared like the
+    # recordings next to them.
+    umask = os.umask(0)
+    os.umask(umask)
+    os.chmod(temp_folder, 0o777 & ~umask)
+    stamp = _stamp(video_path)
+    source = os.path.abspath(video_path)
+
+    try:
+        if duration:
+            interval = max(interval, duration / max_frames)
+        run(["-skip_frame", "nokey", "-ss", f"{(duration or 0) * 0.1:.3f}", "-i", source, "-an", "-sn",
+             "-frames:v", "1", "-vf", f"scale={poster_width}:-2", "-update", "1", POSTER_NAME], temp_folder)
+        run(["-skip_frame", "nokey", "-i", source, "-an", "-sn",
+             "-vf", f"select='isnan(prev_selected_t)+gte(t-prev_selected_t\\,{interval - 0.5:.3f})',"
+                    f"metadata=mode=add:key={TIME_KEY}:value=1,metadata=mode=print:file=times.txt,"
+                    f"scale={tile_width}:-2,tile={columns}x{rows}",
+             "-fps_mode", "passthrough", SPRITE_PATTERN], temp_folder)
+
+        times = read_frame_times(os.path.join(temp_folder, "times.txt"))
+        os.remove(os.path.join(temp_folder, "times.txt"))
+        first_sprite = os.path.join(temp_folder, SPRITE_PATTERN % 1)
+        if not times or not os.path.exists(first_sprite):
+            raise RuntimeError("no keyframes could be read")
+        with Image.open(first_sprite) as sprite:
+            sheet_width, sheet_height = sprite.size
+        write_vtt(os.path.join(temp_folder, INDEX_NAME), times, duration, columns, rows,
+                  sheet_width // columns, sheet_height // rows)
+
+        if _stamp(video_path) != stamp:
+            raise RuntimeError("recording changed while thumbnails were generated")
+        with open(os.path.join(temp_folder, STAMP_NAME), 'w', encoding='utf-8') as f:
+            json.dump(dict(stamp, interval=interval, frames=len(times),
+                           sheets=math.ceil(len(times) / (columns * rows))), f)
+
+        shutil.rmtree(folder, ignore_errors=True)
+        try:
+            os.replace(temp_folder, folder)
+        except OSError:
+            # Another job has put its thumbnails in place in the meantime.
+            if not is_current(video_path):
+                raise
+    finally:
+        shutil.rmtree(temp_folder, ignore_errors=True)
+    return folder
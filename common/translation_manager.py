@@ -6,6 +6,7 @@ class TranslationManager:
         self.language = language
         self.is_rtl = self.check_rtl_language(language)
         self.translation = ConfigParser()
+        self.fallback_translation = ConfigParser()
         self.load_translation()
 
     def check_rtl_language(self, language):
@@ -29,8 +30,17 @@ class TranslationManager:
                 for key in self.translation['Settings']:
                     self.translation['Settings'][key] = self.translation['Settings'][key].replace('\\n', '\n')
 
+        self.fallback_translation = ConfigParser()
+        fallback_file = os.path.join(translations_folder, 'en-US.ini')
+        if os.path.exists(fallback_file):
+            with open(fallback_file, 'r', encoding='utf-8') as file:
+                self.fallback_translation.read_file(file)
+            for key in self.fallback_translation['Settings']:
+                self.fallback_translation['Settings'][key] = self.fallback_translation['Settings'][key].replace('\\n', '\n')
+
     def t(self, key):
-        return self.translation.get('Settings', key, fallback=key)
+        fallback = self.fallback_translation.get('Settings', key, fallback=key)
+        return self.translation.get('Settings', key, fallback=fallback)
 
     def change_language(self, new_language):
         self.language = new_language
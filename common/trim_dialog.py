@@ -0,0 +1,72 @@
+import os
+from PyQt6.QtWidgets import QDialog, QGridLayout, QTimeEdit, QCheckBox, QLabel, QDialogButtonBox
+from PyQt6.QtCore import Qt, QTime
+
+from common import keyframe_index
+from common.job_queue import JobQueue
+
+class TrimDialog(QDialog):
+    def __init__(self, parent, path, duration, start=0.0):
+        super().__init__(parent)
+        self.recorder = parent
+        self.path = path
+        self.setWindowTitle(f"{parent.t('trim')} - {os.path.basename(path)}")
+        self.setModal(True)
+        # Only a cached index can show where the cut will land; otherwise it
+        # is built by the trim job itself.
+        self.index = keyframe_index.load(path)
+
+        layout = QGridLayout(self)
+
+        maximum = QTime(0, 0).addMSecs(round((duration or 0) * 1000))
+        self.start_edit = QTimeEdit(QTime(0, 0).addMSecs(round(start * 1000)))
+        self.end_edit = QTimeEdit(maximum)
+        for edit in (self.start_edit, self.end_edit):
+            edit.setDisplayFormat("HH:mm:ss.zzz")
+            edit.setMaximumTime(maximum)
+            edit.timeChanged.connect(self.update_hint)
+        self.accurate_checkbox = QCheckBox(parent.t("trim_accurate"))
+        self.accurate_checkbox.toggled.connect(self.update_hint)
+        self.hint_label = QLabel()
+
+        self.buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel,
+            Qt.Orientation.Horizontal, self)
+        self.buttons.accepted.connect(self.accept)
+        self.buttons.rejected.connect(self.reject)
+
+        layout.addWidget(QLabel(parent.t("trim_start")), 0, 0)
+        layout.addWidget(self.start_edit, 0, 1)
+        layout.addWidget(QLabel(parent.t("trim_end")), 1, 0)
+        layout.addWidget(self.end_edit, 1, 1)
+        layout.addWidget(self.accurate_checkbox, 2, 0, 1, 2)
+        layout.addWidget(self.hint_label, 3, 0, 1, 2)
+        layout.addWidget(self.buttons, 4, 0, 1, 2)
+        self.update_hint()
+
+    def get_range(self):
+        return (self.start_edit.time().msecsSinceStartOfDay() / 1000,
+                self.end_edit.time().msecsSinceStartOfDay() / 1000)
+
+    def update_hint(self):
+        start, end = self.get_range()
+        self.buttons.button(QDialogButtonBox.StandardButton.Ok).setEnabled(end > start)
+        if not self.index or self.accurate_checkbox.isChecked():
+            self.hint_label.clear()
+            return
+        cut = keyframe_index.keyframe_before(self.index["keyframes"], start)
+        self.hint_label.setText(self.recorder.t("trim_keyframe_hint").format(
+            time=QTime(0, 0).addMSecs(round(cut * 1000)).toString("HH:mm:ss.zzz")))
+
+    def accept(self):
+        start, end = self.get_range()
+        root, ext = os.path.splitext(self.path)
+        target = f"{root}_trim{ext}"
+        counter = 2
+        while os.path.exists(target):
+            target = f"{root}_trim{counter}{ext}"
+            counter += 1
+        self.recorder.job_queue.submit("trim", self.path, target, priority=JobQueue.PRIORITY_HIGH,
+                                       start=start, end=end, accurate=self.accurate_checkbox.isChecked())
+        super().accept()
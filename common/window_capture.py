@@ -0,0 +1,182 @@
+import logging
+import re
+import subprocess
+import threading
+import time
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QListWidget, QDialogButtonBox)
+from PyQt6.QtCore import Qt, QObject, pyqtSignal
+
+def list_windows():
+    windows = []
+    try:
+        result = subprocess.run(["xprop", "-root", "_NET_CLIENT_LIST"], capture_output=True, text=True,
+                                encoding='utf-8', errors='replace')
+    except FileNotFoundError:
+        logging.getLogger().error("xprop not found. Install x11-utils to capture windows.")
+        return windows
+
+    for window_id in re.findall(r"0x[0-9a-fA-F]+", result.stdout):
+        title = get_window_title(window_id)
+        geometry = get_window_geometry(window_id)
+        if title and geometry and geometry[2] > 1 and geometry[3] > 1:
+            windows.append({"id": window_id, "title": title, "geometry": geometry})
+    return windows
+
+def get_window_title(window_id):
+    try:
+        result = subprocess.run(["xprop", "-id", window_id, "_NET_WM_NAME", "WM_NAME"], capture_output=True,
+                                text=True, encoding='utf-8', errors='replace')
+    except FileNotFoundError:
+        return None
+
+    for line in result.stdout.splitlines():
+        if "=" in line:
+            title = line.split("=", 1)[1].strip().strip('"')
+            if title:
+                return title
+    return None
+
+def get_window_geometry(window_id):
+    try:
+        result = subprocess.run(["xwininfo", "-id", window_id], capture_output=True, text=True,
+                                encoding='utf-8', errors='replace')
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+
+    values = {}
+    for line in result.stdout.splitlines():
+        if ":" not in line:
+            continue
+        key, value = line.split(":", 1)
+        key = key.strip()
+        if key in ("Absolute upper-left X", "Absolute upper-left Y", "Width", "Height", "Map State"):
+            values[key] = value.strip()
+
+    if values.get("Map State", "IsViewable") != "IsViewable":
+        return None
+    try:
+        return (int(values["Absolute upper-left X"]), int(values["Absolute upper-left Y"]),
+                int(values["Width"]), int(values["Height"]))
+    except (KeyError, ValueError):
+        return None
+
+
+class WindowTracker(QObject):
+
+    geometry_changed = pyqtSignal(int, int, int, int)
+    window_closed = pyqtSignal()
+
+    def __init__(self, window_id, settle_time=0.3, poll_interval=1.0):
+        super().__init__()
+        self.logger = logging.getLogger()
+        self.window_id = window_id
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.geometry = get_window_geometry(window_id)
+        self.running = False
+        self.process = None
+        self.notify_event = threading.Event()
+        self.threads = []
+
+    def start(self):
+        if self.running:
+            return
+
+        self.running = True
+        try:
+            # xev reports ConfigureNotify/DestroyNotify for the window, so the
+            # geometry is only re-read when the window actually changes.
+            self.process = subprocess.Popen(
+                ["xev", "-id", self.window_id, "-event", "structure"],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, encoding='utf-8', errors='replace'
+            )
+            self.threads.append(threading.Thread(target=self._read_events, daemon=True))
+        except FileNotFoundError:
+            self.logger.warning("xev not found, falling back to polling the window geometry.")
+            self.process = None
+
+        self.threads.append(threading.Thread(target=self._watch_geometry, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.running = False
+        self.notify_event.set()
+        if self.process:
+            self.process.terminate()
+            self.process = None
+        for thread in self.threads:
+            thread.join(timeout=1)
+        self.threads = []
+
+    def _read_events(self):
+        process = self.process
+        for line in iter(process.stdout.readline, ""):
+            if not self.running:
+                break
+            if any(event in line for event in ("ConfigureNotify", "MapNotify", "UnmapNotify", "DestroyNotify")):
+                self.notify_event.set()
+        self.notify_event.set()
+
+    def _watch_geometry(self):
+        while self.running:
+            if self.process:
+                self.notify_event.wait()
+            else:
+                self.notify_event.wait(self.poll_interval)
+            if not self.running:
+                break
+
+            # Let a drag or resize settle before reporting it.
+            time.sleep(self.settle_time)
+            self.notify_event.clear()
+
+            geometry = get_window_geometry(self.window_id)
+            if geometry is None:
+                self.running = False
+                self.window_closed.emit()
+                break
+
+            if geometry != self.geometry:
+                self.geometry = geometry
+                self.geometry_changed.emit(*geometry)
+
+
+class WindowSelector(QDialog):
+    def __init__(self, parent, title="Select Window"):
+        super().__init__(parent)
+        self.setWindowTitle(title)
+        self.setModal(True)
+        self.setMinimumSize(420, 320)
+
+        self.windows = list_windows()
+
+        layout = QVBoxLayout(self)
+
+        instructions = QLabel(parent.t("select_window_to_record"))
+        instructions.setWordWrap(True)
+
+        self.window_list = QListWidget()
+        for window in self.windows:
+            x, y, width, height = window["geometry"]
+            self.window_list.addItem(f"{window['title']} ({width}x{height})")
+        self.window_list.itemDoubleClicked.connect(self.accept)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok |
+            QDialogButtonBox.StandardButton.Cancel,
+            Qt.Orientation.Horizontal, self)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout.addWidget(instructions)
+        layout.addWidget(self.window_list)
+        layout.addWidget(buttons)
+
+    def get_selected_window(self):
+        row = self.window_list.currentRow()
+        if 0 <= row < len(self.windows):
+            return self.windows[row]
+        return None
@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+def default_fast_folder():
+    # RAM-backed where the system has it, otherwise the local temp folder.
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return os.path.join("/dev/shm", "opencap-staging")
+    return os.path.join(tempfile.gettempdir(), "opencap-staging")
+
+PROBE_CACHE_NAME = ".write_speed.json"
+
+def load_probe(folder, max_age):
+    # The last measurement of a folder, kept inside it so it follows the
+    # folder rather than the machine; None once it is older than max_age.
+    try:
+        with open(os.path.join(folder, PROBE_CACHE_NAME), 'r', encoding='utf-8') as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - result.get("probed", 0) > max_age:
+        return None
+    return result
+
+def save_probe(folder, result):
+    path = os.path.join(folder, PROBE_CACHE_NAME)
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+    except OSError as e:
+        logging.getLogger().error(f"Could not save write speed of {folder}: {e}")
+
+def probe_write_speed(folder, size_mb=32, block_kb=1024, should_stop=None):
+    # Writes and syncs a scratch file block by block, the way the muxer
+    # streams a recording, and reports sustained MB/s and block latencies.
+    # Returns None when should_stop() asks it to give way.
+    block = os.urandom(block_kb * 1024)
+    blocks = max(1, size_mb * 1024 // block_kb)
+    latencies = []
+    path = os.path.join(folder, f".write_probe_{os.getpid()}.tmp")
+    started = time.perf_counter()
+    try:
+        with open(path, 'wb', buffering=0) as f:
+            for _ in range(blocks):
+                if should_stop and should_stop():
+                    return None
+                block_started = time.perf_counter()
+                f.write(block)
+                os.fsync(f.fileno())
+                latencies.append(time.perf_counter() - block_started)
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    elapsed = max(1e-6, time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "mb_per_second": blocks * block_kb / 1024 / elapsed,
+        "latency_p95": latencies[int(len(latencies) * 0.95) - 1 if len(latencies) > 1 else 0],
+        "latency_max": latencies[-1],
+        "probed": time.time(),
+    }
+
+
+class WriteMonitor:
+    # Follows the file FFmpeg is writing. A stall is a stretch in which the
+    # progress reports stop and the file does not grow: the muxer is blocked
+    # in a write, and the capture queues upstream are filling up.
+
+    def __init__(self, stall_seconds=3.0):
+        self.stall_seconds = stall_seconds
+        self.reset()
+
+    def reset(self):
+        self.path = None
+        self.last_size = 0
+        self.last_growth = None
+        self.last_progress = None
+        self.started = None
+        self.written = 0
+        self.longest_stall = 0.0
+
+    def start(self, path):
+        now = time.monotonic()
+        self.path = path
+        self.last_size = 0
+        self.last_growth = now
+        self.last_progress = now
+        if self.started is None:
+            self.started = now
+
+    def on_progress(self):
+        self.last_progress = time.monotonic()
+
+    def sample(self, path=None):
+        if path and path != self.path:
+            self.start(path)
+        if not self.path:
+            return 0.0
+        now = time.monotonic()
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = self.last_size
+        if size != self.last_size:
+            self.written += max(0, size - self.last_size)
+            self.last_size = size
+            self.last_growth = now
+
+        stall = min(now - self.last_growth, now - self.last_progress)
+        self.longest_stall = max(self.longest_stall, stall)
+        return stall
+
+    def is_stalled(self):
+        return self.sample() >= self.stall_seconds
+
+    def throughput(self):
+        if self.started is None:
+            return 0.0
+        return self.written / max(1e-6, time.monotonic() - self.started)
+
+
+class PartMover:
+    # Moves finished parts from the fast staging folder to their final folder
+    # on a background thread, one at a time so the slow volume only ever
+    # sees a single sequential writer.
+
+    def __init__(self):
+        self.logger = logging.getLogger()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.moved = {}
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def move(self, path, folder):
+        with self.lock:
+            if path in self.moved:
+                return
+            self.moved[path] = path
+        self.queue.put((path, folder))
+
+    def resolve(self, path):
+        with self.lock:
+            return self.moved.get(path, path)
+
+    def is_queued(self, path):
+        with self.lock:
+            return path in self.moved
+
+    def moved_from(self, folder):
+        with self.lock:
+            return [source for source in self.moved if os.path.dirname(source) == folder]
+
+    def wait(self):
+        self.queue.join()
+
+    def clear(self):
+        self.wait()
+        with self.lock:
+            self.moved = {}
+
+    def _run(self):
+        while True:
+            path, folder = self.queue.get()
+            try:
+                target = os.path.join(folder, os.path.basename(path))
+                temp_path = f"{target}.moving"
+                shutil.copyfile(path, temp_path)
+                os.replace(temp_path, target)
+                os.remove(path)
+                with self.lock:
+                    self.moved[path] = target
+                self.logger.info(f"Moved staged part {path} to {folder}")
+            except OSError as e:
+                # The part stays in staging and is read from there.
+                self.logger.error(f"Could not move staged part {path} to {folder}: {e}")
+            finally:
+                self.queue.task_done()
@@ -4,12 +4,20 @@ import sys
 import os
 import subprocess
 import threading
-from PyQt6.QtWidgets import QMessageBox
+from PyQt6.QtWidgets import QMessageBox, QDialog
 from PyQt6.QtGui import QIcon, QPixmap
 from base.screen_recorder_base import ScreenRecorderBase
+from common.audio_graph import DEFAULT_SAMPLE_SPEC, build_audio_graph, parse_sample_spec
+from common.window_capture import WindowSelector, WindowTracker
+from common.multi_monitor import monitor_bounds
 
 class LinuxRecorder(ScreenRecorderBase):
     def __init__(self):
+        self.audio_sample_specs = {}
+        self.capture_window = None
+        self.window_tracker = None
+        self.window_output_size = None
+        self.window_capture_size = None
         super().__init__()
     
     def set_icon(self):
@@ -35,22 +43,30 @@ class LinuxRecorder(ScreenRecorderBase):
         
     def get_audio_devices(self):
         devices = []
+        sample_specs = {}
         cmd = ["pactl", "list", "sources"]
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='replace')
             lines = result.stdout.splitlines()
 
             current_device = None
+            spec_device = None
             for line in lines:
                 if "Name:" in line:
                     parts = line.split()
                     if len(parts) > 1:
                         current_device = parts[1]
+                        spec_device = self._normalize_audio_device_name(parts[1])
                 elif "Description:" in line and current_device:
                     description = line.split(":", 1)[1].strip()
                     normalized_name = self._normalize_audio_device_name(current_device)
                     devices.append(f"{description} ({normalized_name})")
                     current_device = None
+                elif "Sample Specification:" in line and spec_device:
+                    sample_specs[spec_device] = parse_sample_spec(line.split(":", 1)[1])
+                    spec_device = None
+
+            self.audio_sample_specs = sample_specs
 
             if not devices:
                 self.logger.error("No active audio devices were found. Please check your audio settings.")
@@ -83,6 +99,65 @@ class LinuxRecorder(ScreenRecorderBase):
             return display_name[start_idx:end_idx]
         return display_name
         
+    def get_source_sample_spec(self, device_name):
+        return self.audio_sample_specs.get(device_name, DEFAULT_SAMPLE_SPEC)
+
+    def get_capture_modes(self):
+        return super().get_capture_modes() + [("window", "capture_mode_window")]
+
+    def on_capture_mode_selected(self, mode):
+        self.stop_window_tracking()
+        if mode != "window":
+            return True
+
+        dialog = WindowSelector(self, self.t("select_window"))
+        if dialog.exec() != QDialog.DialogCode.Accepted:
+            return False
+
+        window = dialog.get_selected_window()
+        if not window:
+            return False
+
+        self.capture_window = window
+        self.window_tracker = WindowTracker(window["id"])
+        self.window_tracker.geometry_changed.connect(self.on_capture_window_geometry_changed)
+        self.window_tracker.window_closed.connect(self.on_capture_window_closed)
+        self.window_tracker.start()
+        self.logger.info(f"Capturing window {window['id']} ({window['title']}) at {window['geometry']}")
+        return True
+
+    def stop_window_tracking(self):
+        if self.window_tracker:
+            self.window_tracker.stop()
+            self.window_tracker = None
+        self.capture_window = None
+
+    def get_preview_region(self):
+        if self.get_capture_mode() == "window" and self.window_tracker and self.window_tracker.geometry:
+            x, y, width, height = self.window_tracker.geometry
+            return {"left": x, "top": y, "width": width, "height": height}
+        return super().get_preview_region()
+
+    def on_capture_window_geometry_changed(self, x, y, width, height):
+        self.sync_preview_source()
+        if self.get_capture_mode() == "window":
+            self.capture_origin = (x, y)
+        if self.running and (width - width % 2, height - height % 2) != self.window_capture_size:
+            self.logger.info(f"Captured window resized to {width}x{height}, starting a new part.")
+            self.stop_current_recording()
+            self.start_new_recording()
+
+    def on_capture_window_closed(self):
+        self.logger.warning("The captured window has been closed.")
+        if self.running:
+            QMessageBox.warning(self, self.t("warning"), self.t("error_window_closed"))
+            self.stop_recording()
+        self.capture_mode_combo.setCurrentIndex(self.capture_mode_combo.findData("screen"))
+
+    def shutdown_background_workers(self):
+        self.stop_window_tracking()
+        super().shutdown_background_workers()
+
     def get_ffmpeg_path(self):
         return "ffmpeg"
         
@@ -102,16 +177,17 @@ class LinuxRecorder(ScreenRecorderBase):
             sys.exit(1)
         
     def start_recording(self, continue_timer=False):
-        video_name = f"Video.{datetime.datetime.now().strftime('%m-%d-%Y.%H.%M.%S')}.{self.format_combo.currentText()}"
-        self.video_path = os.path.join(self.output_folder, video_name)
+        video_name = f"Video.{datetime.datetime.now().strftime('%m-%d-%Y.%H.%M.%S')}.{self.get_part_format()}"
+        self.video_path = os.path.join(self.get_recording_folder(), video_name)
 
-        fps = int(self.fps_combo.currentText())
+        fps = self.get_capture_fps()
         bitrate = self.bitrate_combo.currentText()
         codec = self.codec_combo.currentText()
 
-        selected_devices = self.get_selected_audio_devices()
+        # Time-lapse recordings have no audio track.
+        selected_devices = [] if self.is_timelapse() else self.get_selected_audio_devices()
 
-        if not selected_devices:
+        if not selected_devices and not self.is_timelapse():
             QMessageBox.critical(self, self.t("error"), self.t("error_no_selected_audio_device"))
             self.status_signals.status_changed.emit(self.t("error_recording"))
             return
@@ -130,106 +206,146 @@ class LinuxRecorder(ScreenRecorderBase):
 
         monitor_index = self.monitor_combo.currentIndex()
         monitor = self.monitors[monitor_index]
+        display = os.getenv('DISPLAY')
+        video_filters = []
 
-        if self.record_area:
-            x1, y1, x2, y2 = self.record_area
-            width = x2 - x1
-            height = y2 - y1
-
-            if width <= 0 or height <= 0:
-                QMessageBox.critical(self, self.t("error"), self.t("error_invalid_area"))
+        if self.get_capture_mode() == "window":
+            geometry = self.window_tracker.geometry if self.window_tracker else None
+            if not geometry:
+                QMessageBox.critical(self, self.t("error"), self.t("error_no_window_selected"))
                 self.status_signals.status_changed.emit(self.t("error_recording"))
                 return
 
-            width -= width % 2
-            height -= height % 2
-            if width <= 0 or height <= 0:
-                QMessageBox.critical(self, self.t("error"), self.t("error_adjusted_area"))
-                self.status_signals.status_changed.emit(self.t("error_recording"))
-                return
+            capture_width = geometry[2] - geometry[2] % 2
+            capture_height = geometry[3] - geometry[3] % 2
+            if not continue_timer or self.window_output_size is None:
+                self.window_output_size = (capture_width, capture_height)
+            self.window_capture_size = (capture_width, capture_height)
+
+            # Later parts may capture a resized window; keep the encoded size
+            # constant so the parts can still be concatenated without re-encoding.
+            width, height = self.window_output_size
+            video_filters.append(
+                f"scale={width}:{height}:force_original_aspect_ratio=decrease:force_divisible_by=2,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+            )
+            video_input = ["-window_id", self.capture_window["id"], "-i", display]
+            self.capture_origin = (geometry[0], geometry[1])
+            queues = self.queue_tuner.plan(capture_width, capture_height, fps, len(selected_devices), bitrate)
+        elif self.get_capture_mode() == "follow":
+            follow_filter, (width, height) = self.build_follow_filter(monitor)
+            video_filters.append(follow_filter)
+            video_input = ["-video_size", f"{monitor.width}x{monitor.height}", "-i", f"{display}+{monitor.x},{monitor.y}"]
+            self.capture_origin = (monitor.x, monitor.y)
+            queues = self.queue_tuner.plan(monitor.width, monitor.height, fps, len(selected_devices), bitrate)
+        elif self.get_capture_mode() == "monitors":
+            x, y, width, height = monitor_bounds(self.monitors)
+            video_input = ["-video_size", f"{width}x{height}", "-i", f"{display}+{x},{y}"]
+            self.capture_origin = (x, y)
+            queues = self.queue_tuner.plan(width, height, fps, len(selected_devices), bitrate)
         else:
-            x1 = y1 = 0
-            width = monitor.width
-            height = monitor.height
+            if self.record_area:
+                x1, y1, x2, y2 = self.record_area
+                width = x2 - x1
+                height = y2 - y1
 
-        display = os.getenv('DISPLAY')
+                if width <= 0 or height <= 0:
+                    QMessageBox.critical(self, self.t("error"), self.t("error_invalid_area"))
+                    self.status_signals.status_changed.emit(self.t("error_recording"))
+                    return
+
+                width -= width % 2
+                height -= height % 2
+                if width <= 0 or height <= 0:
+                    QMessageBox.critical(self, self.t("error"), self.t("error_adjusted_area"))
+                    self.status_signals.status_changed.emit(self.t("error_recording"))
+                    return
+            else:
+                x1 = y1 = 0
+                width = monitor.width
+                height = monitor.height
+
+            video_input = ["-video_size", f"{width}x{height}", "-i", f"{display}+{x1+monitor.x},{y1+monitor.y}"]
+            self.capture_origin = (x1 + monitor.x, y1 + monitor.y)
+            queues = self.queue_tuner.plan(width, height, fps, len(selected_devices), bitrate)
+
+        video_filters[:0] = self.get_overlay_filters(fps)
+        if self.get_capture_mode() != "monitors":
+            width, height = self.apply_output_scale(video_filters, width, height)
         
-        if len(selected_devices) > 1:
-            ffmpeg_args = [
-                "ffmpeg",
-                "-f", "x11grab",
-                "-framerate", str(fps),
-                "-video_size", f"{width}x{height}",
-                "-i", f"{display}+{x1+monitor.x},{y1+monitor.y}"
-            ]
-            
-            audio_filters = []
-            audio_map = []
-            
-            for i, (device, volume) in enumerate(selected_devices):
-                device_name = self._extract_device_name(device)
-                
-                ffmpeg_args.extend([
-                    "-f", "pulse",
-                    "-thread_queue_size", "512",
-                    "-i", device_name
-                ])
-                
-                if self._is_system_audio_device(device):
-                    audio_filters.append(f"[{i+1}:a]volume={volume/100*1.5:.2f}[a{i}]")
-                else:
-                    audio_filters.append(f"[{i+1}:a]volume={volume/100:.2f}[a{i}]")
-                
-                audio_map.append(f"[a{i}]")
-            
-            filter_complex = f"{';'.join(audio_filters)};{''.join(audio_map)}amix=inputs={len(selected_devices)}:duration=longest:dropout_transition=0[aout]"
+        ffmpeg_args = [
+            "ffmpeg",
+            "-f", "x11grab",
+            "-thread_queue_size", str(queues['video_queue']),
+            "-framerate", self.get_capture_rate(),
+        ] + video_input
+        
+        audio_inputs = []
+        
+        for i, (device, volume) in enumerate(selected_devices):
+            device_name = self._extract_device_name(device)
+            sample_spec = self.get_source_sample_spec(device_name)
             
             ffmpeg_args.extend([
-                "-filter_complex", filter_complex,
-                "-map", "0:v",
-                "-map", "[aout]",
+                "-f", "pulse",
+                "-thread_queue_size", str(queues['audio_queue']),
+                "-sample_rate", str(sample_spec['rate']),
+                "-channels", str(sample_spec['channels']),
+                "-i", device_name
             ])
             
-        else:
-            device, volume = selected_devices[0]
-            device_name = self._extract_device_name(device)
-            
             if self._is_system_audio_device(device):
-                audio_filter = f"volume={volume/100*1.5:.2f}"
+                gain = volume / 100 * 1.5
             else:
-                audio_filter = f"volume={volume/100:.2f}"
+                gain = volume / 100
             
-            ffmpeg_args = [
-                "ffmpeg",
-                "-f", "x11grab",
-                "-framerate", str(fps),
-                "-video_size", f"{width}x{height}",
-                "-i", f"{display}+{x1+monitor.x},{y1+monitor.y}",
-                "-f", "pulse",
-                "-thread_queue_size", "512",
-                "-ac", "2",
-                "-ar", "48000",
-                "-i", device_name,
-                "-filter:a", audio_filter,
-                "-map", "0:v",
-                "-map", "1:a",
-            ]
+            audio_inputs.append((i + 1, gain, sample_spec))
+
+        filter_graphs = []
+        video_maps = ["-map", "0:v"]
+        output_filters = list(video_filters)
+        if self.get_capture_mode() == "monitors":
+            video_graph, video_maps = self.get_monitor_session()
+            filter_graphs.append(video_graph)
+        else:
+            output_filters.extend(self.get_timelapse_filters())
+            output_filters.extend(self.get_roi_filters(monitor))
+            output_filters.extend(self.get_idle_filters())
+
+        audio_maps = ["-an"]
+        if audio_inputs:
+            filter_complex, graph_summary = build_audio_graph(audio_inputs, output_rate=48000, output_channels=2)
+            filter_complex = self.add_idle_audio_filter(filter_complex)
+            self.logger.info(f"Audio graph: {graph_summary}")
+            filter_graphs.append(filter_complex)
+            audio_maps = ["-map", "[aout]"]
+
+        if filter_graphs:
+            ffmpeg_args.extend(["-filter_complex", ";".join(filter_graphs)])
+        ffmpeg_args.extend(video_maps + audio_maps)
+        
+        if output_filters:
+            ffmpeg_args.extend(["-vf", ",".join(output_filters)])
 
         ffmpeg_args.extend([
             "-c:a", "aac",
             "-b:a", "128k",
             "-ar", "48000",
             "-ac", "2",
-            "-threads", "0",
+        ] + self.get_thread_args() + [
             "-pix_fmt", "yuv420p",
             "-vsync", "cfr",
             "-r", str(fps),
             "-loglevel", "warning",
             "-hide_banner",
-            "-max_muxing_queue_size", "1024"
+            "-max_muxing_queue_size", str(queues['muxing_queue'])
         ])
 
-        if codec == "libx264":
+        if self.deferred_session:
+            ffmpeg_args.extend(self.get_staging_encoder_args(fps))
+        elif self.is_long_session():
+            ffmpeg_args.extend(self.get_long_session_encoder_args(codec, bitrate, fps))
+        elif codec == "libx264":
             ffmpeg_args.extend([
                 "-c:v", "libx264",
                 "-preset", "veryfast",
@@ -256,7 +372,8 @@ class LinuxRecorder(ScreenRecorderBase):
                 "-b:v", bitrate,
             ])
 
-        ffmpeg_args.append(self.video_path)
+        ffmpeg_args.extend(self.get_output_args())
+        ffmpeg_args.extend(self.get_preview_tap_args(width, height, video_filters))
         
         self.logger.info(f"FFmpeg command: {' '.join(ffmpeg_args)}")
 
@@ -279,6 +396,7 @@ class LinuxRecorder(ScreenRecorderBase):
             self.logger.error(f"Error starting recording: {e}")
             return
 
+        self.on_recording_process_started(monitor)
         self.toggle_widgets(recording=True)
         self.status_label.setText(self.t("status_recording"))
 
@@ -288,19 +406,20 @@ class LinuxRecorder(ScreenRecorderBase):
         threading.Thread(target=self.read_ffmpeg_output, daemon=True).start()
         
     def concat_video_parts(self):
+        saved_file = None
         if len(self.video_parts) > 0:
             concat_file = os.path.join(self.output_folder, "concat_list.txt")     
-            output_file = os.path.join(self.output_folder, f"Video_{datetime.datetime.now().strftime('%m-%d-%Y.%H.%M.%S')}.{self.format_combo.currentText()}")
+            output_file = self.get_concat_output_path()
 
-            with open(concat_file, 'w') as f:
-                for video in self.video_parts:
-                    f.write(f"file '{os.path.basename(video)}'\n")
+            self.write_concat_list(concat_file)
             
             concat_command = [
                 "ffmpeg",
                 "-f", "concat",
                 "-safe", "0",
                 "-i", concat_file,
+            ] + self.get_chapter_args() + [
+                "-map", "0",
                 "-c", "copy",
                 "-movflags", "+faststart",
                 output_file
@@ -314,6 +433,8 @@ class LinuxRecorder(ScreenRecorderBase):
                 os.remove(concat_file)
                 for video in self.video_parts:
                     os.remove(video)
+
+                saved_file = output_file
                 
             except subprocess.CalledProcessError as e:
                 error_message = e.stderr if hasattr(e, 'stderr') and e.stderr else str(e)
@@ -323,6 +444,11 @@ class LinuxRecorder(ScreenRecorderBase):
 
             self.video_parts = []
             self.current_video_part = 0
+
+        return saved_file
             
     def open_output_folder(self):
-        subprocess.Popen(["xdg-open", self.output_folder])
\ No newline at end of file
+        subprocess.Popen(["xdg-open", self.output_folder])
+
+    def open_file(self, path):
+        subprocess.Popen(["xdg-open", path])
\ No newline at end of file
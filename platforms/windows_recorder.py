@@ -8,6 +8,7 @@ import threading
 from PyQt6.QtWidgets import QMessageBox
 from PyQt6.QtGui import QIcon
 from base.screen_recorder_base import ScreenRecorderBase
+from common.multi_monitor import monitor_bounds
 
 class WindowsRecorder(ScreenRecorderBase):
     def __init__(self):
@@ -146,16 +147,17 @@ class WindowsRecorder(ScreenRecorderBase):
         self.logger.info("FFmpeg was found.")
         
     def start_recording(self, continue_timer=False):
-        video_name = f"Video.{datetime.datetime.now().strftime('%m-%d-%Y.%H.%M.%S')}.{self.format_combo.currentText()}"
-        self.video_path = os.path.join(self.output_folder, video_name)
+        video_name = f"Video.{datetime.datetime.now().strftime('%m-%d-%Y.%H.%M.%S')}.{self.get_part_format()}"
+        self.video_path = os.path.join(self.get_recording_folder(), video_name)
 
-        fps = int(self.fps_combo.currentText())
+        fps = self.get_capture_fps()
         bitrate = self.bitrate_combo.currentText()
         codec = self.codec_combo.currentText()
 
-        selected_devices = self.get_selected_audio_devices()
+        # Time-lapse recordings have no audio track.
+        selected_devices = [] if self.is_timelapse() else self.get_selected_audio_devices()
 
-        if not selected_devices:
+        if not selected_devices and not self.is_timelapse():
             QMessageBox.critical(self, self.t("error"), self.t("error_no_selected_audio_device"))
             self.status_signals.status_changed.emit(self.t("error_recording"))
             return
@@ -196,15 +198,54 @@ class WindowsRecorder(ScreenRecorderBase):
             width = monitor.width
             height = monitor.height
 
+        video_filters = []
+        video_graph = None
+        video_maps = ["-map", "0:v"]
+        capture_x, capture_y = x1 + monitor.x, y1 + monitor.y
+        if self.get_capture_mode() == "follow":
+            capture_x, capture_y = monitor.x, monitor.y
+            capture_width, capture_height = monitor.width, monitor.height
+            follow_filter, (width, height) = self.build_follow_filter(monitor)
+            video_filters.append(follow_filter)
+        elif self.get_capture_mode() == "monitors":
+            capture_x, capture_y, capture_width, capture_height = monitor_bounds(self.monitors)
+            width, height = capture_width, capture_height
+            video_graph, video_maps = self.get_monitor_session()
+        else:
+            capture_width, capture_height = width, height
+
+        self.capture_origin = (capture_x, capture_y)
+        video_filters[:0] = self.get_overlay_filters(fps)
+        if self.get_capture_mode() != "monitors":
+            width, height = self.apply_output_scale(video_filters, width, height)
+
         ffmpeg_path = self.get_ffmpeg_path()
-        if len(selected_devices) > 1:
+        queues = self.queue_tuner.plan(capture_width, capture_height, fps, len(selected_devices), bitrate)
+        
+        if not selected_devices:
             ffmpeg_args = [
                 ffmpeg_path,
                 "-f", "gdigrab",
-                "-framerate", str(fps),
-                "-offset_x", str(x1 + monitor.x),
-                "-offset_y", str(y1 + monitor.y),
-                "-video_size", f"{width}x{height}",
+                "-thread_queue_size", str(queues['video_queue']),
+                "-framerate", self.get_capture_rate(),
+                "-offset_x", str(capture_x),
+                "-offset_y", str(capture_y),
+                "-video_size", f"{capture_width}x{capture_height}",
+                "-i", "desktop"
+            ]
+            if video_graph:
+                ffmpeg_args.extend(["-filter_complex", video_graph])
+            ffmpeg_args.extend(video_maps + ["-an"])
+
+        elif len(selected_devices) > 1:
+            ffmpeg_args = [
+                ffmpeg_path,
+                "-f", "gdigrab",
+                "-thread_queue_size", str(queues['video_queue']),
+                "-framerate", self.get_capture_rate(),
+                "-offset_x", str(capture_x),
+                "-offset_y", str(capture_y),
+                "-video_size", f"{capture_width}x{capture_height}",
                 "-i", "desktop"
             ]
             
@@ -216,7 +257,7 @@ class WindowsRecorder(ScreenRecorderBase):
 
                 ffmpeg_args.extend([
                     "-f", "dshow",
-                    "-thread_queue_size", "512",
+                    "-thread_queue_size", str(queues['audio_queue']),
                     "-audio_buffer_size", "20",
                     "-i", f"audio={normalized_device}"
                 ])
@@ -229,12 +270,11 @@ class WindowsRecorder(ScreenRecorderBase):
                 audio_map.append(f"[a{i}]")
             
             filter_complex = f"{';'.join(audio_filters)};{''.join(audio_map)}amix=inputs={len(selected_devices)}:duration=longest:dropout_transition=0[aout]"
+            filter_complex = self.add_idle_audio_filter(filter_complex)
+            if video_graph:
+                filter_complex = f"{video_graph};{filter_complex}"
             
-            ffmpeg_args.extend([
-                "-filter_complex", filter_complex,
-                "-map", "0:v",
-                "-map", "[aout]",
-            ])
+            ffmpeg_args.extend(["-filter_complex", filter_complex] + video_maps + ["-map", "[aout]"])
             
         else:
             device, volume = selected_devices[0]
@@ -244,39 +284,54 @@ class WindowsRecorder(ScreenRecorderBase):
                 audio_filter = f"volume={volume/100*2.5:.2f}"
             else:
                 audio_filter = f"volume={volume/100:.2f}"
+            audio_filter = self.add_idle_audio_filter(audio_filter)
             
             ffmpeg_args = [
                 ffmpeg_path,
                 "-f", "gdigrab",
-                "-framerate", str(fps),
-                "-offset_x", str(x1 + monitor.x),
-                "-offset_y", str(y1 + monitor.y),
-                "-video_size", f"{width}x{height}",
+                "-thread_queue_size", str(queues['video_queue']),
+                "-framerate", self.get_capture_rate(),
+                "-offset_x", str(capture_x),
+                "-offset_y", str(capture_y),
+                "-video_size", f"{capture_width}x{capture_height}",
                 "-i", "desktop",
                 "-f", "dshow",
-                "-thread_queue_size", "512",
+                "-thread_queue_size", str(queues['audio_queue']),
                 "-audio_buffer_size", "20",
                 "-i", f"audio={normalized_device}",
                 "-filter:a", audio_filter,
-                "-map", "0:v",
-                "-map", "1:a",
             ]
+            if video_graph:
+                ffmpeg_args.extend(["-filter_complex", video_graph])
+            ffmpeg_args.extend(video_maps + ["-map", "1:a"])
 
         ffmpeg_args.extend([
             "-c:a", "aac",
             "-b:a", "128k",
             "-ar", "48000",
             "-ac", "2",
-            "-threads", "0",
+        ] + self.get_thread_args() + [
             "-pix_fmt", "yuv420p",
             "-vsync", "cfr",
             "-r", str(fps),
             "-loglevel", "warning",
             "-hide_banner",
-            "-max_muxing_queue_size", "1024"
+            "-max_muxing_queue_size", str(queues['muxing_queue'])
         ])
 
-        if codec == "libx264":
+        output_filters = list(video_filters)
+        if not video_graph:
+            output_filters.extend(self.get_timelapse_filters())
+            output_filters.extend(self.get_roi_filters(monitor))
+            output_filters.extend(self.get_idle_filters())
+        if output_filters:
+            ffmpeg_args.extend(["-vf", ",".join(output_filters)])
+
+        if self.deferred_session:
+            ffmpeg_args.extend(self.get_staging_encoder_args(fps))
+        elif self.is_long_session():
+            ffmpeg_args.extend(self.get_long_session_encoder_args(codec, bitrate, fps))
+        elif codec == "libx264":
             ffmpeg_args.extend([
                 "-c:v", "libx264",
                 "-preset", "veryfast",
@@ -303,7 +358,8 @@ class WindowsRecorder(ScreenRecorderBase):
                 "-b:v", bitrate,
             ])
 
-        ffmpeg_args.append(self.video_path)
+        ffmpeg_args.extend(self.get_output_args())
+        ffmpeg_args.extend(self.get_preview_tap_args(width, height, video_filters))
         
         self.logger.info(f"FFmpeg command: {' '.join(ffmpeg_args)}")
 
@@ -328,6 +384,7 @@ class WindowsRecorder(ScreenRecorderBase):
             self.logger.error(f"Error starting recording: {e}")
             return
 
+        self.on_recording_process_started(monitor)
         self.toggle_widgets(recording=True)
         self.status_label.setText(self.t("status_recording"))
 
@@ -337,20 +394,21 @@ class WindowsRecorder(ScreenRecorderBase):
         threading.Thread(target=self.read_ffmpeg_output, daemon=True).start()
         
     def concat_video_parts(self):
+        saved_file = None
         if len(self.video_parts) > 0:
             ffmpeg_path = self.get_ffmpeg_path()
             concat_file = os.path.join(self.output_folder, "concat_list.txt")
-            output_file = os.path.join(self.output_folder, f"Video_{datetime.datetime.now().strftime('%m-%d-%Y.%H.%M.%S')}.{self.format_combo.currentText()}")
+            output_file = self.get_concat_output_path()
 
-            with open(concat_file, 'w') as f:
-                for video in self.video_parts:
-                    f.write(f"file '{os.path.abspath(video)}'\n")
+            self.write_concat_list(concat_file)
 
             concat_command = [
                 ffmpeg_path,
                 "-f", "concat",
                 "-safe", "0",
                 "-i", concat_file,
+            ] + self.get_chapter_args() + [
+                "-map", "0",
                 "-c", "copy", 
                 "-movflags", "+faststart",
                 output_file
@@ -372,6 +430,8 @@ class WindowsRecorder(ScreenRecorderBase):
                     if os.path.exists(video):
                         os.remove(video)
 
+                saved_file = output_file
+
             except subprocess.CalledProcessError as e:
                 error_message = e.stderr if e.stderr else str(e)
                 QMessageBox.critical(self, self.t("error"), self.t("error_concat_video").format(error=error_message))
@@ -380,6 +440,11 @@ class WindowsRecorder(ScreenRecorderBase):
 
             self.video_parts = []
             self.current_video_part = 0
+
+        return saved_file
             
     def open_output_folder(self):
-        os.startfile(self.output_folder)
\ No newline at end of file
+        os.startfile(self.output_folder)
+
+    def open_file(self, path):
+        os.startfile(path)
\ No newline at end of file
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules under test are imported the way the app imports them, from the
+# repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
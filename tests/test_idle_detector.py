@@ -0,0 +1,94 @@
+import pytest
+
+from common import idle_detector
+
+# Two files of 100 s with a keyframe every 2 s.
+DURATIONS = [100.0, 100.0]
+KEYFRAMES = [float(seconds) for seconds in range(0, 100, 2)]
+
+def index_for(i):
+    return {"keyframes": KEYFRAMES}
+
+def test_plan_cuts_spanning_two_files():
+    # Starts on the first keyframe after the idle stretch begins and ends on
+    # the keyframe before the pre-roll, in the second file.
+    cuts = idle_detector.plan_cuts([(51.0, 171.0)], DURATIONS, index_for)
+    assert cuts == [(52.0, 168.0)]
+
+def test_plan_cuts_at_the_end_of_the_recording():
+    cuts = idle_detector.plan_cuts([(130.0, 200.0)], DURATIONS, index_for)
+    assert cuts == [(130.0, 200.0)]
+
+def test_plan_cuts_end_within_rounding_of_the_total():
+    cuts = idle_detector.plan_cuts([(130.0, 199.9995)], DURATIONS, index_for)
+    assert cuts == [(130.0, 200.0)]
+
+def test_plan_cuts_start_after_the_last_keyframe_of_a_file():
+    # No keyframe follows in the first file, so the cut starts at the second.
+    cuts = idle_detector.plan_cuts([(99.0, 180.0)], DURATIONS, index_for)
+    assert cuts == [(100.0, 176.0)]
+
+def test_plan_cuts_ignores_stretches_below_the_threshold():
+    assert idle_detector.plan_cuts([(10.0, 69.9)], DURATIONS, index_for) == []
+    assert idle_detector.plan_cuts([(10.0, 70.0)], DURATIONS, index_for) == [(10.0, 66.0)]
+
+def test_plan_cuts_keeps_the_preroll():
+    cuts = idle_detector.plan_cuts([(10.0, 80.0)], DURATIONS, index_for, preroll=10.0)
+    assert cuts == [(10.0, 70.0)]
+
+def test_build_concat_entries_cut_spanning_two_files():
+    entries = idle_detector.build_concat_entries(["a.mkv", "b.mkv"], DURATIONS, [(52.0, 168.0)])
+    assert entries == [("a.mkv", None, 52.0, 52.0), ("b.mkv", 68.0, None, None)]
+
+def test_build_concat_entries_with_start_time_and_reorder_delay():
+    # The out point moves back by the reorder delay; the duration still
+    # holds the length that is shown.
+    entries = idle_detector.build_concat_entries(["a.mkv", "b.mkv"], DURATIONS, [(52.0, 168.0)],
+                                                 starts=[1.4, 0.5], delays=[0.0667, 0.0])
+    assert entries[0][0] == "a.mkv"
+    assert entries[0][1] is None
+    assert entries[0][2] == pytest.approx(52.0 + 1.4 - 0.0667)
+    assert entries[0][3] == pytest.approx(52.0)
+    assert entries[1] == ("b.mkv", pytest.approx(68.5), None, None)
+
+def test_build_concat_entries_cut_at_the_end():
+    entries = idle_detector.build_concat_entries(["a.mkv", "b.mkv"], DURATIONS, [(130.0, 200.0)],
+                                                 delays=[0.0, 0.1])
+    assert entries[0] == ("a.mkv", None, None, None)
+    assert entries[1] == ("b.mkv", None, pytest.approx(29.9), pytest.approx(30.0))
+
+def test_build_concat_entries_cut_inside_one_file():
+    entries = idle_detector.build_concat_entries(["a.mkv"], [100.0], [(20.0, 50.0)])
+    assert entries == [("a.mkv", None, 20.0, 20.0), ("a.mkv", 50.0, None, None)]
+
+def test_build_concat_entries_without_cuts():
+    entries = idle_detector.build_concat_entries(["a.mkv", "b.mkv"], DURATIONS, [])
+    assert entries == [("a.mkv", None, None, None), ("b.mkv", None, None, None)]
+
+def test_map_time_across_several_cuts():
+    cuts = [(10.0, 20.0), (50.0, 60.0)]
+    assert idle_detector.map_time(5.0, cuts) == 5.0
+    # Inside a cut, a moment lands where the recording picks up again.
+    assert idle_detector.map_time(15.0, cuts) == 10.0
+    assert idle_detector.map_time(20.0, cuts) == 10.0
+    assert idle_detector.map_time(30.0, cuts) == 20.0
+    assert idle_detector.map_time(55.0, cuts) == 40.0
+    assert idle_detector.map_time(70.0, cuts) == 50.0
+
+def test_idle_intervals_across_parts():
+    # Part 1 wrote two segments, part 2 one.
+    parts = [{"part": 1, "files": 2}, {"part": 2, "files": 1}]
+    idle = [
+        {"part": 1, "source": "screen", "start": 150.0, "end": None},
+        {"part": 2, "source": "screen", "start": 0.0, "end": 30.0},
+        {"part": 1, "source": "audio", "start": 160.0, "end": 190.0},
+        {"part": 2, "source": "audio", "start": 0.0, "end": None},
+        {"part": 9, "source": "screen", "start": 0.0, "end": None},
+    ]
+    intervals = idle_detector.idle_intervals(idle, parts, [100.0, 100.0, 50.0])
+    assert intervals == [(160.0, 190.0), (200.0, 230.0)]
+
+def test_idle_intervals_need_both_sources():
+    parts = [{"part": 1, "files": 1}]
+    idle = [{"part": 1, "source": "screen", "start": 0.0, "end": None}]
+    assert idle_detector.idle_intervals(idle, parts, [100.0]) == []
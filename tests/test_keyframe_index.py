@@ -0,0 +1,109 @@
+import queue
+import shutil
+import subprocess
+
+import pytest
+
+from common import job_tasks, keyframe_index
+
+# framecrc of an H.264 stream with B-frames that starts at 1.4 s; only the
+# packets without an F= column are keyframes.
+PACKETS = """#extradata 0:       47, 0x6a7b10df
+#software: Lavf61.1.100
+#tb 0: 1/10240
+#media_type 0: video
+#codec_id 0: h264
+#dimensions 0: 160x90
+#sar 0: 1/1
+0,      12288,      14336,     1024,     2218, 0xb000e58b
+0,      13312,      17408,     1024,      574, 0xbf401f17, F=0x0
+0,      14336,      15360,     1024,       50, 0xe3ac15ac, F=0x0
+0,      22528,      24576,     1024,     2101, 0x1a2b3c4d
+0,      23552,      27648,     1024,      533, 0x2b3c4d5e, F=0x0
+0,      32768,      34816,     1024,     2099, 0x3c4d5e6f
+"""
+
+def test_parse_packets_with_a_start_time(tmp_path):
+    path = tmp_path / "packets.framecrc"
+    path.write_text(PACKETS, encoding="utf-8")
+    codec, time_base, keyframes, delay = keyframe_index.parse_packets(str(path), start=1.4)
+    assert codec == "h264"
+    assert time_base == [1, 10240]
+    assert keyframes == pytest.approx([0.0, 1.0, 2.0])
+    # The reorder delay is read from the keyframes: pts - dts = 2048 ticks.
+    assert delay == pytest.approx(0.2)
+
+def test_parse_packets_skips_malformed_lines(tmp_path):
+    path = tmp_path / "packets.framecrc"
+    path.write_text("#tb 0: 1/1000\n0, 0, 0, 33, 100, 0x0\n0, x, y, 33, 100, 0x0\ngarbage\n", encoding="utf-8")
+    assert keyframe_index.parse_packets(str(path)) == (None, [1, 1000], [0.0], 0.0)
+
+KEYFRAMES = [0.0, 2.0, 4.0, 6.0]
+
+def test_keyframe_before():
+    assert keyframe_index.keyframe_before(KEYFRAMES, 3.9) == 2.0
+    assert keyframe_index.keyframe_before(KEYFRAMES, 10.0) == 6.0
+    # A time before the first keyframe still cuts from the first one.
+    assert keyframe_index.keyframe_before([0.5, 2.5], 0.1) == 0.5
+
+def test_keyframe_after():
+    assert keyframe_index.keyframe_after(KEYFRAMES, 2.1) == 4.0
+    assert keyframe_index.keyframe_after(KEYFRAMES, 6.1) is None
+
+def test_keyframes_at_exact_times_within_the_tolerance():
+    # Timestamps read back from a container are rounded; a time within a
+    # millisecond of a keyframe counts as that keyframe from both sides.
+    assert keyframe_index.keyframe_before(KEYFRAMES, 4.0) == 4.0
+    assert keyframe_index.keyframe_before(KEYFRAMES, 3.9995) == 4.0
+    assert keyframe_index.keyframe_after(KEYFRAMES, 4.0) == 4.0
+    assert keyframe_index.keyframe_after(KEYFRAMES, 4.0005) == 4.0
+    assert keyframe_index.keyframe_before(KEYFRAMES, 3.998) == 2.0
+    assert keyframe_index.keyframe_after(KEYFRAMES, 4.002) == 6.0
+
+def test_read_start():
+    assert keyframe_index.read_start("  Duration: 00:00:03.00, start: 1.400000, bitrate: 30 kb/s") == 1.4
+    assert keyframe_index.read_start("no summary") == 0.0
+
+
+needs_ffmpeg = pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")
+
+@pytest.fixture
+def clip(tmp_path):
+    # 40 s with a keyframe every 2 s and B-frames, like a recording.
+    path = tmp_path / "clip.mp4"
+    subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", "testsrc=d=40:s=320x180:r=30",
+                    "-f", "lavfi", "-i", "sine=d=40", "-c:v", "libx264", "-preset", "ultrafast", "-bf", "2",
+                    "-g", "60", "-keyint_min", "60", "-sc_threshold", "0", "-c:a", "aac", str(path)], check=True)
+    return path
+
+def trim(source, target, **params):
+    job = {"id": "trim", "source": str(source), "target": str(target), "params": params}
+    return job_tasks.trim(job, "ffmpeg", 1, queue.Queue(), {})
+
+@needs_ffmpeg
+def test_trim_from_the_keyframe_before_the_start(clip, tmp_path):
+    target = tmp_path / "cut.mp4"
+    trim(clip, target, start=7.3, end=21.0)
+    duration, video, audio = job_tasks.probe_media("ffmpeg", str(target))
+    assert (video, audio) == (1, 1)
+    # Copying starts at the keyframe at 6 s.
+    assert duration == pytest.approx(15.0, abs=0.2)
+
+@needs_ffmpeg
+def test_trim_accurate(clip, tmp_path):
+    target = tmp_path / "cut.mp4"
+    trim(clip, target, start=7.3, end=21.0, accurate=True)
+    duration, video, audio = job_tasks.probe_media("ffmpeg", str(target))
+    assert (video, audio) == (1, 1)
+    assert duration == pytest.approx(13.7, abs=0.2)
+
+@needs_ffmpeg
+def test_trim_on_a_keyframe_is_not_re_encoded(clip, tmp_path):
+    target = tmp_path / "cut.mp4"
+    trim(clip, target, start=8.0, end=20.0, accurate=True)
+    assert job_tasks.probe_media("ffmpeg", str(target))[0] == pytest.approx(12.0, abs=0.2)
+
+@needs_ffmpeg
+def test_trim_rejects_an_empty_range(clip, tmp_path):
+    with pytest.raises(RuntimeError):
+        trim(clip, tmp_path / "cut.mp4", start=20.0, end=10.0)
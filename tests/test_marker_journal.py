@@ -0,0 +1,65 @@
+import json
+
+from common import marker_journal
+
+def marker(part, seconds, title):
+    return {"type": "marker", "part": part, "time": seconds, "title": title}
+
+def test_build_chapters_offsets_parts_by_their_segments():
+    # Part 1 wrote two segments, so part 2 starts after both.
+    parts = [{"part": 1, "files": 2}, {"part": 2, "files": 1}]
+    markers = [marker(1, 10.0, "A"), marker(1, 90.0, "B"), marker(2, 5.0, "C")]
+    chapters = marker_journal.build_chapters(markers, parts, [60.0, 60.0, 30.0])
+    assert chapters == [(0.0, 10.0, "Start"), (10.0, 90.0, "A"), (90.0, 125.0, "B"), (125.0, 150.0, "C")]
+
+def test_build_chapters_drops_markers_of_unknown_parts():
+    parts = [{"part": 1, "files": 1}]
+    markers = [marker(1, 0.0, "A"), marker(7, 5.0, "Lost")]
+    assert marker_journal.build_chapters(markers, parts, [60.0]) == [(0.0, 60.0, "A")]
+
+def test_build_chapters_adds_a_start_chapter_only_when_needed():
+    parts = [{"part": 1, "files": 1}]
+    assert marker_journal.build_chapters([marker(1, 0.3, "A")], parts, [60.0]) == [(0.3, 60.0, "A")]
+    assert marker_journal.build_chapters([marker(1, 20.0, "A")], parts, [60.0], start_title="Intro") == [
+        (0.0, 20.0, "Intro"), (20.0, 60.0, "A")]
+    assert marker_journal.build_chapters([], parts, [60.0]) == []
+
+def test_build_chapters_clamps_markers_to_the_recording():
+    parts = [{"part": 1, "files": 1}]
+    chapters = marker_journal.build_chapters([marker(1, -1.0, "A"), marker(1, 75.0, "B")], parts, [60.0])
+    assert chapters == [(0.0, 60.0, "A")]
+
+def test_build_chapters_with_idle_cuts():
+    parts = [{"part": 1, "files": 1}]
+    markers = [marker(1, 10.0, "A"), marker(1, 150.0, "B")]
+    # The second cut runs to the end and gets no chapter of its own.
+    cuts = [(50.0, 100.0), (180.0, 200.0)]
+    chapters = marker_journal.build_chapters(markers, parts, [200.0], cuts=cuts, skipped_title="Skipped {duration}")
+    assert chapters == [(0.0, 10.0, "Start"), (10.0, 50.0, "A"), (50.0, 100.0, "Skipped 0:50"),
+                        (100.0, 130.0, "B")]
+
+def test_load_journal_skips_a_truncated_last_line(tmp_path):
+    path = tmp_path / "session.jsonl"
+    lines = [json.dumps(marker(1, 1.0, "A")), json.dumps({"type": "part", "part": 1, "files": 1}),
+             json.dumps({"type": "idle", "part": 1, "source": "screen", "start": 2.0, "end": None})]
+    path.write_text("\n".join(lines) + '\n{"type": "marker", "pa', encoding="utf-8")
+    markers, parts, idle = marker_journal.load_journal(str(path))
+    assert [entry["title"] for entry in markers] == ["A"]
+    assert parts == [{"type": "part", "part": 1, "files": 1}]
+    assert len(idle) == 1
+
+def test_load_journal_missing_file(tmp_path):
+    assert marker_journal.load_journal(str(tmp_path / "missing.jsonl")) == ([], [], [])
+
+def test_escape_metadata():
+    assert marker_journal.escape_metadata("a=b;c#d\\e\nf") == "a\\=b\\;c\\#d\\\\e\\\nf"
+    assert marker_journal.escape_metadata("plain title") == "plain title"
+
+def test_write_ffmetadata(tmp_path):
+    path = tmp_path / "chapters.txt"
+    marker_journal.write_ffmetadata(str(path), [(0.0, 1.5, "Start"), (1.5, 3.0, "x=1")])
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        ";FFMETADATA1",
+        "[CHAPTER]", "TIMEBASE=1/1000", "START=0", "END=1500", "title=Start",
+        "[CHAPTER]", "TIMEBASE=1/1000", "START=1500", "END=3000", "title=x\\=1",
+    ]